@@ -0,0 +1,163 @@
+# autotune.py
+# Per-session batch-size auto-tuning for the bulk checkers.
+#
+# Throughput is measured as numbers checked per second of wall time, where the
+# wall time of a batch includes the request, the pause after it and any FloodWait
+# it caused. The tuner hill-climbs between MIN_BATCH and MAX_BATCH, keeps one
+# best size per session and time-of-day band in TUNING_FILE, and the next run
+# starts from that size.
+
+import os
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+TUNING_FILE     = Path("batch_tuning.json")
+
+MIN_BATCH       = 10        # never go below / above these, whatever the numbers say
+MAX_BATCH       = 30
+STEP            = 2
+WINDOW          = 4         # batches measured before a size is judged
+DECAY           = 0.8       # weight of older samples in the per-size totals
+EXPLORE_EVERY   = 6         # once converged, exploit windows between two explorations
+BAND_HOURS      = 6         # time-of-day band width (00-05, 06-11, ...)
+
+
+def time_band(now: Optional[datetime] = None) -> str:
+    hour = (now or datetime.now()).hour
+    start = hour - hour % BAND_HOURS
+    return f"{start:02d}-{start + BAND_HOURS - 1:02d}"
+
+
+def load_tuning(path: Path = TUNING_FILE) -> Dict:
+    if not path.is_file():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@contextmanager
+def file_lock(path: Path):
+    """ Exclusive lock on `path` (created if missing), held across processes until the block exits """
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:     # LK_LOCK gives up after ~10 s; keep waiting
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BatchTuner:
+    def __init__(self, session: str, default: int,
+                 min_size: int = MIN_BATCH, max_size: int = MAX_BATCH,
+                 path: Path = TUNING_FILE):
+        self.session = session
+        self.min_size = min_size
+        self.max_size = max_size
+        self.path = path
+        self.band = time_band()
+
+        saved = load_tuning(path).get(session, {}).get(self.band, {})
+        self.best = self._clamp(saved.get("size", default))
+        self.current = self.best
+
+        self.stats: Dict[int, List[float]] = {}     # size → [numbers, seconds], decayed
+        self.direction = 1
+        self.samples = 0
+        self.losses = 0                             # explorations lost in a row
+        self.exploit_windows = 0
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def rate(self, size: int) -> Optional[float]:
+        numbers, seconds = self.stats.get(size, (0.0, 0.0))
+        return numbers / seconds if seconds > 0 else None
+
+    @property
+    def converged(self) -> bool:
+        return self.losses >= 2
+
+    def next_size(self) -> int:
+        return self.current
+
+    def record(self, size: int, numbers: int, seconds: float):
+        """ One batch of `size` that produced `numbers` answers in `seconds` (incl. pause / FloodWait) """
+        totals = self.stats.setdefault(size, [0.0, 0.0])
+        totals[0] = totals[0] * DECAY + numbers
+        totals[1] = totals[1] * DECAY + seconds
+
+        if size != self.current:
+            return
+        self.samples += 1
+        if self.samples >= WINDOW:
+            self.samples = 0
+            self._step()
+
+    def _step(self):
+        if self.current == self.best:
+            self.exploit_windows += 1
+            if self.converged and self.exploit_windows < EXPLORE_EVERY:
+                return
+            self.exploit_windows = 0
+            candidate = self._clamp(self.best + self.direction * STEP)
+            if candidate == self.best:
+                self.direction = -self.direction
+                candidate = self._clamp(self.best + self.direction * STEP)
+            self.current = candidate
+            return
+
+        # Exploration window over → keep the winner
+        explored, best_rate = self.rate(self.current), self.rate(self.best)
+        if explored is not None and (best_rate is None or explored > best_rate):
+            self.best = self.current
+            self.losses = 0
+        else:
+            self.direction = -self.direction
+            self.losses += 1
+        self.current = self.best
+        self.save()
+
+    def save(self):
+        """ Merges this session's best size into TUNING_FILE (other sessions are kept).
+            Workers of multiple_acc.py save concurrently, so load → merge → replace runs under a lock """
+        rate = self.rate(self.best)
+        entry = {
+            "size": self.best,
+            "numbers_per_sec": round(rate, 4) if rate else None,
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with file_lock(self.path.with_name(self.path.name + ".lock")):
+            data = load_tuning(self.path)
+            data.setdefault(self.session, {})[self.band] = entry
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
@@ -0,0 +1,113 @@
+# batch_result.py
+# Columnar answers of one ImportContacts batch.
+#
+# The old path built a dict per number, called datetime.now().strftime() per
+# number and later turned the dicts into a DataFrame. BatchResult instead fills
+# preallocated column lists once per batch: NO is the zero status code of a
+# bytearray, so a NO answer costs one list store; only YES rows touch the name
+# columns. The batch has a single checked_at and its constant fields (worker,
+# batch_index, ...) are stored once. ResultWriter writes the columns straight
+# to the checkpoint CSV and the YES workbook — no per-record dicts and no
+# DataFrame per batch. bench_results.py compares both paths.
+
+from datetime import datetime
+from itertools import repeat
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# status codes → the strings written to disk (code 0 = prefilled NO)
+NO, YES, FAILED = 0, 1, 2
+STATUSES = ("NO", "YES", "FAILED")
+
+NAME_COLUMNS = ("first_name", "last_name", "username", "telegram_id", "access_hash")
+
+
+class BatchResult:
+    __slots__ = ("phone", "status", "first_name", "last_name", "username", "telegram_id",
+                 "access_hash", "error", "yes", "checked_at", "extra")
+
+    def __init__(self, size: int = 0, extra: Optional[Dict] = None, checked_at: Optional[str] = None):
+        self.phone: List[str] = [""] * size
+        self.status = bytearray(size)              # all NO until told otherwise
+        self.first_name: List[str] = [""] * size
+        self.last_name: List[str] = [""] * size
+        self.username: List[str] = [""] * size
+        self.telegram_id: List[Any] = [""] * size
+        self.access_hash: List[str] = [""] * size  # str: int64 does not survive Excel; valid only for the checking session
+        self.error: List[str] = [""] * size
+        self.yes: List[int] = []                   # row numbers of the YES answers
+        self.checked_at = checked_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.extra: Dict = dict(extra or {})       # per-batch constants (worker, batch_index, ...)
+
+    # ── building ──────────────────────────────────
+    @classmethod
+    def from_answers(cls, answers: List[Tuple[str, Any]], extra: Optional[Dict] = None) -> "BatchResult":
+        """ pipeline.import_batch answers [(phone, user or None)] → columns """
+        result = cls(len(answers), extra)
+        phone, status, yes = result.phone, result.status, result.yes
+        for i, (number, user) in enumerate(answers):
+            phone[i] = number
+            if user is not None:
+                status[i] = YES
+                result.first_name[i] = user.first_name or ""
+                result.last_name[i] = user.last_name or ""
+                result.username[i] = user.username or ""
+                result.telegram_id[i] = user.id
+                if user.access_hash is not None:
+                    result.access_hash[i] = str(user.access_hash)
+                yes.append(i)
+        return result
+
+    @classmethod
+    def failed(cls, phones: List[str], error: str, extra: Optional[Dict] = None) -> "BatchResult":
+        result = cls(len(phones), extra)
+        result.phone[:] = phones
+        result.status[:] = bytes([FAILED]) * len(phones)
+        result.error[:] = [error] * len(phones)
+        return result
+
+    def extend(self, other: "BatchResult") -> "BatchResult":
+        """ Appends `other`'s rows (e.g. numbers given up on in the same batch); keeps this checked_at """
+        offset = len(self.phone)
+        for column in ("phone", *NAME_COLUMNS, "error"):
+            getattr(self, column).extend(getattr(other, column))
+        self.status.extend(other.status)
+        self.yes.extend(offset + i for i in other.yes)
+        return self
+
+    # ── reading ───────────────────────────────────
+    def __len__(self) -> int:
+        return len(self.phone)
+
+    @property
+    def yes_count(self) -> int:
+        return len(self.yes)
+
+    @property
+    def answered(self) -> int:
+        """ YES + NO rows """
+        return len(self.status) - self.status.count(FAILED)
+
+    def column(self, name: str, rows: Optional[List[int]] = None) -> Any:
+        """ One field as a list (or a repeat() of a per-batch constant) over all rows or `rows` """
+        n = len(self.phone) if rows is None else len(rows)
+        if name == "status":
+            codes = self.status if rows is None else (self.status[i] for i in rows)
+            return [STATUSES[c] for c in codes]
+        if name in self.__slots__ and name not in ("yes", "checked_at", "extra"):
+            values = getattr(self, name)
+            return values if rows is None else [values[i] for i in rows]
+        if name == "checked_at":
+            return repeat(self.checked_at, n)
+        return repeat(self.extra.get(name, ""), n)
+
+    def rows(self, fields: List[str], rows: Optional[List[int]] = None) -> Iterator[tuple]:
+        """ Tuples in `fields` order, for csv.writer.writerows """
+        return zip(*(self.column(f, rows) for f in fields))
+
+    def columns(self, fields: List[str], rows: Optional[List[int]] = None) -> Dict[str, list]:
+        return {f: list(self.column(f, rows)) for f in fields}
+
+    def records(self) -> List[Dict]:
+        """ One dict per row — for consumers that need them (coordinator, dead letters) """
+        fields = ["phone", "status", *NAME_COLUMNS, "error", "checked_at", *self.extra]
+        return [dict(zip(fields, row)) for row in self.rows(fields)]
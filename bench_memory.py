@@ -0,0 +1,90 @@
+# bench_memory.py
+# Per-worker memory benchmark: pickled list chunks vs. the shared int64 work list.
+#
+# For each input size a spawned child (like a multiple_acc worker) receives its
+# share of the work either the old way — a pickled list of digit strings — or
+# as a shared_work slice spec, walks through it batch by batch, and reports its
+# private memory (RssAnon). With the shared list that stays flat as the input
+# grows; the mapped file only adds page-cache pages shared by all workers.
+#
+#   python bench_memory.py                       # 100k / 500k / 2M numbers, 4 workers
+#   python bench_memory.py --sizes 1000000 -w 8
+
+import argparse
+import multiprocessing as mp
+from typing import Dict, List
+
+from shared_work import SharedWorkList, WorkSlice
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+SIZES    = [100_000, 500_000, 2_000_000]
+WORKERS  = 4
+BATCH    = 20
+
+
+def rss_mb() -> Dict[str, float]:
+    """ RssAnon (private to this worker) and RssFile (page cache shared with the others) """
+    out = {"RssAnon": 0.0, "RssFile": 0.0}
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            key = line.split(":", 1)[0]
+            if key in out:
+                out[key] = int(line.split()[1]) / 1024      # kB → MB
+    return out
+
+
+def child(conn, mode: str):
+    base = rss_mb()
+    payload = conn.recv()
+    checked = 0
+    if mode == "list":
+        phones: List[str] = payload
+        for pos in range(0, len(phones), BATCH):
+            checked += len(phones[pos : pos + BATCH])
+        end = rss_mb()      # the chunk is still alive here, as in a real worker
+    else:
+        work = WorkSlice(*payload)
+        for pos in range(0, len(work), BATCH):
+            checked += len(work.take(pos, BATCH))
+        end = rss_mb()
+        work.close()
+    conn.send((checked, base, end))
+
+
+def run(mode: str, phones: List[str], n_workers: int) -> tuple:
+    """ → (numbers seen by worker 0, its RSS before receiving work, its RSS after the last batch) """
+    shared = SharedWorkList(phones) if mode == "shared" else None
+    try:
+        parent, child_end = mp.Pipe()
+        p = mp.Process(target=child, args=(child_end, mode))
+        p.start()
+        parent.send(phones[0::n_workers] if shared is None else shared.slice_spec(0, n_workers))
+        result = parent.recv()
+        p.join()
+        return result
+    finally:
+        if shared is not None:
+            shared.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker peak RSS: pickled chunks vs shared work list")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="input sizes to test")
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS, help=f"workers the input is split over (default: {WORKERS})")
+    args = parser.parse_args()
+
+    mp.set_start_method("spawn", force=True)
+    print(f"{'numbers':>10} | {'mode':<6} | {'per worker':>10} | {'private before':>14} | {'private after':>13} | {'shared pages':>12}")
+    print("-" * 82)
+    for size in args.sizes:
+        phones = [str(8801300000000 + i) for i in range(size)]
+        for mode in ("list", "shared"):
+            checked, base, end = run(mode, phones, args.workers)
+            print(f"{size:>10,} | {mode:<6} | {checked:>10,} | {base['RssAnon']:>12.1f}MB | "
+                  f"{end['RssAnon']:>11.1f}MB | {end['RssFile'] - base['RssFile']:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# bench_results.py
+# Microbenchmark: per-record dicts vs. columnar BatchResult for batch results.
+#
+# Both paths turn synthetic ImportContacts answers into what ResultWriter
+# persists: checkpoint CSV rows (formatted, then discarded, so disk speed does
+# not count) and a DataFrame of the YES rows for the workbook. "dicts" is the
+# previous path — a dict and a strftime() per number, DictWriter per row and a
+# DataFrame per batch. "columnar" is BatchResult — column lists filled once per
+# batch, one timestamp, tuples to csv.writer and one DataFrame per flush group.
+#
+#   python bench_results.py                     # 1M numbers, batches of 20, 30% YES
+#   python bench_results.py -n 200000 --yes 0.1 --batch 50
+
+import csv
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, List, Tuple
+
+from batch_result import BatchResult
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+NUMBERS      = 1_000_000
+BATCH        = 20
+YES_RATE     = 0.3
+GROUP        = 8            # batches per writer flush (persistence.GROUP_BATCHES)
+RUNS         = 3
+ALLOC_SAMPLE = 50_000       # numbers measured under tracemalloc
+
+FIELDS = ["phone", "checked_at", "worker", "session", "first_name", "last_name",
+          "username", "telegram_id", "access_hash", "status", "error", "batch_end_local_idx"]
+YES_FIELDS = [f for f in FIELDS if f not in ("error", "batch_end_local_idx")]
+
+
+class Discard:
+    """ File-like sink: CSV text is formatted but not kept """
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def make_batches(n: int, batch: int, yes_rate: float) -> List[List[Tuple[str, Any]]]:
+    rng = random.Random(7)
+    answers = []
+    for i in range(n):
+        user = None
+        if rng.random() < yes_rate:
+            user = SimpleNamespace(first_name="Rahim", last_name="Uddin", username=f"user{i}", id=100000 + i,
+                                   access_hash=-4611686018427387904 + i)
+        answers.append((str(8801700000000 + i), user))
+    return [answers[i : i + batch] for i in range(0, n, batch)]
+
+
+def dict_path(batches: List[List[Tuple[str, Any]]]) -> int:
+    """ The per-record path the checkers used before BatchResult """
+    import pandas as pd
+    w = csv.DictWriter(Discard(), fieldnames=FIELDS, extrasaction="ignore", restval="")
+    frames = 0
+    for b, answers in enumerate(batches):
+        checked, yes = [], []
+        for phone, user in answers:
+            record = {"phone": phone, "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                      "worker": 1, "session": "checker_01"}
+            if user:
+                record.update({"first_name": user.first_name or "", "last_name": user.last_name or "",
+                               "username": user.username or "", "telegram_id": user.id,
+                               "access_hash": str(user.access_hash), "status": "YES"})
+                yes.append(record)
+            else:
+                record["status"] = "NO"
+            checked.append(record)
+        for record in checked:
+            w.writerow({**record, "batch_end_local_idx": b})
+        if yes:
+            frames += len(pd.DataFrame(yes))
+    return frames
+
+
+def columnar_path(batches: List[List[Tuple[str, Any]]]) -> int:
+    """ BatchResult, as ResultWriter consumes it """
+    import pandas as pd
+    w = csv.writer(Discard())
+    frames = 0
+    group: List[BatchResult] = []
+
+    def flush():
+        nonlocal frames
+        columns = {f: [] for f in YES_FIELDS}
+        for result in group:
+            w.writerows(result.rows(FIELDS))
+            for f, values in result.columns(YES_FIELDS, result.yes).items():
+                columns[f].extend(values)
+        frames += len(pd.DataFrame(columns))
+        group.clear()
+
+    for b, answers in enumerate(batches):
+        result = BatchResult.from_answers(answers, {"worker": 1, "session": "checker_01"})
+        result.extra["batch_end_local_idx"] = b
+        group.append(result)
+        if len(group) >= GROUP:
+            flush()
+    if group:
+        flush()
+    return frames
+
+
+def best_of(fn: Callable, batches, runs: int) -> Tuple[float, int]:
+    times, rows = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = fn(batches)
+        times.append(time.perf_counter() - started)
+    return min(times), rows
+
+
+def peak_mb(fn: Callable, batches) -> float:
+    """ Peak traced Python allocations while `fn` runs """
+    tracemalloc.start()
+    fn(batches)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch result assembly: dicts vs columnar")
+    parser.add_argument("-n", "--numbers", type=int, default=NUMBERS)
+    parser.add_argument("--batch", type=int, default=BATCH)
+    parser.add_argument("--yes", type=float, default=YES_RATE, help="share of YES answers")
+    parser.add_argument("-r", "--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    import pandas  # noqa: F401 — import once, outside the timed region
+
+    batches = make_batches(args.numbers, args.batch, args.yes)
+    sample = batches[: max(1, ALLOC_SAMPLE // args.batch)]
+    print(f"{args.numbers:,} numbers | batches of {args.batch} | {args.yes:.0%} YES | best of {args.runs}\n")
+    print(f"{'path':<10} | {'seconds':>8} | {'µs/number':>9} | {'YES rows':>9} | {'peak MB':>8} (first {len(sample) * args.batch:,})")
+    print("-" * 72)
+    results = {}
+    for name, fn in (("dicts", dict_path), ("columnar", columnar_path)):
+        seconds, yes_rows = best_of(fn, batches, args.runs)
+        peak = peak_mb(fn, sample)
+        results[name] = seconds
+        print(f"{name:<10} | {seconds:>8.2f} | {seconds / args.numbers * 1e6:>9.2f} | {yes_rows:>9,} | {peak:>8.2f}")
+    print(f"\ncolumnar is {results['dicts'] / results['columnar']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench_startup.py
+# Startup-time benchmark for the entry points.
+#
+# Measures how long a fresh interpreter needs to import each script (what every
+# `python script.py` and every spawned multiple_acc / mcheck worker pays before doing any
+# work) and lists the slowest imports from `python -X importtime`.
+#
+#   python bench_startup.py                 # all entry points, 5 runs each
+#   python bench_startup.py -n 10 --top 15 multiple_acc
+
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+import time
+from typing import List, Tuple
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+ENTRY_POINTS = ["check_excel_numbers", "multiple_acc", "mcheck", "tgphonedetail", "start"]
+RUNS         = 5
+TOP_IMPORTS  = 10
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\| (\s*)(\S.*)")
+
+
+def time_import(module: str, runs: int) -> List[float]:
+    """ Wall seconds of `python -c "import module"`, one per run """
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def slowest_imports(module: str, top: int) -> List[Tuple[float, str]]:
+    """ (cumulative ms, package) for the script's own imports that cost the most """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m and len(m.group(3)) == 2:      # one level below the script = its own imports
+            rows.append((int(m.group(2)) / 1000, m.group(4)))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark of the entry points")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="modules to time (default: all entry points)")
+    parser.add_argument("-n", "--runs", type=int, default=RUNS, help=f"runs per module (default: {RUNS})")
+    parser.add_argument("--top", type=int, default=TOP_IMPORTS, help=f"slowest imports listed (default: {TOP_IMPORTS})")
+    args = parser.parse_args()
+
+    baseline = statistics.median(time_import("sys", args.runs))
+    print(f"Bare interpreter start: {baseline * 1000:7.1f} ms (median of {args.runs})\n")
+
+    for module in args.modules:
+        try:
+            samples = time_import(module, args.runs)
+        except subprocess.CalledProcessError:
+            print(f"{module:<22} import failed (missing dependency?)\n")
+            continue
+        median = statistics.median(samples)
+        print(f"{module:<22} {median * 1000:7.1f} ms   (+{(median - baseline) * 1000:.1f} ms over bare, "
+              f"min {min(samples) * 1000:.1f} / max {max(samples) * 1000:.1f})")
+        for ms, name in slowest_imports(module, args.top):
+            print(f"    {ms:8.1f} ms  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+# changefeed.py
+# Versioned YES records and an incremental change feed across runs.
+#
+# ResultWriter passes every flushed group to ChangeFeed.record() on its writer
+# thread, right after the checkpoint rows are on disk. Each answered number is
+# compared with its current record:
+#   added    answered YES and was not a current YES (first hit, or back after removed)
+#   changed  a current YES whose telegram_id, username or names differ → "fields": {name: [old, new]}
+#   removed  a current YES that now answered NO (account deleted or number given up)
+# Numbers a run does not check are left alone, so partial runs remove nothing.
+# Every change bumps the number's version and is kept in results.db (`changes`
+# is the full history); the same entries go to changes.jsonl while the run is
+# in progress, one JSON object per line with an increasing seq. Consumers tail
+# the file or ask for everything after the last seq they processed. Several
+# processes (multiple_acc.py workers) share both files: writers take SQLite's
+# write lock, and the file is reconciled with the database on open.
+#
+#   python changefeed.py seed                    # baseline from existing YES workbooks (no entries)
+#   python changefeed.py since 1200              # entries after seq 1200, as JSON lines
+#   python changefeed.py history 8801712345678   # every version of a phone or telegram_id
+#   python changefeed.py runs
+
+import os
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from batch_result import YES, NO
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+CHANGEFEED     = os.getenv("CHANGEFEED", "1") != "0"    # CHANGEFEED=0 → checkers skip the feed
+RESULTS_DB     = Path("results.db")
+CHANGES_JSONL  = Path("changes.jsonl")
+# one run id per checker invocation; multiple_acc.py hands its own to the workers
+RUN_ID         = os.getenv("CHANGEFEED_RUN") or f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+SEED_GLOBS     = ["ai_numbers_telegram_checked.xlsx", "checked_results/yes_acc*.xlsx"]
+QUERY_CHUNK    = 500            # phones per IN (...) lookup
+
+TRACKED = ("telegram_id", "username", "first_name", "last_name")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS current (
+    phone       TEXT PRIMARY KEY,
+    state       TEXT NOT NULL,                       -- YES / removed
+    telegram_id TEXT, username TEXT, first_name TEXT, last_name TEXT,
+    version     INTEGER NOT NULL,
+    run         TEXT,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS current_telegram_id ON current(telegram_id);
+CREATE TABLE IF NOT EXISTS changes (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    run         TEXT NOT NULL,
+    op          TEXT NOT NULL,                       -- added / changed / removed
+    phone       TEXT NOT NULL,
+    telegram_id TEXT,
+    version     INTEGER NOT NULL,
+    entry       TEXT NOT NULL,                       -- the changes.jsonl line
+    at          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_phone ON changes(phone);
+CREATE INDEX IF NOT EXISTS changes_telegram_id ON changes(telegram_id);
+CREATE TABLE IF NOT EXISTS runs (
+    run         TEXT PRIMARY KEY,
+    started_at  TEXT, updated_at TEXT,
+    added       INTEGER NOT NULL DEFAULT 0,
+    changed     INTEGER NOT NULL DEFAULT 0,
+    removed     INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _text(value) -> str:
+    """ Comparable form of a cell: NaN / None → "", 123.0 → "123" """
+    if value is None or value != value:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class ChangeFeed:
+    def __init__(self, db_path: Path = RESULTS_DB, feed_path: Path = CHANGES_JSONL, run: str = RUN_ID):
+        self.db_path = Path(db_path)
+        self.feed_path = Path(feed_path)
+        self.run = run
+        self._db = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._sync_file()
+
+    def close(self):
+        self._db.close()
+
+    # ── answers → changes ─────────────────────────
+    @staticmethod
+    def answers(records: Iterable[Dict], batches: Iterable = ()) -> Dict[str, Optional[Dict]]:
+        """ phone → tracked fields of a YES, None for a NO (FAILED rows are no answer); last one wins """
+        out: Dict[str, Optional[Dict]] = {}
+        for r in records:
+            if r.get("status") == "YES":
+                out[r["phone"]] = {f: _text(r.get(f)) for f in TRACKED}
+            elif r.get("status") == "NO":
+                out[r["phone"]] = None
+        for b in batches:
+            for i, code in enumerate(b.status):
+                if code == NO:
+                    out[b.phone[i]] = None
+                elif code == YES:
+                    out[b.phone[i]] = {f: _text(getattr(b, f)[i]) for f in TRACKED}
+        return out
+
+    def record(self, records: Iterable[Dict], batches: Iterable = ()) -> Dict[str, int]:
+        """ Compares one group of answers with the current records; returns {op: count} """
+        answers = self.answers(records, batches)
+        counts = {"added": 0, "changed": 0, "removed": 0}
+        if not answers:
+            return counts
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            current = self._current(list(answers))
+            entries = []
+            for phone, new in answers.items():
+                old = current.get(phone)
+                is_yes = old is not None and old["state"] == "YES"
+                version = (old["version"] if old else 0) + 1
+                if new is None:
+                    if not is_yes:
+                        continue            # NO, and nothing to take back
+                    entry = {"op": "removed", "phone": phone, "telegram_id": old["telegram_id"],
+                             "version": version, "previous": {f: old[f] for f in TRACKED}}
+                    state, fields = "removed", {f: old[f] for f in TRACKED}
+                elif not is_yes:
+                    entry = {"op": "added", "phone": phone, "telegram_id": new["telegram_id"],
+                             "version": version, "record": new}
+                    moved = self._other_phone(new["telegram_id"], phone)
+                    if moved:
+                        entry["previous_phone"] = moved
+                    state, fields = "YES", new
+                else:
+                    diff = {f: [old[f], new[f]] for f in TRACKED if old[f] != new[f]}
+                    if not diff:
+                        continue
+                    entry = {"op": "changed", "phone": phone, "telegram_id": new["telegram_id"],
+                             "version": version, "fields": diff, "record": new}
+                    state, fields = "YES", new
+                self._db.execute(
+                    "INSERT OR REPLACE INTO current(phone, state, telegram_id, username, first_name, last_name, "
+                    "version, run, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (phone, state, *(fields[f] for f in TRACKED), version, self.run, now))
+                entries.append(entry)
+                counts[entry["op"]] += 1
+            self._append(entries, now)
+            self._db.execute(
+                "INSERT INTO runs(run, started_at, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(run) DO UPDATE SET updated_at = excluded.updated_at",
+                (self.run, now, now))
+            self._db.execute("UPDATE runs SET added = added + ?, changed = changed + ?, removed = removed + ? "
+                             "WHERE run = ?", (counts["added"], counts["changed"], counts["removed"], self.run))
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return counts
+
+    def _current(self, phones: List[str]) -> Dict[str, Dict]:
+        out = {}
+        for part in _chunks(phones, QUERY_CHUNK):
+            rows = self._db.execute(
+                f"SELECT phone, state, version, {', '.join(TRACKED)} FROM current "
+                f"WHERE phone IN ({', '.join('?' * len(part))})", part)
+            for phone, state, version, *values in rows:
+                out[phone] = {"state": state, "version": version, **dict(zip(TRACKED, values))}
+        return out
+
+    def _other_phone(self, telegram_id: str, phone: str) -> Optional[str]:
+        """ A current YES with the same telegram_id under another number (the user changed numbers) """
+        if not telegram_id:
+            return None
+        row = self._db.execute(
+            "SELECT phone FROM current WHERE telegram_id = ? AND state = 'YES' AND phone != ? LIMIT 1",
+            (telegram_id, phone)).fetchone()
+        return row[0] if row else None
+
+    # ── changes.jsonl ─────────────────────────────
+    def _append(self, entries: List[Dict], now: str):
+        """ Inside the write transaction: rows get their seq, then the lines go to the file in seq order """
+        if not entries:
+            return
+        lines = []
+        for entry in entries:
+            cur = self._db.execute(
+                "INSERT INTO changes(run, op, phone, telegram_id, version, entry, at) VALUES (?, ?, ?, ?, ?, '', ?)",
+                (self.run, entry["op"], entry["phone"], entry["telegram_id"], entry["version"], now))
+            line = json.dumps({"seq": cur.lastrowid, "run": self.run, "at": now, **entry}, ensure_ascii=False)
+            self._db.execute("UPDATE changes SET entry = ? WHERE seq = ?", (line, cur.lastrowid))
+            lines.append(line)
+        with open(self.feed_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")       # one write per group
+
+    def _last_file_seq(self) -> int:
+        if not self.feed_path.is_file() or self.feed_path.stat().st_size == 0:
+            return 0
+        with open(self.feed_path, "rb") as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - 65536))
+            for raw in reversed(f.read().splitlines()):
+                try:
+                    return int(json.loads(raw)["seq"])
+                except (ValueError, KeyError):
+                    continue
+        return 0
+
+    def _sync_file(self):
+        """
+        Brings changes.jsonl in line with the database after a crash: lines of a
+        transaction that never committed are dropped, committed ones the file
+        missed are appended. A torn last line is cut first.
+        """
+        from persistence import repair_tail, replace_atomic
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            repair_tail(self.feed_path)
+            last_db = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+            last_file = self._last_file_seq()
+            if last_file > last_db:
+                with open(self.feed_path, "r", encoding="utf-8") as f:
+                    keep = [line for line in f if json.loads(line)["seq"] <= last_db]
+                replace_atomic(self.feed_path, lambda tmp: tmp.write_text("".join(keep), encoding="utf-8"))
+            elif last_file < last_db:
+                rows = self._db.execute("SELECT entry FROM changes WHERE seq > ? ORDER BY seq", (last_file,))
+                with open(self.feed_path, "a", encoding="utf-8") as f:
+                    f.writelines(entry + "\n" for (entry,) in rows)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    # ── reading ───────────────────────────────────
+    def since(self, seq: int = 0) -> Iterator[Dict]:
+        for (entry,) in self._db.execute("SELECT entry FROM changes WHERE seq > ? ORDER BY seq", (seq,)):
+            yield json.loads(entry)
+
+    def history(self, key: str) -> List[Dict]:
+        """ Every change of a phone or telegram_id, oldest first """
+        key = key.strip().lstrip("+")
+        rows = self._db.execute(
+            "SELECT entry FROM changes WHERE phone = ? OR telegram_id = ? ORDER BY seq", (key, key))
+        return [json.loads(entry) for (entry,) in rows]
+
+    def runs(self) -> List[Tuple]:
+        return self._db.execute(
+            "SELECT run, started_at, updated_at, added, changed, removed FROM runs ORDER BY started_at").fetchall()
+
+    # ── baseline ──────────────────────────────────
+    def seed(self, paths: List[Path]) -> int:
+        """ Known YES rows become version 1 without feed entries, so the next run reports only real changes """
+        import pandas as pd   # lazy: only seeding reads workbooks
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        added = 0
+        for path in paths:
+            df = pd.read_excel(path, dtype=str)
+            if "phone" not in df.columns:
+                continue
+            rows = [(_text(r.get("phone")), *(_text(r.get(f)) for f in TRACKED), now)
+                    for r in df.to_dict("records") if _text(r.get("phone"))]
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._db.total_changes
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO current(phone, state, telegram_id, username, first_name, last_name, "
+                    "version, run, updated_at) VALUES (?, 'YES', ?, ?, ?, ?, 1, 'seed', ?)", rows)
+                added += self._db.total_changes - before
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versioned YES records and their change feed")
+    parser.add_argument("--db", default=str(RESULTS_DB), help=f"record store (default: {RESULTS_DB})")
+    parser.add_argument("--feed", default=str(CHANGES_JSONL), help=f"change feed (default: {CHANGES_JSONL})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_seed = sub.add_parser("seed", help="baseline from YES workbooks, without feed entries")
+    p_seed.add_argument("paths", nargs="*", help=f"default: {', '.join(SEED_GLOBS)}")
+    p_since = sub.add_parser("since", help="changes after a seq, as JSON lines")
+    p_since.add_argument("seq", type=int, nargs="?", default=0)
+    p_hist = sub.add_parser("history", help="every version of a phone or telegram_id")
+    p_hist.add_argument("key")
+    sub.add_parser("runs", help="changes per run")
+    args = parser.parse_args()
+
+    feed = ChangeFeed(Path(args.db), Path(args.feed), run="cli")
+    try:
+        if args.cmd == "seed":
+            paths = [Path(p) for p in args.paths]
+            if not paths:
+                for pattern in SEED_GLOBS:
+                    paths.extend(p for p in sorted(Path(".").glob(pattern)) if p.is_file())
+            print(f"{feed.seed(paths):,} YES records added to the baseline from {len(paths)} workbook(s)")
+        elif args.cmd == "since":
+            for entry in feed.since(args.seq):
+                print(json.dumps(entry, ensure_ascii=False))
+        elif args.cmd == "history":
+            for entry in feed.history(args.key):
+                print(json.dumps(entry, ensure_ascii=False))
+        elif args.cmd == "runs":
+            print(f"{'run':<24} | {'started':<19} | {'last change':<19} | {'added':>7} | {'changed':>7} | {'removed':>7}")
+            print("-" * 96)
+            for run, started, updated, added, changed, removed in feed.runs():
+                print(f"{run:<24} | {started:<19} | {updated:<19} | {added:>7,} | {changed:>7,} | {removed:>7,}")
+    finally:
+        feed.close()
+
+
+if __name__ == "__main__":
+    main()
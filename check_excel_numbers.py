@@ -16,22 +16,33 @@ load_dotenv()
 
 import os
 import asyncio
-import pandas as pd
-import logging
+import argparse
 import time
-from datetime import datetime
+import threading
 from pathlib import Path
 from typing import List, Dict, Optional
 
 from telethon import TelegramClient, errors
-from telethon.tl.functions.contacts import ImportContactsRequest, DeleteContactsRequest
-from telethon.tl.types import InputPhoneContact
+
+from sessions import open_session
+from phones import normalize_phone
+from scheduler import FloodScheduler, PendingBatch, FLOOD_PADDING, DEFER_DELAY, deferred_part
+from dead_letter import DeadLetterStore
+from autotune import BatchTuner
+from priority import PriorityWorkQueue
+from logsetup import setup_logging, Sampler
+from persistence import ResultWriter, read_checkpoint
+from pipeline import Pipeline, import_batch
+from batch_result import BatchResult, YES, FAILED
+from profiling import start_sampling, finish as finish_profile
+from shutdown import Drain, Abandoned, install_sigint, forget_contacts
+from prefilter import split_valid, record_rejections, REJECTED_CSV, PLAN_KEY
 
 # ────────────────────────────────────────────────
 #                     CONFIG
 # ────────────────────────────────────────────────
 
-API_ID = int(os.getenv("API_ID", 37597265))int(os.getenv("API_ID", 37597265))int(os.getenv("API_ID", 37597265))int(os.getenv("API_ID", 37597265))
+API_ID = int(os.getenv("API_ID", 37597265))
 API_HASH = os.getenv("API_HASH", "650a8b45cb705150a2d3bb7f6cd41bee")
 SESSION_NAME = "checker_session_v4"
 
@@ -39,99 +50,54 @@ INPUT_EXCEL     = Path("bd_numbers_state.xlsx")              # your source file
 OUTPUT_EXCEL    = Path("ai_numbers_telegram_checked.xlsx")   # final YES results
 CHECKPOINT_CSV  = Path("checkpoint_progress.csv")            # resume point + log
 
-BATCH_SIZE      = 18           # 15–25 usually safest in 2025
+INPUT_CACHE_TAG = f"check_excel_numbers.normalize_phone v2 | {PLAN_KEY}"   # bump v2 when normalization changes
+
+BATCH_SIZE      = 18           # starting size only — autotune.py tunes it per session
 SLEEP_BASE      = 5           # seconds between batches
 SLEEP_JITTER    = 12          # random ± this value
-MAX_RETRIES     = 2
 
 # ────────────────────────────────────────────────
 #                     LOGGING
 # ────────────────────────────────────────────────
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s  | %(levelname)-7s | %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler("telegram_checker.log", encoding="utf-8"),
-        logging.StreamHandler()
-    ]
+# Queue-based (non-blocking) with gzip rotation — see logsetup.py.
+# Per-number lines are sampled with LOG_SAMPLE_RATE; every batch gets one summary line.
+logger = setup_logging(
+    __name__, "telegram_checker.log",
+    fmt='%(asctime)s  | %(levelname)-7s | %(message)s',
 )
-logger = logging.getLogger(__name__)
+log_number = Sampler()
 
 # ────────────────────────────────────────────────
 #              CHECKPOINT & STATE
 # ────────────────────────────────────────────────
 
 def load_checkpoint() -> tuple[set[str], int]:
-    """ Returns: already_checked_phones set, last_successful_index """
+    """ Returns: phones with a definitive YES/NO answer, last_successful_index """
     if not CHECKPOINT_CSV.is_file():
         return set(), 0
+    import pandas as pd   # lazy: not needed on a first run
 
     try:
-        df = pd.read_csv(CHECKPOINT_CSV, dtype=str)
+        df = read_checkpoint(CHECKPOINT_CSV)
+        if 'status' in df.columns:
+            df = df[df['status'] != 'FAILED']   # failed numbers live in the dead-letter store
         checked = set(df['phone'].dropna())
-        last_idx = int(df['batch_end_index'].max()) if 'batch_end_index' in df.columns else 0
+        last_idx = 0
+        if 'batch_end_index' in df.columns:
+            last_idx = pd.to_numeric(df['batch_end_index'], errors='coerce').max()
+            last_idx = int(last_idx) if pd.notna(last_idx) else 0
         return checked, last_idx + 1
     except Exception as e:
         logger.error(f"Cannot read checkpoint → starting from beginning  ({e})")
         return set(), 0
 
 
-def append_to_checkpoint(phones_checked: List[Dict], batch_end_index: int):
-    if not phones_checked:
-        return
-
-    df_new = pd.DataFrame(phones_checked)
-    df_new['batch_end_index'] = batch_end_index
-    df_new['checked_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    if CHECKPOINT_CSV.is_file():
-        df_old = pd.read_csv(CHECKPOINT_CSV, dtype=str)
-        df = pd.concat([df_old, df_new], ignore_index=True)
-    else:
-        df = df_new
-
-    df.to_csv(CHECKPOINT_CSV, index=False, encoding='utf-8')
-
-
-def append_yes_to_output(new_yes: List[Dict]):
-    if not new_yes:
-        return
-
-    df_new = pd.DataFrame(new_yes)
-
-    if OUTPUT_EXCEL.is_file():
-        try:
-            df_old = pd.read_excel(OUTPUT_EXCEL)
-            df = pd.concat([df_old, df_new], ignore_index=True)
-            df = df.drop_duplicates(subset=['phone'], keep='last')
-        except Exception:
-            df = df_new
-    else:
-        df = df_new
-
-    df.to_excel(OUTPUT_EXCEL, index=False, engine='openpyxl')
-    logger.info(f"Appended {len(df_new)} new YES → total in output: {len(df)}")
-
-
-# ────────────────────────────────────────────────
-#              PHONE NORMALIZATION
-# ────────────────────────────────────────────────
-
-def normalize_phone(raw: str) -> Optional[str]:
-    n = str(raw).strip().replace(" ", "").replace("-", "").replace("+", "")
-    if not n.isdigit():
-        return None
-    if len(n) < 10:
-        return None
-    if n.startswith("880"):
-        return n
-    if n.startswith("0"):
-        return "880" + n[1:]
-    if len(n) == 10:
-        return "880" + n
-    return None
+# Checkpoint rows are appended by persistence.ResultWriter on its own thread
+CHECKPOINT_FIELDS = [
+    "phone", "checked_at", "batch_index", "session", "first_name", "last_name",
+    "username", "telegram_id", "access_hash", "status", "error", "batch_end_index",
+]
 
 
 # ────────────────────────────────────────────────
@@ -142,92 +108,55 @@ async def check_one_batch(
     client: TelegramClient,
     phones: List[str],
     start_global_index: int
-) -> tuple[List[Dict], List[Dict]]:
-
-    results_yes   = []
-    results_check = []   # for checkpoint
-
+) -> tuple[BatchResult, List[str]]:
+    """
+    One ImportContacts attempt (pipeline.import_batch). FloodWaitError and other
+    failures propagate to the caller, which parks the account / requeues the batch
+    via FloodScheduler. Numbers Telegram put in retry_contacts are returned as
+    deferred (no YES/NO yet) for the caller to requeue.
+    """
     if not phones:
-        return [], []
-
-    contacts = [
-        InputPhoneContact(
-            client_id = start_global_index + i,
-            phone     = f"+{phone}",
-            first_name= "Chk",
-            last_name = f"{start_global_index + i}"
-        )
-        for i, phone in enumerate(phones)
-    ]
-
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            result = await client(ImportContactsRequest(contacts))
-
-            found = {u.phone.lstrip("+"): u for u in result.users if u.phone}
-
-            for phone in phones:
-                user = found.get(phone)
-                record = {
-                    "phone": phone,
-                    "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "batch_index": start_global_index,
-                }
-
-                if user:
-                    record.update({
-                        "first_name":   user.first_name or "",
-                        "last_name":    user.last_name or "",
-                        "username":     user.username or "",
-                        "telegram_id":  user.id,
-                        "status":       "YES"
-                    })
-                    results_yes.append(record)
-                    logger.info(f"YES → {phone}  @{user.username or 'no-username'}")
-                else:
-                    record["status"] = "NO"
-                    logger.info(f"NO  → {phone}")
-
-                results_check.append(record)
-
-            # Cleanup (critical!)
-            if result.users:
-                try:
-                    await client(DeleteContactsRequest([u.id for u in result.users]))
-                except Exception as e:
-                    logger.warning(f"Delete failed: {e}")
+        return BatchResult(), []
 
-            return results_yes, results_check
+    answers, deferred = await import_batch(client, phones, start_global_index, logger)
+    return BatchResult.from_answers(answers, {"batch_index": start_global_index, "session": SESSION_NAME}), deferred
 
-        except errors.FloodWaitError as e:
-            wait = e.seconds + 15
-            logger.warning(f"FloodWait {e.seconds}s → sleeping {wait}s (attempt {attempt})")
-            await asyncio.sleep(wait)
 
-        except Exception as e:
-            logger.error(f"Batch error (attempt {attempt}): {type(e).__name__} → {e}")
-            if attempt == MAX_RETRIES:
-                return [], []
-            await asyncio.sleep(30 * attempt)
-
-    return [], []
+def failed_records(batch: PendingBatch) -> BatchResult:
+    """ Checkpoint rows for a batch that ran out of attempts """
+    return BatchResult.failed(batch.phones, batch.last_error, {"batch_index": batch.start_index, "session": SESSION_NAME})
 
 
 # ────────────────────────────────────────────────
 #                     MAIN
 # ────────────────────────────────────────────────
 
-async def main():
+def read_input_phones() -> Optional[List[str]]:
+    """ Normalized numbers of INPUT_EXCEL, from the input cache when the file is unchanged """
+    import input_cache   # lazy, like pandas: pulls in numpy
+    cached = input_cache.load(INPUT_EXCEL, INPUT_CACHE_TAG)
+    if cached is not None:
+        logger.info(f"Input unchanged → {len(cached)} normalized phones from {input_cache.CACHE_DIR}")
+        return input_cache.as_strings(cached)
+
+    phones_all = parse_input_phones()
+    if phones_all is not None:
+        input_cache.store(INPUT_EXCEL, INPUT_CACHE_TAG, phones_all)
+    return phones_all
+
+
+def parse_input_phones() -> Optional[List[str]]:
     if not INPUT_EXCEL.is_file():
         logger.error(f"Input file not found: {INPUT_EXCEL}")
-        return
+        return None
 
+    import pandas as pd   # lazy: keeps startup (and the connect overlap) short
     logger.info("Reading input Excel ...")
     df_input = pd.read_excel(INPUT_EXCEL)
 
     if "phone" not in df_input.columns:
         logger.error("Excel must have 'phone' column")
-        return
+        return None
 
     # Normalize phones
     phones_all = []
@@ -239,70 +168,248 @@ async def main():
     phones_all = list(dict.fromkeys(phones_all))  # remove duplicates
     logger.info(f"Loaded & normalized {len(phones_all)} unique phones")
 
-    # ── Resume logic ───────────────────────────────────────
-    already_checked, start_from = load_checkpoint()
-    logger.info(f"Resuming from index {start_from}  (already checked: {len(already_checked)})")
-
-    phones_to_check = [
-        p for p in phones_all[start_from:]
-        if p not in already_checked
-    ]
+    # Impossible numbers never reach ImportContacts
+    phones_all, rejected = split_valid(phones_all)
+    if rejected:
+        new = record_rejections(rejected, INPUT_EXCEL.name)
+        logger.info(f"Pre-filter rejected {len(rejected)} numbers ({new} new → {REJECTED_CSV})")
+    return phones_all
 
-    if not phones_to_check:
-        logger.info("No new numbers to check. Done.")
-        return
-
-    logger.info(f"Numbers left to check: {len(phones_to_check)}")
 
+async def main(retry_failed: bool = False, work_prefix: Optional[str] = None):
     # ── Telegram client ────────────────────────────────────
-    client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
+    # Connects + authorizes in the background while checkpoint and input are read
+    client = TelegramClient(open_session(SESSION_NAME), API_ID, API_HASH)
+    login = asyncio.create_task(client.start())
+    loop = asyncio.get_running_loop()
+    writer = None
+    stop = threading.Event()
+    install_sigint(stop, logger)    # first Ctrl+C drains (see shutdown.py), the second one aborts
+    drain = Drain(stop)
 
     try:
-        await client.start()
-        if not await client.is_user_authorized():
-            logger.error("Session not authorized → run manually first to login")
+        dead_letter = DeadLetterStore()
+        already_checked, start_from = await loop.run_in_executor(None, load_checkpoint)
+        sources = None      # per-number source names (ingested work file only)
+
+        if retry_failed:
+            # ── Targeted retry of dead-lettered numbers only ───────
+            failed = dead_letter.phones()
+            logger.info(f"Retry mode → {len(failed)} numbers in {dead_letter.path}")
+            phones_to_check = [p for p in failed if p not in already_checked]
+        else:
+            # ── Resume logic ───────────────────────────────────────
+            # Anything with a YES/NO answer is skipped wherever it sits in the list,
+            # so batches still in the retry queue when a run died are picked up again.
+            skip = already_checked | set(dead_letter.phones())
+            if work_prefix:
+                # stays int64 (mmap'd, then the kept rows only); strings are made per batch
+                from ingest import read_work
+                ingested = await loop.run_in_executor(None, read_work, work_prefix)
+                logger.info(f"Work file: {len(ingested)} ingested numbers from {work_prefix}.i64")
+                phones_to_check, sources = await loop.run_in_executor(None, ingested.without, skip)
+            else:
+                phones_all = await loop.run_in_executor(None, read_input_phones)
+                if phones_all is None:
+                    return
+                phones_to_check = [p for p in phones_all if p not in skip]
+                del phones_all
+            logger.info(f"Resuming  (already checked: {len(already_checked)}, dead-lettered: {len(skip) - len(already_checked)})")
+
+        if not len(phones_to_check):
+            logger.info("No new numbers to check. Done.")
             return
 
-        total_checked_this_run = 0
-        total_yes_this_run = 0
+        logger.info(f"Numbers left to check: {len(phones_to_check)}")
 
-        for i in range(0, len(phones_to_check), BATCH_SIZE):
-            batch = phones_to_check[i : i + BATCH_SIZE]
-            global_start_idx = start_from + i
+        # Priority order from priority.json (no rules → plain input order)
+        work = PriorityWorkQueue()
+        work.extend(phones_to_check, source=dead_letter.path.name if retry_failed else INPUT_EXCEL.name,
+                    sources=sources)
+        del phones_to_check, sources
+        if work.scorer.active:
+            logger.info("Priority rules active → highest-scored numbers are checked first")
 
-            batch_no = (i // BATCH_SIZE) + 1
-            total_batches = (len(phones_to_check) + BATCH_SIZE - 1) // BATCH_SIZE
+        writer = ResultWriter(CHECKPOINT_CSV, OUTPUT_EXCEL, CHECKPOINT_FIELDS, logger)
 
-            logger.info(f"Batch {batch_no}/{total_batches}  |  {len(batch)} numbers  |  global idx {global_start_idx}")
-
-            yes_in_batch, checked_in_batch = await check_one_batch(client, batch, global_start_idx)
+        await login
+        if not await client.is_user_authorized():
+            logger.error("Session not authorized → run manually first to login")
+            return
 
-            # Save progress immediately
-            append_to_checkpoint(checked_in_batch, global_start_idx + len(batch) - 1)
-            append_yes_to_output(yes_in_batch)
+        scheduler = FloodScheduler()
+        tuner = BatchTuner(SESSION_NAME, BATCH_SIZE)
+        logger.info(f"Batch size starts at {tuner.next_size()} (tuned range {tuner.min_size}-{tuner.max_size}, band {tuner.band})")
+        totals = {"checked": 0, "yes": 0, "failed": 0, "deferred": 0, "batches": 0, "cursor": 0}
+        resolved_this_run = set()
+        idle = asyncio.Event()      # set while no batch is in the dispatcher
+        idle.set()
+
+        def more_work() -> bool:
+            return bool(len(work) or scheduler.pending)
+
+        async def batches(emit):
+            """ Source: retry batches whose back-off expired first, then fresh ones; one at a
+                time, so a requeue and the account's park are known before the next is taken """
+            while True:
+                await idle.wait()
+                if not more_work():
+                    return
+                if drain.stopping:
+                    logger.warning("Stop requested → no new batches; unchecked numbers stay for the next run")
+                    return
+                # Parked after a FloodWait → wait here, with no batch held
+                park = scheduler.wait_time(SESSION_NAME)
+                if park > 0:
+                    logger.info(f"Account parked → resuming in {park:.0f}s  (retry queue: {scheduler.pending} batches)")
+                    await drain.sleep(park)
+                    continue
+
+                batch = scheduler.next_retry()
+                if batch is None:
+                    if not len(work):
+                        # only backed-off retries are left
+                        await drain.sleep(scheduler.retry_wait())
+                        continue
+                    batch = PendingBatch(work.take(tuner.next_size()), start_from + totals["cursor"])
+                    totals["cursor"] += len(batch.phones)
+                    totals["batches"] += 1
+                    logger.info(f"Batch {totals['batches']}  |  {len(batch.phones)} numbers  |  {len(work):,} left  |  global idx {batch.start_index}")
+                else:
+                    logger.info(f"Retry batch @ global idx {batch.start_index}  |  {len(batch.phones)} numbers  |  attempt {batch.attempts + 1}/{scheduler.max_attempts}")
+                idle.clear()
+                await emit(batch)
+
+        async def dispatch(batch: PendingBatch, emit):
+            try:
+                await check(batch, emit)
+            finally:
+                idle.set()
+
+        async def check(batch: PendingBatch, emit):
+            """ Dispatcher: one attempt; FloodWait parks the account, errors and deferred
+                numbers go back to the retry queue → (batch, result, deferred count) """
+            checked_in_batch, deferred = BatchResult(), []
+            requeued = True
+            batch_started = time.monotonic()
+            flood_penalty = 0
+            try:
+                checked_in_batch, deferred = await drain.run(check_one_batch(client, batch.phones, batch.start_index))
+
+            except Abandoned as e:
+                # nothing of this batch is persisted → the next run checks it again
+                logger.warning(f"Batch @ {batch.start_index}: {e} → removing its contacts and stopping")
+                await forget_contacts(client, batch.phones, logger)
+                return
+
+            except errors.FloodWaitError as e:
+                scheduler.park(SESSION_NAME, e.seconds + FLOOD_PADDING)
+                flood_penalty = e.seconds + FLOOD_PADDING
+                logger.warning(f"FloodWait {e.seconds}s → account parked, batch @ {batch.start_index} moved to retry queue")
+                requeued = scheduler.requeue(batch, f"FloodWait {e.seconds}s")
+
+            except Exception as e:
+                logger.error(f"Batch error (attempt {batch.attempts + 1}): {type(e).__name__} → {e}")
+                requeued = scheduler.requeue(batch, f"{type(e).__name__}: {e}", delay=30 * (batch.attempts + 1))
+
+            if not requeued:
+                logger.warning(f"Batch @ {batch.start_index} FAILED after {batch.attempts} attempts → {len(batch.phones)} numbers recorded as FAILED ({batch.last_error})")
+                checked_in_batch = failed_records(batch)
+                totals["failed"] += len(checked_in_batch)
+                dead_letter.add(batch.phones, batch.last_error, SESSION_NAME, batch.attempts)
+
+            # Contacts Telegram declined to process this time are not a NO → retry them later
+            if deferred:
+                rest = deferred_part(batch, deferred)
+                if scheduler.requeue(rest, "deferred by Telegram (retry_contacts)", delay=DEFER_DELAY):
+                    logger.info(f"{len(deferred)} deferred numbers → retry queue ({scheduler.pending} batches)")
+                else:
+                    logger.warning(f"{len(deferred)} numbers deferred {rest.attempts} times → recorded as FAILED")
+                    gave_up = failed_records(rest)
+                    checked_in_batch.extend(gave_up)
+                    totals["failed"] += len(gave_up)
+                    dead_letter.add(rest.phones, rest.last_error, SESSION_NAME, rest.attempts)
 
-            total_checked_this_run += len(checked_in_batch)
-            total_yes_this_run += len(yes_in_batch)
+            # Enricher and writer thread take it from here; the next request doesn't wait for disk
+            await emit((batch, checked_in_batch, len(deferred)))
 
             # Sleep
-            sleep_time = max(10, SLEEP_BASE + (-SLEEP_JITTER + (hash(str(i)) % (2*SLEEP_JITTER))))
-            if i + BATCH_SIZE < len(phones_to_check):
+            sleep_time = max(10, SLEEP_BASE + (-SLEEP_JITTER + (hash(str(totals["cursor"])) % (2*SLEEP_JITTER))))
+            if len(checked_in_batch) and more_work() and not drain.stopping:
                 logger.info(f"Waiting {sleep_time:.0f} seconds...")
-                await asyncio.sleep(sleep_time)
+                await drain.sleep(sleep_time)
+
+            answered = 0 if not requeued else checked_in_batch.answered
+            tuner.record(len(batch.phones), answered, time.monotonic() - batch_started + flood_penalty)
+
+        async def enrich(item: tuple, emit):
+            """ Enricher: run totals, sampled per-number lines, the batch summary and the
+                checkpoint's resume index """
+            batch, result, deferred = item
+            answered = [i for i, code in enumerate(result.status) if code != FAILED]
+            totals["checked"] += len(answered)
+            totals["yes"] += result.yes_count
+            totals["deferred"] += deferred
+            resolved_this_run.update(result.phone[i] for i in answered)
+
+            if log_number.rate:
+                for i in answered:
+                    if log_number():
+                        if result.status[i] == YES:
+                            logger.info(f"YES → {result.phone[i]}  @{result.username[i] or 'no-username'}")
+                        else:
+                            logger.info(f"NO  → {result.phone[i]}")
+            if answered or deferred:
+                logger.info(f"Batch @ {batch.start_index} → {len(batch.phones)} sent | {result.yes_count} YES | "
+                            f"{len(answered) - result.yes_count} NO | {deferred} deferred")
+
+            result.extra["batch_end_index"] = batch.start_index + len(batch.phones) - 1
+            await emit(item)
+
+        async def persist(item: tuple, emit):
+            """ Sink: hands the batch to the writer thread """
+            await writer.put_batch(item[1])
+            await emit(item)
+
+        pipe = Pipeline("checker", logger)
+        pipe.source("batches", batches)
+        pipe.stage("dispatcher", dispatch)
+        pipe.stage("enricher", enrich)
+        pipe.stage("sink", persist)
+        await pipe.run()
 
         logger.info("───────────────────────────────────────────────")
         logger.info(f"Finished this run.")
-        logger.info(f"Processed this session : {total_checked_this_run:,} numbers")
-        logger.info(f"Found YES this session : {total_yes_this_run:,}")
+        logger.info(f"Processed this session : {totals['checked']:,} numbers")
+        logger.info(f"Found YES this session : {totals['yes']:,}")
+        logger.info(f"Deferred by Telegram   : {totals['deferred']:,}  (requeued, counted once per deferral)")
+        logger.info(f"Failed this session    : {totals['failed']:,}  (→ {dead_letter.path}, rerun with --retry-failed)")
+        if retry_failed:
+            logger.info(f"Dead-letter resolved   : {dead_letter.resolve(resolved_this_run):,}")
+        logger.info(f"Tuned batch size       : {tuner.best}")
         logger.info(f"Output file            : {OUTPUT_EXCEL}")
+        tuner.save()
 
     except KeyboardInterrupt:
         logger.warning("Stopped by user (Ctrl+C)")
     except Exception as e:
         logger.error(f"Critical error: {type(e).__name__} → {e}", exc_info=True)
     finally:
+        if writer:
+            await writer.aclose()   # drain + fsync before exiting
+        if not login.done():
+            login.cancel()
+        await asyncio.gather(login, return_exceptions=True)
         await client.disconnect()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Single-account Telegram bulk checker")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-check only the numbers in the dead-letter store")
+    parser.add_argument("--work", metavar="PREFIX",
+                        help="check an ingested work file (ingest.py output) instead of INPUT_EXCEL")
+    args = parser.parse_args()
+    start_sampling()    # PROFILE_SAMPLE=<ms> (see profiling.py)
+    asyncio.run(main(retry_failed=args.retry_failed, work_prefix=args.work))
+    finish_profile("check_excel_numbers", logger)
@@ -0,0 +1,380 @@
+# coordinator.py
+# Central lease coordinator so several hosts (or several checkers on one host)
+# can work through the same input without checking a number twice.
+#
+# The work list lives in one SQLite file. Worker nodes lease batches for LEASE_TTL
+# seconds and report every answer back with complete(). A lease that expires
+# (the node died or lost its connection) goes back to the pool. Numbers whose
+# leases keep expiring are marked FAILED after MAX_LEASES. Adding capacity only
+# means starting `multiple_acc.py --coordinator ...` on another machine.
+#
+#   python coordinator.py load                      # input (+ local checkpoints) → coordinator.db
+#   COORDINATOR_TOKEN=... python coordinator.py serve --host 0.0.0.0 --port 8765   # HTTP API for other hosts
+#   python coordinator.py stats
+#   python coordinator.py export yes.csv            # collected YES answers
+#
+#   python multiple_acc.py --coordinator http://10.0.0.5:8765   # on every node
+#   python multiple_acc.py --coordinator coordinator.db         # same host, no server
+#
+# serve binds 127.0.0.1 by default and refuses any other address unless
+# COORDINATOR_TOKEN is set; nodes send the same token.
+#
+# HTTP API (JSON; header X-Token when COORDINATOR_TOKEN is set):
+#   POST /lease     {"node": str, "size": int, "ttl": int}   → {"lease": str|null, "phones": [...], "remaining": int}
+#   POST /complete  {"lease": str, "node": str, "results": [{phone, status, ...}]} → {"accepted": int, "rejected": int}
+#   GET  /stats                                                → {"pending": int, "leased": int, ...}
+
+import os
+import csv
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import ipaddress
+import threading
+import urllib.request
+from pathlib import Path
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+COORDINATOR_DB    = Path("coordinator.db")
+COORDINATOR_PORT  = 8765
+COORDINATOR_TOKEN = os.getenv("COORDINATOR_TOKEN", "")    # shared secret for the HTTP API ("" = none)
+
+LEASE_TTL         = 30 * 60     # seconds a node may hold a batch before it is taken back
+MAX_LEASES        = 3           # expired leases per number before it is marked FAILED
+HTTP_TIMEOUT      = 30
+
+RESULT_FIELDS = ["phone", "status", "first_name", "last_name", "username",
+                 "telegram_id", "error", "node", "checked_at"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS numbers (
+    phone       TEXT PRIMARY KEY,
+    state       TEXT NOT NULL DEFAULT 'pending',     -- pending / leased / done
+    lease       TEXT,
+    expires_at  REAL,
+    expired     INTEGER NOT NULL DEFAULT 0,
+    seq         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS numbers_state ON numbers(state, seq);
+CREATE INDEX IF NOT EXISTS numbers_lease ON numbers(lease);
+CREATE TABLE IF NOT EXISTS results (
+    phone       TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,                       -- YES / NO / FAILED
+    first_name  TEXT, last_name TEXT, username TEXT, telegram_id TEXT,
+    error       TEXT,
+    node        TEXT,
+    checked_at  TEXT
+);
+"""
+
+
+class LeaseStore:
+    """ The coordinator itself; also used directly (no HTTP) when all nodes share a disk """
+
+    def __init__(self, path: Path = COORDINATOR_DB):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def _tx(self):
+        """ BEGIN IMMEDIATE so two processes on the same file never lease the same rows """
+        self._db.execute("BEGIN IMMEDIATE")
+
+    # ── loading ───────────────────────────────────
+    def add(self, phones: Iterable[str]) -> int:
+        """ Adds numbers not known yet (in order); returns how many were new """
+        with self._lock:
+            self._tx()
+            try:
+                start = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM numbers").fetchone()[0]
+                before = self._db.total_changes
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO numbers(phone, seq) VALUES (?, ?)",
+                    ((p, start + i) for i, p in enumerate(phones, 1)))
+                added = self._db.total_changes - before
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return added
+
+    # ── leasing ───────────────────────────────────
+    def _reclaim(self, now: float):
+        """ Expired leases → pending again (or FAILED after MAX_LEASES) """
+        expired = self._db.execute(
+            "SELECT phone, expired FROM numbers WHERE state = 'leased' AND expires_at < ?", (now,)).fetchall()
+        if not expired:
+            return
+        give_up = [p for p, n in expired if n + 1 >= MAX_LEASES]
+        self._db.execute(
+            "UPDATE numbers SET state = 'pending', lease = NULL, expires_at = NULL, expired = expired + 1 "
+            "WHERE state = 'leased' AND expires_at < ?", (now,))
+        if give_up:
+            stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO results(phone, status, error, node, checked_at) VALUES (?, 'FAILED', ?, '', ?)",
+                ((p, f"lease expired {MAX_LEASES} times", stamp) for p in give_up))
+            self._db.executemany("UPDATE numbers SET state = 'done' WHERE phone = ?", ((p,) for p in give_up))
+
+    def lease(self, node: str, size: int, ttl: int = LEASE_TTL) -> Dict:
+        now = time.time()
+        with self._lock:
+            self._tx()
+            try:
+                self._reclaim(now)
+                phones = [r[0] for r in self._db.execute(
+                    "SELECT phone FROM numbers WHERE state = 'pending' ORDER BY seq LIMIT ?", (int(size),))]
+                lease_id = None
+                if phones:
+                    lease_id = f"{node}:{uuid.uuid4().hex[:12]}"
+                    self._db.executemany(
+                        "UPDATE numbers SET state = 'leased', lease = ?, expires_at = ? WHERE phone = ?",
+                        ((lease_id, now + ttl, p) for p in phones))
+                remaining = self._db.execute(
+                    "SELECT COUNT(*) FROM numbers WHERE state != 'done'").fetchone()[0]
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return {"lease": lease_id, "phones": phones, "remaining": remaining}
+
+    def complete(self, lease: str, results: List[Dict], node: str = "") -> Dict:
+        """
+        Stores the answers and closes those numbers. Only numbers of `lease` are
+        accepted, or numbers whose lease expired and that nobody holds again yet (a
+        late answer is still an answer); answers for anything else are rejected.
+        Numbers of the lease without a result stay leased (the node may still be
+        retrying them) until it expires.
+        """
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [
+            (r["phone"], r.get("status", ""), r.get("first_name", ""), r.get("last_name", ""),
+             r.get("username", ""), str(r.get("telegram_id", "") or ""), r.get("error", ""),
+             node, r.get("checked_at") or stamp)
+            for r in results if r.get("phone") and r.get("status")
+        ]
+        with self._lock:
+            self._tx()
+            try:
+                accepted = []
+                for row in rows:
+                    known = self._db.execute(
+                        "SELECT state, lease, expired FROM numbers WHERE phone = ?", (row[0],)).fetchone()
+                    if known is None:
+                        continue
+                    state, holder, expired = known
+                    if (state == "leased" and holder == lease) or (state == "pending" and expired > 0):
+                        accepted.append(row)
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO results({', '.join(RESULT_FIELDS)}) VALUES ({', '.join('?' * len(RESULT_FIELDS))})",
+                    accepted)
+                self._db.executemany(
+                    "UPDATE numbers SET state = 'done', lease = NULL, expires_at = NULL WHERE phone = ?",
+                    ((r[0],) for r in accepted))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return {"accepted": len(accepted), "rejected": len(rows) - len(accepted)}
+
+    # ── reporting ─────────────────────────────────
+    def stats(self) -> Dict:
+        with self._lock:
+            out = {"pending": 0, "leased": 0, "done": 0}
+            for state, n in self._db.execute("SELECT state, COUNT(*) FROM numbers GROUP BY state"):
+                out[state] = n
+            for status, n in self._db.execute("SELECT status, COUNT(*) FROM results GROUP BY status"):
+                out[status] = n
+            out["nodes"] = self._db.execute(
+                "SELECT COUNT(DISTINCT substr(lease, 1, instr(lease, ':') - 1)) FROM numbers WHERE state = 'leased'"
+            ).fetchone()[0]
+        return out
+
+    def checked(self) -> set:
+        with self._lock:
+            return {r[0] for r in self._db.execute("SELECT phone FROM results WHERE status != 'FAILED'")}
+
+    def export(self, path: Path, status: Optional[str] = "YES") -> int:
+        with self._lock:
+            query = f"SELECT {', '.join(RESULT_FIELDS)} FROM results"
+            rows = self._db.execute(query + " WHERE status = ?", (status,)) if status else self._db.execute(query)
+            rows = rows.fetchall()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(RESULT_FIELDS)
+            w.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        self._db.close()
+
+
+class CoordinatorClient:
+    """ Same lease() / complete() / stats() as LeaseStore, over HTTP """
+
+    def __init__(self, url: str, token: str = COORDINATOR_TOKEN):
+        self.url = url.rstrip("/")
+        self.token = token
+
+    def _call(self, path: str, payload: Optional[Dict] = None) -> Dict:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method="POST" if data else "GET")
+        req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("X-Token", self.token)
+        with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def lease(self, node: str, size: int, ttl: int = LEASE_TTL) -> Dict:
+        return self._call("/lease", {"node": node, "size": size, "ttl": ttl})
+
+    def complete(self, lease: str, results: List[Dict], node: str = "") -> Dict:
+        return self._call("/complete", {"lease": lease, "node": node, "results": results})
+
+    def stats(self) -> Dict:
+        return self._call("/stats")
+
+    def close(self):
+        pass
+
+
+def open_coordinator(target: str):
+    """ http(s)://host:port → CoordinatorClient, anything else → LeaseStore on that SQLite file """
+    if target.startswith(("http://", "https://")):
+        return CoordinatorClient(target)
+    return LeaseStore(Path(target))
+
+
+# ────────────────────────────────────────────────
+#                   HTTP SERVER
+# ────────────────────────────────────────────────
+
+def make_handler(store: LeaseStore, token: str = COORDINATOR_TOKEN):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: Dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            if token and self.headers.get("X-Token") != token:
+                self._reply(403, {"error": "bad token"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path == "/stats":
+                self._reply(200, store.stats())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/lease":
+                    self._reply(200, store.lease(body["node"], int(body["size"]), int(body.get("ttl", LEASE_TTL))))
+                elif self.path == "/complete":
+                    self._reply(200, store.complete(body["lease"], body.get("results", []), body.get("node", "")))
+                else:
+                    self._reply(404, {"error": "not found"})
+            except (KeyError, ValueError, TypeError) as e:
+                self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, fmt, *args):
+            pass    # one line per lease would drown the console
+
+    return Handler
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(store: LeaseStore, host: str, port: int, token: str = COORDINATOR_TOKEN):
+    """ HTTP API on host:port; a bind other hosts can reach needs COORDINATOR_TOKEN """
+    if not token and not is_loopback(host):
+        raise SystemExit(f"Refusing to serve on {host} without COORDINATOR_TOKEN "
+                         f"(set it on the coordinator and every node, or bind 127.0.0.1)")
+    server = ThreadingHTTPServer((host, port), make_handler(store, token))
+    print(f"Coordinator on http://{host}:{port}  (db: {store.path}, lease ttl {LEASE_TTL}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ────────────────────────────────────────────────
+#                       CLI
+# ────────────────────────────────────────────────
+
+def load_input(store: LeaseStore, work_prefix: Optional[str] = None) -> int:
+    """ multiple_acc's input (normalized, pre-filtered, cached) or an ingested work file,
+        minus what local checkpoints already answered """
+    import multiple_acc
+    if work_prefix:
+        from ingest import read_work
+        phones = read_work(work_prefix).phones()     # streamed from the mmap'd file
+    else:
+        phones = multiple_acc.read_input_phones() or []
+    skip = multiple_acc.load_checked()
+    return store.add(p for p in phones if p not in skip)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lease coordinator for multi-host checking")
+    parser.add_argument("--db", default=str(COORDINATOR_DB), help=f"SQLite file (default: {COORDINATOR_DB})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_load = sub.add_parser("load", help="add the input's unchecked numbers")
+    p_load.add_argument("--work", metavar="PREFIX", help="load an ingested work file (ingest.py) instead of the input Excel")
+    p_serve = sub.add_parser("serve", help="run the HTTP API")
+    p_serve.add_argument("--host", default="127.0.0.1",
+                         help="bind address; anything but loopback needs COORDINATOR_TOKEN")
+    p_serve.add_argument("--port", type=int, default=COORDINATOR_PORT)
+    sub.add_parser("stats", help="print progress")
+    p_export = sub.add_parser("export", help="write collected results to CSV")
+    p_export.add_argument("path")
+    p_export.add_argument("--all", action="store_true", help="every status, not only YES")
+    args = parser.parse_args()
+
+    store = LeaseStore(Path(args.db))
+    try:
+        if args.cmd == "load":
+            print(f"Added {load_input(store, args.work):,} numbers → {store.path}")
+            print(json.dumps(store.stats()))
+        elif args.cmd == "serve":
+            serve(store, args.host, args.port)
+        elif args.cmd == "stats":
+            print(json.dumps(store.stats(), indent=2))
+        elif args.cmd == "export":
+            n = store.export(Path(args.path), None if args.all else "YES")
+            print(f"{n:,} rows → {args.path}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
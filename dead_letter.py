@@ -0,0 +1,81 @@
+# dead_letter.py
+# Persistent dead-letter store for numbers whose batch ran out of attempts.
+#
+# Normal runs skip these numbers (they are neither lost nor re-sent blindly);
+# `--retry-failed` runs check only them and resolve() drops the ones that got
+# a definitive YES/NO answer.
+
+import io
+import os
+import csv
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+DEAD_LETTER_CSV = Path("dead_letter.csv")
+
+FIELDS = ["phone", "reason", "source", "attempts", "failed_at"]
+
+
+class DeadLetterStore:
+    def __init__(self, path: Path = DEAD_LETTER_CSV):
+        self.path = Path(path)
+        # Created once (race-free) so concurrent workers only ever append rows
+        try:
+            with open(self.path, "x", encoding="utf-8", newline="") as f:
+                csv.writer(f).writerow(FIELDS)
+        except FileExistsError:
+            pass
+
+    def add(self, phones: Iterable[str], reason: str, source: str, attempts: int):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [[p, reason, source, attempts, now] for p in phones]
+        if not rows:
+            return
+        # One write() per batch keeps appends from several processes from interleaving
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            f.write(buf.getvalue())
+
+    def load(self) -> Dict[str, Dict]:
+        """ phone → latest failure row, with `failures` = how often it was dead-lettered """
+        entries: Dict[str, Dict] = {}
+        if not self.path.is_file():
+            return entries
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                phone = row.get("phone")
+                if not phone:
+                    continue
+                failures = entries.get(phone, {}).get("failures", 0) + 1
+                entries[phone] = {**row, "failures": failures}
+        return entries
+
+    def phones(self) -> List[str]:
+        return list(self.load())
+
+    def resolve(self, checked: Iterable[str]) -> int:
+        """ Drops every row whose phone is in `checked`; returns how many numbers left the store """
+        checked = set(checked)
+        if not checked or not self.path.is_file():
+            return 0
+
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        keep = [r for r in rows if r.get("phone") not in checked]
+        removed = {r["phone"] for r in rows} - {r["phone"] for r in keep}
+        if not removed:
+            return 0
+
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+            w.writeheader()
+            w.writerows(keep)
+        os.replace(tmp, self.path)
+        return len(removed)
+
@@ -0,0 +1,252 @@
+# ingest.py
+# Multi-file ingestion: many inputs → one compact, deduped work file.
+#
+# Every input (xlsx/xls sheets with a "phone" column, csv, txt with one number
+# per line) is parsed in a process pool, normalized and pre-filtered. Each
+# parser writes its numbers as sorted runs of at most RUN_SIZE numbers to a temp
+# directory. The runs are then k-way merged: duplicates across all files
+# collapse while streaming, so the combined set never has to fit in RAM.
+#
+# Output (numbers in ascending order):
+#   <out>.i64    int64 numbers (same layout as shared_work, so it can be mapped)
+#   <out>.src    uint16 source id per number (first input that contained it)
+#   <out>.json   manifest: source names, counts, inputs
+#
+#   python ingest.py bd_numbers_state.xlsx gp_numbers_state_telegram_checked.xlsx phones_only.csv
+#   python multiple_acc.py --work work          # check the ingested set
+
+import os
+import json
+import heapq
+import shutil
+import argparse
+import tempfile
+from array import array
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from phones import normalize_phone
+from prefilter import split_valid, record_rejections, REJECTED_CSV
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+WORK_PREFIX  = Path("work")
+RUN_SIZE     = 2_000_000        # numbers per sorted run (~16 MB of int64 + ids)
+MERGE_BLOCK  = 65_536           # numbers read per run at a time while merging
+WRITE_BLOCK  = 1_000_000        # numbers buffered before each output write
+MAX_SOURCES  = 65_535           # uint16 source ids
+
+RUN_DTYPE = np.dtype([("n", "<i8"), ("s", "<u2")])
+
+
+# ────────────────────────────────────────────────
+#                  PARSING (pool)
+# ────────────────────────────────────────────────
+
+def read_raw_phones(path: Path) -> Iterator:
+    """ Raw phone cells of one input file, in file order """
+    suffix = path.suffix.lower()
+    if suffix in (".xlsx", ".xls"):
+        import pandas as pd
+        for sheet in pd.read_excel(path, sheet_name=None).values():
+            column = next((c for c in sheet.columns if str(c).strip().lower() == "phone"), None)
+            if column is not None:
+                yield from sheet[column].dropna()
+    elif suffix == ".csv":
+        import pandas as pd
+        df = pd.read_csv(path, dtype=str, encoding="utf-8-sig")
+        column = next((c for c in df.columns if str(c).strip().lower() == "phone"), df.columns[0])
+        yield from df[column].dropna()
+    else:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+
+def write_run(numbers: List[int], source_id: int, directory: Path, name: str) -> Path:
+    unique = np.unique(np.asarray(numbers, dtype=np.int64))     # sorted, deduped within the run
+    run = np.empty(len(unique), dtype=RUN_DTYPE)
+    run["n"] = unique
+    run["s"] = source_id
+    path = directory / f"{name}.run"
+    with open(path, "wb") as f:
+        np.save(f, run)
+    return path
+
+
+def parse_source(task: Tuple[int, str, str]) -> Dict:
+    """ One input file → sorted runs in `tmp_dir`; numbers are normalized and pre-filtered """
+    source_id, path, tmp_dir = task
+    path, tmp_dir = Path(path), Path(tmp_dir)
+    runs, pending, rows, valid = [], [], 0, 0
+    rejected: List[Tuple[str, str]] = []
+
+    def flush():
+        nonlocal pending, valid
+        good, bad = split_valid(pending)
+        rejected.extend(bad)
+        if good:
+            runs.append(str(write_run([int(p) for p in good], source_id, tmp_dir, f"{source_id}_{len(runs)}")))
+            valid += len(good)
+        pending = []
+
+    for raw in read_raw_phones(path):
+        rows += 1
+        phone = normalize_phone(raw)
+        if phone:
+            pending.append(phone)
+            if len(pending) >= RUN_SIZE:
+                flush()
+    flush()
+    return {"source_id": source_id, "runs": runs, "rows": rows, "valid": valid, "rejected": rejected}
+
+
+# ────────────────────────────────────────────────
+#                   MERGING
+# ────────────────────────────────────────────────
+
+def iter_run(path: str) -> Iterator[Tuple[int, int]]:
+    run = np.load(path, mmap_mode="r")
+    for start in range(0, len(run), MERGE_BLOCK):
+        block = run[start : start + MERGE_BLOCK]
+        yield from zip(block["n"].tolist(), block["s"].tolist())
+
+
+def merge_runs(runs: List[str], prefix: Path) -> int:
+    """ k-way merge of sorted runs; keeps the lowest source id per number. Returns the count written """
+    numbers, sources = array("q"), array("H")
+    written, last = 0, None
+    with open(prefix.with_suffix(".i64"), "wb") as f_num, open(prefix.with_suffix(".src"), "wb") as f_src:
+        for n, s in heapq.merge(*(iter_run(r) for r in runs)):
+            if n == last:
+                continue            # (n, s) order → first occurrence has the lowest source id
+            last = n
+            numbers.append(n)
+            sources.append(s)
+            if len(numbers) >= WRITE_BLOCK:
+                numbers.tofile(f_num)
+                sources.tofile(f_src)
+                written += len(numbers)
+                numbers, sources = array("q"), array("H")
+        numbers.tofile(f_num)
+        sources.tofile(f_src)
+        written += len(numbers)
+    return written
+
+
+# ────────────────────────────────────────────────
+#                 INGEST / READ
+# ────────────────────────────────────────────────
+
+def ingest(inputs: List[Path], prefix: Path = WORK_PREFIX, workers: int = 0) -> Dict:
+    inputs = [Path(p) for p in inputs]
+    missing = [str(p) for p in inputs if not p.is_file()]
+    if missing:
+        raise FileNotFoundError(f"Input not found: {', '.join(missing)}")
+    if len(inputs) > MAX_SOURCES:
+        raise ValueError(f"At most {MAX_SOURCES} inputs per work file")
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="ingest_", dir=prefix.parent if str(prefix.parent) else "."))
+    try:
+        tasks = [(i, str(p), str(tmp_dir)) for i, p in enumerate(inputs)]
+        with ProcessPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1)) as pool:
+            parsed = list(pool.map(parse_source, tasks))
+
+        for part in parsed:
+            record_rejections(part["rejected"], inputs[part["source_id"]].name)
+        total = merge_runs([r for part in parsed for r in part["runs"]], prefix)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    manifest = {
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "count": total,
+        "sources": [p.name for p in inputs],
+        "inputs": [
+            {"path": str(inputs[p["source_id"]]), "rows": p["rows"], "valid": p["valid"], "rejected": len(p["rejected"])}
+            for p in parsed
+        ],
+    }
+    tmp = prefix.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, prefix.with_suffix(".json"))
+    return manifest
+
+
+class SourceNames:
+    """ Source name per number, looked up from the uint16 ids only when asked for """
+
+    def __init__(self, ids: np.ndarray, names: List[str]):
+        self.ids = ids
+        self.names = names
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: int) -> str:
+        return self.names[self.ids[i]]
+
+
+class WorkFile:
+    """
+    Read-only view of an ingested work file. numbers / source_ids are memory-mapped
+    int64 / uint16 arrays, so opening even a very large work file costs no RAM;
+    numbers become digit strings only as they are iterated or taken into batches.
+    """
+
+    def __init__(self, prefix: Path = WORK_PREFIX):
+        prefix = Path(prefix)
+        with open(prefix.with_suffix(".json"), "r", encoding="utf-8") as f:
+            self.names: List[str] = json.load(f)["sources"]
+        self.numbers = self._map(prefix.with_suffix(".i64"), "<i8")
+        self.source_ids = self._map(prefix.with_suffix(".src"), "<u2")
+
+    @staticmethod
+    def _map(path: Path, dtype: str) -> np.ndarray:
+        if path.stat().st_size == 0:
+            return np.empty(0, dtype=dtype)     # mmap cannot map an empty file
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def phones(self) -> Iterator[str]:
+        """ Every number as a digit string, converted MERGE_BLOCK at a time """
+        for start in range(0, len(self.numbers), MERGE_BLOCK):
+            yield from map(str, self.numbers[start : start + MERGE_BLOCK].tolist())
+
+    def without(self, skip: Iterable[str]) -> Tuple[np.ndarray, SourceNames]:
+        """ (numbers, their source names) not in `skip`, in file order — compact copies of the kept rows """
+        drop = np.fromiter((int(p) for p in skip), dtype=np.int64)
+        if not len(drop):
+            return np.asarray(self.numbers), SourceNames(np.asarray(self.source_ids), self.names)
+        keep = ~np.isin(self.numbers, drop)
+        return self.numbers[keep], SourceNames(self.source_ids[keep], self.names)
+
+
+def read_work(prefix: Path = WORK_PREFIX) -> WorkFile:
+    return WorkFile(prefix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse, normalize and dedupe many inputs into one work file")
+    parser.add_argument("inputs", nargs="+", help="xlsx/xls/csv/txt files")
+    parser.add_argument("-o", "--out", default=str(WORK_PREFIX), help=f"output prefix (default: {WORK_PREFIX})")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="parser processes (default: one per input, ≤ CPUs)")
+    args = parser.parse_args()
+
+    manifest = ingest([Path(p) for p in args.inputs], Path(args.out), args.workers)
+    for item in manifest["inputs"]:
+        print(f"{item['path']:<45} rows {item['rows']:>10,} | valid {item['valid']:>10,} | rejected {item['rejected']:>8,}")
+    print(f"\n{manifest['count']:,} unique numbers → {args.out}.i64 / .src / .json  (rejections → {REJECTED_CSV})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# input_cache.py
+# Normalized-input snapshots keyed by the input file's content hash.
+#
+# Parsing bd_numbers_state.xlsx with openpyxl and normalizing every row is the
+# slowest part of a restart. The result of that work (normalized, deduped,
+# pre-filtered numbers in input order) is saved once as an int64 .npy array
+# under CACHE_DIR; a later run on a byte-identical file memory-maps the array
+# instead of opening the workbook. The key also covers a caller tag, so scripts
+# that normalize differently (or a changed numbering plan) never share a file.
+
+import os
+import hashlib
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+CACHE_DIR    = Path(".input_cache")
+HASH_CHUNK   = 1 << 20          # 1 MB reads while hashing
+MAX_DIGITS   = 18               # int64 holds every 18-digit number
+
+
+def file_digest(path: Path) -> str:
+    """ sha256 of the file content """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_file(path: Path, tag: str, digest: Optional[str] = None) -> Path:
+    digest = digest or file_digest(path)
+    tag_digest = hashlib.sha256(tag.encode("utf-8")).hexdigest()[:8]
+    return CACHE_DIR / f"{Path(path).stem}-{digest[:16]}-{tag_digest}.npy"
+
+
+def load(path: Path, tag: str) -> Optional[np.ndarray]:
+    """ Read-only memory-mapped int64 array for this exact input + tag, or None """
+    path = Path(path)
+    if not path.is_file():
+        return None
+    target = cache_file(path, tag)
+    if not target.is_file():
+        return None
+    try:
+        return np.load(target, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def store(path: Path, tag: str, phones: List[str]) -> Optional[Path]:
+    """
+    Saves the numbers (digit strings without a leading zero) for `path` + `tag` and
+    drops older snapshots of the same input. Nothing is saved when a number cannot
+    round-trip through int64.
+    """
+    path = Path(path)
+    if any(not p.isdigit() or p[0] == "0" or len(p) > MAX_DIGITS for p in phones):
+        return None
+    target = cache_file(path, tag)
+    CACHE_DIR.mkdir(exist_ok=True)
+
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, np.fromiter((int(p) for p in phones), dtype=np.int64, count=len(phones)))
+    os.replace(tmp, target)
+
+    # one snapshot per input file and tag is enough
+    suffix = target.name.rsplit("-", 1)[1]
+    for old in CACHE_DIR.glob(f"{path.stem}-*-{suffix}"):
+        if old != target:
+            old.unlink(missing_ok=True)
+    return target
+
+
+def as_strings(numbers: np.ndarray) -> List[str]:
+    """ int64 snapshot → the digit strings the checkers work with """
+    return [str(n) for n in numbers.tolist()]
@@ -0,0 +1,105 @@
+# logsetup.py
+# Non-blocking, rotating logging for the checkers.
+#
+# Callers only put records on a queue (QueueHandler); formatting, disk writes and
+# gzip rotation happen on a QueueListener thread, so the event loop never waits
+# on the log file. Per-number lines are sampled (LOG_SAMPLE_RATE) and the batch
+# loops log one summary line per batch instead.
+
+import os
+import gzip
+import queue
+import atexit
+import random
+import shutil
+import time
+import logging
+import logging.handlers
+from typing import List
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+LOG_MAX_BYTES    = int(os.getenv("LOG_MAX_BYTES", 50 * 1024 * 1024))   # rotate at 50 MB
+LOG_BACKUPS      = int(os.getenv("LOG_BACKUPS", 5))                    # keep 5 × .gz
+LOG_SAMPLE_RATE  = float(os.getenv("LOG_SAMPLE_RATE", 0.0))            # share of per-number lines kept
+
+DEFAULT_FORMAT   = '%(asctime)s | %(levelname)-6s | %(message)s'
+DEFAULT_DATEFMT  = '%Y-%m-%d %H:%M:%S'
+
+_listeners: List[logging.handlers.QueueListener] = []
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def setup_logging(name: str, logfile: str,
+                  fmt: str = DEFAULT_FORMAT, datefmt: str = DEFAULT_DATEFMT,
+                  level: int = logging.INFO, console: bool = True) -> logging.Logger:
+    """ Logger `name` → queue → (rotating gzip file [+ stderr]) on a background thread """
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+
+    formatter = logging.Formatter(fmt, datefmt=datefmt)
+
+    fh = logging.handlers.RotatingFileHandler(
+        logfile, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+    fh.namer = _gzip_namer
+    fh.rotator = _gzip_rotator
+    fh.setFormatter(formatter)
+    handlers = [fh]
+
+    if console:
+        sh = logging.StreamHandler()
+        sh.setFormatter(formatter)
+        handlers.append(sh)
+
+    records: queue.Queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+@atexit.register
+def stop_logging():
+    """ Flushes every queued record; safe to call more than once """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+class Sampler:
+    """ sampler() → True for roughly `rate` of the calls (1.0 = always, 0 = never) """
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE):
+        self.rate = rate
+
+    def __call__(self) -> bool:
+        return self.rate >= 1.0 or (self.rate > 0 and random.random() < self.rate)
+
+
+class Every:
+    """ every() → True at most once per `seconds` (for progress lines in tight loops) """
+
+    def __init__(self, seconds: float = 1.0):
+        self.seconds = seconds
+        self._last = 0.0
+
+    def __call__(self) -> bool:
+        now = time.monotonic()
+        if now - self._last >= self.seconds:
+            self._last = now
+            return True
+        return False
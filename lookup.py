@@ -0,0 +1,569 @@
+# lookup.py
+# Indexed lookups over every result the checkers have written so far.
+#
+# "Is this number already known, and who is it?" used to mean loading the YES
+# workbooks, checkpoints or results/*.json into pandas. build() indexes all of
+# those stores into one SQLite file (phone, telegram_id and username indexes) and
+# afterwards a point lookup is a single B-tree probe. Builds are incremental: an
+# unchanged file is skipped, and append-only files (checkpoint CSVs, result
+# streams) are only read from where the last build stopped.
+#
+#   python lookup.py build                       # (re)index everything that changed
+#   python lookup.py get 8801712345678           # phone, telegram_id or @username
+#   python lookup.py bulk phones.xlsx -o known.csv
+#   python lookup.py serve --port 8766
+#
+# HTTP API (JSON; header X-Token when LOOKUP_TOKEN is set):
+#   GET  /lookup?q=<phone|id|@username>[&by=phone|id|username]  → {"query": str, "records": [...]}
+#   POST /bulk   {"phones": [...]}                               → {"results": {phone: record|null}}
+#   GET  /stats                                                  → {"records": int, "sources": int, ...}
+
+import os
+import csv
+import io
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import urllib.parse
+from pathlib import Path
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+LOOKUP_DB       = Path("lookup.db")
+LOOKUP_PORT     = 8766
+LOOKUP_TOKEN    = os.getenv("LOOKUP_TOKEN", "")     # shared secret for the HTTP API ("" = none)
+REFRESH_SECONDS = 60            # serve: incremental rebuild interval (0 = never)
+READ_CHUNK      = 32 << 20      # append-only files are read in 32 MB slices
+BULK_CHUNK      = 50_000        # queries per temp-table round in bulk()
+
+# every result store, in the order the checkers write them
+SOURCE_GLOBS = [
+    "ai_numbers_telegram_checked.xlsx",     # check_excel_numbers.py YES
+    "checkpoint_progress.csv",              # check_excel_numbers.py every answer
+    "checked_results/yes_acc*.xlsx",        # multiple_acc.py / mcheck.py YES
+    "checkpoint_acc*.csv",                  # multiple_acc.py / mcheck.py every answer
+    "results/results_*.json",               # tgphonedetail.py
+    "results/stream_*.jsonl",               # tgphonedetail.py (streamed)
+    "coordinator.db",                       # coordinator.py
+]
+
+RECORD_FIELDS = ["phone", "status", "first_name", "last_name", "username",
+                 "telegram_id", "checked_at", "source"]
+STATUS_RANK = {"YES": 0, "NO": 1}           # best answer first; everything else after
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    phone        TEXT,
+    status       TEXT,
+    first_name   TEXT, last_name TEXT, username TEXT,
+    username_key TEXT,                                 -- lower-case, no '@'
+    telegram_id  TEXT,
+    checked_at   TEXT,
+    source       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_phone    ON records(phone);
+CREATE INDEX IF NOT EXISTS records_tid      ON records(telegram_id);
+CREATE INDEX IF NOT EXISTS records_username ON records(username_key);
+CREATE INDEX IF NOT EXISTS records_source   ON records(source);
+CREATE TABLE IF NOT EXISTS sources (
+    path        TEXT PRIMARY KEY,
+    mtime       REAL,
+    size        INTEGER,
+    offset      INTEGER,                               -- bytes indexed (append-only files)
+    head        BLOB,                                  -- first line, to notice a rewrite
+    rows        INTEGER,
+    indexed_at  TEXT
+);
+"""
+
+
+# ────────────────────────────────────────────────
+#                  NORMALIZATION
+# ────────────────────────────────────────────────
+
+def phone_key(raw) -> str:
+    """ Digits only; local BD forms (01XXXXXXXXX / 1XXXXXXXXX) get the 880 prefix """
+    digits = "".join(c for c in str(raw or "") if c.isdigit())
+    if len(digits) == 11 and digits.startswith("01"):
+        return "88" + digits
+    if len(digits) == 10 and digits.startswith("1"):
+        return "880" + digits
+    return digits
+
+
+def id_key(raw) -> str:
+    """ telegram_id as written by csv (123), pandas (123.0) or JSON (123) → '123' """
+    text = str(raw if raw is not None else "").strip()
+    if text.endswith(".0"):
+        text = text[:-2]
+    return text if text.isdigit() else ""
+
+
+def username_key(raw) -> str:
+    text = str(raw or "").strip().lstrip("@").lower()
+    return "" if text in ("nan", "none") else text
+
+
+def clean(raw) -> str:
+    text = str(raw if raw is not None else "").strip()
+    return "" if text.lower() in ("nan", "none") else text
+
+
+def make_row(record: Dict, source: str) -> Tuple:
+    username = clean(record.get("username"))
+    return (phone_key(record.get("phone")), clean(record.get("status")).upper(),
+            clean(record.get("first_name")), clean(record.get("last_name")),
+            username.lstrip("@"), username_key(username), id_key(record.get("telegram_id")),
+            clean(record.get("checked_at")), source)
+
+
+# ────────────────────────────────────────────────
+#                 SOURCE READERS
+# ────────────────────────────────────────────────
+
+def read_excel_records(path: Path) -> Iterator[Dict]:
+    import pandas as pd     # lazy: only when a workbook actually changed
+    df = pd.read_excel(path, dtype=str)
+    for record in df.to_dict("records"):
+        record.setdefault("status", "YES")      # the YES workbooks have no status column
+        yield record
+
+
+def read_lines(path: Path, start: int, end: int) -> Iterator[str]:
+    """ Bytes start..end (both on line boundaries) as text, READ_CHUNK at a time """
+    with open(path, "rb") as f:
+        f.seek(start)
+        tail, remaining = b"", end - start
+        while remaining > 0:
+            chunk = f.read(min(READ_CHUNK, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            data = tail + chunk
+            cut = data.rfind(b"\n") + 1
+            tail = data[cut:]
+            if cut:
+                yield data[:cut].decode("utf-8", errors="replace")
+
+
+def read_csv_records(path: Path, start: int, end: int) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f), [])
+    if not header:
+        return
+    skip_header = start == 0
+    for text in read_lines(path, start, end):
+        reader = csv.reader(io.StringIO(text))
+        if skip_header:
+            next(reader, None)
+            skip_header = False
+        for values in reader:
+            yield dict(zip(header, values))
+
+
+def tgphonedetail_record(identifier: str, result: Dict, checked_at: str = "") -> Dict:
+    """ tgphonedetail result (asdict(TelegramUser) or {"error": ...}) → record """
+    error = result.get("error", "")
+    if "id" in result:
+        status = "YES"
+    elif error == "No Telegram account found":
+        status = "NO"
+    elif error.startswith("Rejected"):
+        status = "REJECTED"
+    else:
+        status = "FAILED"
+    is_phone = identifier.lstrip("+").isdigit()
+    return {"phone": result.get("phone") or (identifier if is_phone else ""), "status": status,
+            "first_name": result.get("first_name"), "last_name": result.get("last_name"),
+            "username": result.get("username") or ("" if is_phone else identifier),
+            "telegram_id": result.get("id"), "checked_at": checked_at}
+
+
+def read_json_records(path: Path) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    for identifier, result in results.items():
+        yield tgphonedetail_record(identifier, result)
+
+
+def read_jsonl_records(path: Path, start: int, end: int) -> Iterator[Dict]:
+    for text in read_lines(path, start, end):
+        for line in text.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue    # truncated line of an interrupted run
+            yield tgphonedetail_record(entry["id"], entry["result"], entry.get("checked_at", ""))
+
+
+def read_coordinator_records(path: Path) -> Iterator[Dict]:
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        db.row_factory = sqlite3.Row
+        for row in db.execute("SELECT * FROM results"):
+            yield dict(row)
+    finally:
+        db.close()
+
+
+APPEND_ONLY = {".csv", ".jsonl"}
+
+
+def source_records(path: Path, start: int, end: int) -> Iterator[Dict]:
+    suffix = path.suffix.lower()
+    if suffix in (".xlsx", ".xls"):
+        return read_excel_records(path)
+    if suffix == ".csv":
+        return read_csv_records(path, start, end)
+    if suffix == ".json":
+        return read_json_records(path)
+    if suffix == ".jsonl":
+        return read_jsonl_records(path, start, end)
+    return read_coordinator_records(path)
+
+
+def source_stat(path: Path) -> Tuple[float, int]:
+    """ (mtime, size); a SQLite source also counts its -wal file, where a live coordinator writes """
+    st = path.stat()
+    mtime, size = st.st_mtime, st.st_size
+    wal = path.with_name(path.name + "-wal")
+    if path.suffix == ".db" and wal.is_file():
+        wst = wal.stat()
+        mtime, size = max(mtime, wst.st_mtime), size + wst.st_size
+    return mtime, size
+
+
+def first_line(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.readline(4096)
+
+
+def indexed_end(path: Path, size: int) -> int:
+    """ Offset just after the last complete line within `size` — where the next build continues """
+    if not size:
+        return 0
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            step = min(READ_CHUNK, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            nl = block.rfind(b"\n")
+            if nl >= 0:
+                return pos - step + nl + 1
+            pos -= step
+    return 0
+
+
+# ────────────────────────────────────────────────
+#                     INDEX
+# ────────────────────────────────────────────────
+
+class LookupIndex:
+    def __init__(self, path: Path = LOOKUP_DB, root: Path = Path(".")):
+        self.path = Path(path)
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._db = self._connect()          # lookups; builds write through their own connection
+        self._db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")       # readers keep answering while a build writes
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # ── building ──────────────────────────────────
+    def source_paths(self) -> List[Path]:
+        seen, out = set(), []
+        for pattern in SOURCE_GLOBS:
+            for p in sorted(self.root.glob(pattern)):
+                if p.is_file() and p not in seen:
+                    seen.add(p)
+                    out.append(p)
+        return out
+
+    def build(self, full: bool = False) -> Dict:
+        """ Indexes new and changed sources and drops vanished ones; returns rows added per source """
+        db = self._connect()
+        try:
+            if full:
+                db.execute("DELETE FROM records")
+                db.execute("DELETE FROM sources")
+            known = {r[0]: r[1:] for r in db.execute(
+                "SELECT path, mtime, size, offset, head, rows FROM sources")}
+            paths = self.source_paths()
+            report = {}
+            for path in paths:
+                name = str(path)
+                mtime, size = source_stat(path)
+                prev = known.get(name)
+                if prev and prev[0] == mtime and prev[1] == size:
+                    continue
+                try:
+                    report[name] = self._index_source(db, path, mtime, size, prev)
+                except Exception as e:
+                    report[name] = f"{type(e).__name__}: {e}"
+            for name in set(known) - {str(p) for p in paths}:
+                db.execute("DELETE FROM records WHERE source = ?", (name,))
+                db.execute("DELETE FROM sources WHERE path = ?", (name,))
+                report[name] = "removed"
+        finally:
+            db.close()
+        return report
+
+    @staticmethod
+    def _index_source(db: sqlite3.Connection, path: Path, mtime: float, size: int, prev: Optional[Tuple]) -> int:
+        name = str(path)
+        append_only = path.suffix.lower() in APPEND_ONLY
+        head = first_line(path) if append_only else b""
+        # an append-only file that only grew is read from where the last build stopped
+        resume = append_only and prev is not None and prev[3] == head and size >= (prev[2] or 0)
+        start = (prev[2] or 0) if resume else 0
+        end = indexed_end(path, size) if append_only else size
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if not resume:
+                db.execute("DELETE FROM records WHERE source = ?", (name,))
+            before = db.total_changes
+            db.executemany(
+                "INSERT INTO records(phone, status, first_name, last_name, username, username_key, "
+                "telegram_id, checked_at, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (make_row(r, name) for r in source_records(path, start, end)
+                 if r.get("phone") or r.get("username") or r.get("telegram_id")))
+            added = db.total_changes - before
+            rows = added + ((prev[4] or 0) if resume else 0)
+            db.execute(
+                "INSERT OR REPLACE INTO sources(path, mtime, size, offset, head, rows, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, mtime, size, end, head, rows, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return added
+
+    # ── lookups ───────────────────────────────────
+    def _select(self, where: str, value: str) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)} FROM records WHERE {where} = ?", (value,)).fetchall()
+        records = [dict(zip(RECORD_FIELDS, r)) for r in rows]
+        records.sort(key=lambda r: r["checked_at"], reverse=True)
+        records.sort(key=lambda r: STATUS_RANK.get(r["status"], 2))
+        return records
+
+    def by_phone(self, phone) -> List[Dict]:
+        return self._select("phone", phone_key(phone))
+
+    def by_telegram_id(self, telegram_id) -> List[Dict]:
+        return self._select("telegram_id", id_key(telegram_id))
+
+    def by_username(self, username) -> List[Dict]:
+        return self._select("username_key", username_key(username))
+
+    def find(self, query: str, by: str = "auto") -> List[Dict]:
+        """ Records for a phone, telegram_id or username, best answer (YES, newest) first """
+        query = str(query).strip()
+        if by == "phone":
+            return self.by_phone(query)
+        if by == "id":
+            return self.by_telegram_id(query)
+        if by == "username" or query.startswith("@") or not query.lstrip("+").isdigit():
+            return self.by_username(query)
+        return self.by_phone(query) or self.by_telegram_id(query)
+
+    def bulk(self, phones: Iterable) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """ (phone key, best record or None) per query, through a temp-table join """
+        phones = list(dict.fromkeys(phone_key(p) for p in phones if phone_key(p)))
+        for start in range(0, len(phones), BULK_CHUNK):
+            chunk = phones[start : start + BULK_CHUNK]
+            with self._lock:
+                self._db.execute("CREATE TEMP TABLE IF NOT EXISTS q(phone TEXT PRIMARY KEY) WITHOUT ROWID")
+                self._db.execute("DELETE FROM q")
+                self._db.executemany("INSERT OR IGNORE INTO q VALUES (?)", ((p,) for p in chunk))
+                rows = self._db.execute(
+                    f"SELECT {', '.join('r.' + f for f in RECORD_FIELDS)} FROM q JOIN records r ON r.phone = q.phone"
+                ).fetchall()
+            best: Dict[str, Dict] = {}
+            for r in rows:
+                record = dict(zip(RECORD_FIELDS, r))
+                current = best.get(record["phone"])
+                if current is None or (STATUS_RANK.get(record["status"], 2), current["checked_at"]) < \
+                        (STATUS_RANK.get(current["status"], 2), record["checked_at"]):
+                    best[record["phone"]] = record
+            for p in chunk:
+                yield p, best.get(p)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = {"records": self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0],
+                   "phones": self._db.execute("SELECT COUNT(DISTINCT phone) FROM records WHERE phone != ''").fetchone()[0],
+                   "sources": self._db.execute("SELECT COUNT(*) FROM sources").fetchone()[0]}
+            for status, n in self._db.execute("SELECT status, COUNT(*) FROM records GROUP BY status"):
+                out[status or "?"] = n
+        return out
+
+    def close(self):
+        self._db.close()
+
+
+# ────────────────────────────────────────────────
+#                   HTTP SERVER
+# ────────────────────────────────────────────────
+
+def make_handler(index: LookupIndex, token: str = LOOKUP_TOKEN):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: Dict):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            if token and self.headers.get("X-Token") != token:
+                self._reply(403, {"error": "bad token"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            url = urllib.parse.urlsplit(self.path)
+            params = dict(urllib.parse.parse_qsl(url.query))
+            if url.path == "/lookup" and params.get("q"):
+                self._reply(200, {"query": params["q"], "records": index.find(params["q"], params.get("by", "auto"))})
+            elif url.path == "/stats":
+                self._reply(200, index.stats())
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/bulk":
+                    self._reply(200, {"results": dict(index.bulk(body["phones"]))})
+                else:
+                    self._reply(404, {"error": "not found"})
+            except (KeyError, ValueError, TypeError) as e:
+                self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def refresh_loop(index: LookupIndex, stop: threading.Event, interval: int = REFRESH_SECONDS):
+    """ serve: keeps the index current while the checkers keep writing """
+    while not stop.wait(interval):
+        try:
+            changed = {k: v for k, v in index.build().items() if v}
+            if changed:
+                print(f"[{datetime.now():%H:%M:%S}] reindexed {changed}")
+        except Exception as e:
+            print(f"Refresh failed: {type(e).__name__} → {e}")
+
+
+def serve(index: LookupIndex, host: str, port: int, interval: int = REFRESH_SECONDS):
+    server = ThreadingHTTPServer((host, port), make_handler(index))
+    stop = threading.Event()
+    if interval:
+        threading.Thread(target=refresh_loop, args=(index, stop, interval), name="lookup-refresh", daemon=True).start()
+    print(f"Lookup on http://{host}:{port}  (index: {index.path}, refresh every {interval}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+# ────────────────────────────────────────────────
+#                       CLI
+# ────────────────────────────────────────────────
+
+def bulk_file(index: LookupIndex, input_path: Path, out_path: Path) -> Dict:
+    """ Best known record for every number of an xlsx/csv/txt input → CSV """
+    from ingest import read_raw_phones      # same input formats as ingest.py
+    counts = {"queries": 0, "known": 0}
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["query", "known"] + RECORD_FIELDS)
+        for phone, record in index.bulk(read_raw_phones(Path(input_path))):
+            counts["queries"] += 1
+            if record:
+                counts["known"] += 1
+                w.writerow([phone, "1"] + [record[k] for k in RECORD_FIELDS])
+            else:
+                w.writerow([phone, "0"] + [""] * len(RECORD_FIELDS))
+    return counts
+
+
+def print_report(report: Dict):
+    for name, added in report.items():
+        print(f"  {name:<50} {added:>10,}" if isinstance(added, int) else f"  {name:<50} {added}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed lookups over accumulated check results")
+    parser.add_argument("--db", default=str(LOOKUP_DB), help=f"index file (default: {LOOKUP_DB})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="index new and changed result files")
+    p_build.add_argument("--full", action="store_true", help="drop the index and read everything again")
+    p_get = sub.add_parser("get", help="look up phone numbers, telegram ids or @usernames")
+    p_get.add_argument("queries", nargs="+")
+    p_get.add_argument("--by", choices=["auto", "phone", "id", "username"], default="auto")
+    p_get.add_argument("--refresh", action="store_true", help="run an incremental build first")
+    p_bulk = sub.add_parser("bulk", help="look up every number of an xlsx/csv/txt file")
+    p_bulk.add_argument("input")
+    p_bulk.add_argument("-o", "--out", default="lookup_results.csv")
+    p_bulk.add_argument("--refresh", action="store_true", help="run an incremental build first")
+    p_serve = sub.add_parser("serve", help="run the HTTP API")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=LOOKUP_PORT)
+    p_serve.add_argument("--interval", type=int, default=REFRESH_SECONDS, help="rebuild interval in seconds (0 = never)")
+    sub.add_parser("stats", help="print index size")
+    args = parser.parse_args()
+
+    index = LookupIndex(Path(args.db))
+    try:
+        if args.cmd == "build" or getattr(args, "refresh", False):
+            t0 = time.perf_counter()
+            report = index.build(full=getattr(args, "full", False))
+            print_report(report)
+            print(f"Indexed {len(report)} changed source(s) in {time.perf_counter() - t0:.1f}s → {index.path}")
+        if args.cmd == "get":
+            for query in args.queries:
+                t0 = time.perf_counter()
+                records = index.find(query, args.by)
+                elapsed = (time.perf_counter() - t0) * 1e6
+                print(json.dumps({"query": query, "records": records, "us": round(elapsed)}, ensure_ascii=False, indent=2))
+        elif args.cmd == "bulk":
+            t0 = time.perf_counter()
+            counts = bulk_file(index, Path(args.input), Path(args.out))
+            print(f"{counts['known']:,} of {counts['queries']:,} numbers known → {args.out}  "
+                  f"({time.perf_counter() - t0:.1f}s)")
+        elif args.cmd == "serve":
+            index.build()
+            serve(index, args.host, args.port, args.interval)
+        elif args.cmd == "stats":
+            print(json.dumps(index.stats(), indent=2))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,29 @@ load_dotenv()
 # Updated: detailed logging for every step + batch summaries
 
 import os
+import time
 import asyncio
-import pandas as pd
-import logging
 import random
 import multiprocessing as mp
+from multiprocessing.connection import Connection
 from pathlib import Path
-from datetime import datetime
 from typing import List, Optional
 from telethon import TelegramClient, errors
-from telethon.tl.functions.contacts import ImportContactsRequest, DeleteContactsRequest
-from telethon.tl.types import InputPhoneContact
+
+from sessions import API_ID, API_HASH, SESSION_MANIFEST, load_accounts, open_session
+from scheduler import FloodScheduler, PendingBatch, deferred_part, FLOOD_PADDING, DEFER_DELAY
+from dead_letter import DeadLetterStore
+from autotune import BatchTuner
+from logsetup import setup_logging, stop_logging, Sampler
+from prefilter import split_valid, record_rejections, REJECTED_CSV, PLAN_KEY
+from phones import normalize_phone
+from persistence import ResultWriter, read_checkpoint
+from changefeed import RUN_ID
+from profiling import stage as timed, start_sampling, finish as finish_profile
+from pipeline import Pipeline, import_batch
+from batch_result import BatchResult
+from shared_work import SharedWorkList, WorkSlice
+from shutdown import Drain, Abandoned, ignore_sigint, forget_contacts, join_workers
 
 # ────────────────────────────────────────────────
 #                     CONFIG
@@ -24,304 +36,374 @@ from telethon.tl.types import InputPhoneContact
 INPUT_EXCEL    = Path("bd_numbers_state.xlsx")
 OUTPUT_BASE    = Path("checked_results")
 OUTPUT_BASE.mkdir(exist_ok=True)
+INPUT_CACHE_TAG = f"mcheck.normalize_phone v1 | {PLAN_KEY}"   # bump v1 when normalization changes
 
-BATCH_SIZE     = 20             # fixed to 20 as requested
+BATCH_SIZE     = 20             # starting size only — autotune.py tunes it per session
 SLEEP_BASE     = 8
 SLEEP_JITTER   = 12
-MAX_RETRIES    = 2
+MAX_RETRIES    = 2              # attempts per batch (scheduler.FloodScheduler) before dead-lettering
+
+CHECKPOINT_FIELDS = [
+    "phone", "checked_at", "worker", "session", "first_name", "last_name",
+    "username", "telegram_id", "access_hash", "status", "error", "batch_end_local_idx",
+]
 
 # ────────────────────────────────────────────────
-#               YOUR ACCOUNTS (all 10)
+#               YOUR ACCOUNTS
 # ────────────────────────────────────────────────
-ACCOUNTS = [
-    {"id": 1,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_01"},
-    {"id": 2,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_02"},
-    {"id": 3,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_03"},
-    {"id": 4,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_04"},
-    {"id": 5,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_05"},
-    {"id": 6,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_06"},
-    {"id": 7,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_07"},
-    {"id": 8,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_08"},
-    {"id": 9,  "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_09"},
-    {"id": 10, "api_id": 37597265, "api_hash": "650a8b45cb705150a2d3bb7f6cd41bee", "session": "checker_10"},
+# Accounts come from sessions.json (written by `python start.py`); api_id /
+# api_hash default to the .env pair. This list is only used when no manifest
+# has been created yet.
+FALLBACK_ACCOUNTS = [
+    {"id": i, "api_id": API_ID, "api_hash": API_HASH, "session": f"checker_{i:02d}"}
+    for i in range(1, 11)
 ]
 
 # ────────────────────────────────────────────────
-def normalize_phone(raw: any) -> Optional[str]:
-    if pd.isna(raw) or raw is None:
-        return None
-    if isinstance(raw, float) and raw.is_integer():
-        digits = str(int(raw))
-    else:
-        digits = str(raw).strip()
-    digits = ''.join(c for c in digits if c.isdigit())
-    if not digits or len(digits) < 10:
-        return None
-    if digits.startswith('880') and len(digits) == 13:
-        return digits
-    if digits.startswith('880') and len(digits) == 14 and digits.endswith('0'):
-        return digits[:-1]
-    if digits.startswith('88') and len(digits) == 12:
-        return '880' + digits[2:]
-    if digits.startswith('0') and len(digits) == 11:
-        return '880' + digits[1:]
-    if len(digits) == 10:
-        return '880' + digits
-    if len(digits) == 11 and digits[0] in '13456789':
-        return '880' + digits
-    return None
-
-
 def get_logger(account_id: int):
-    logger = logging.getLogger(f"acc_{account_id}")
-    if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)-6s | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        fh = logging.FileHandler(f"telegram_checker_acc{account_id}.log", encoding="utf-8")
-        fh.setFormatter(formatter)
-        logger.addHandler(fh)
-        
-        sh = logging.StreamHandler()
-        sh.setFormatter(formatter)
-        logger.addHandler(sh)
-    return logger
-
-
-def worker(account: dict, phone_list: List[str], worker_index: int):
+    # queue-based, gzip-rotated — formatting and disk I/O stay off the event loop
+    return setup_logging(f"acc_{account_id}", f"telegram_checker_acc{account_id}.log")
+
+
+def worker(account: dict, chunk_conn: Connection, worker_index: int, stop: Optional[mp.Event] = None):
+    """
+    Started before main() has read the input: the worker connects and authorizes
+    first, then receives its share of the shared work list over `chunk_conn`
+    (a shared_work slice spec; None = nothing to do).
+    Once main() sets `stop` (Ctrl+C) no new batch is taken; the one in flight
+    gets DRAIN_DEADLINE seconds, then results are flushed and the worker exits.
+    """
+    ignore_sigint()     # Ctrl+C reaches main(), which drains the workers through `stop`
+    drain = Drain(stop if stop is not None else mp.Event())
     acc_id = account["id"]
     session_name = account["session"]
     api_id = account["api_id"]
     api_hash = account["api_hash"]
 
     logger = get_logger(acc_id)
-    logger.info(f"Worker {worker_index} (ACC {acc_id}) STARTED | Total numbers assigned: {len(phone_list):,}")
+    log_number = Sampler()      # per-number lines only at LOG_SAMPLE_RATE
+    logger.info(f"Worker {worker_index} (ACC {acc_id}) STARTED → connecting while the input is read")
+    start_sampling()    # PROFILE_SAMPLE=<ms> (see profiling.py)
 
     checkpoint_file = Path(f"checkpoint_acc{acc_id}.csv")
     temp_output = OUTPUT_BASE / f"yes_acc{acc_id}.xlsx"
-
-    already_checked = set()
-    start_from = 0
-
-    if checkpoint_file.is_file():
+    dead_letter = DeadLetterStore()
+
+    # main() already dropped answered and dead-lettered numbers
+    work = WorkSlice("", 0, 0, 1)
+
+    client = TelegramClient(open_session(session_name), api_id, api_hash)
+    scheduler = FloodScheduler(max_attempts=MAX_RETRIES)
+    tuner = BatchTuner(session_name, BATCH_SIZE)
+    totals = {"yes": 0, "failed": 0, "batches": 0, "cursor": 0}
+    idle = asyncio.Event()      # set while no batch is in the dispatcher
+    idle.set()
+
+    def more_work() -> bool:
+        return totals["cursor"] < len(work) or scheduler.pending > 0
+
+    async def batches(emit):
+        """ Retry batches whose back-off expired first, then fresh ones; waits while the account is parked """
+        while True:
+            # one batch at a time: its requeue and the account's park must be known first
+            await idle.wait()
+            if drain.stopping:
+                logger.warning("Stop requested → no new batches; unchecked numbers stay for the next run")
+                return
+            if not more_work():
+                return
+            park = scheduler.wait_time(acc_id)
+            if park > 0:
+                logger.info(f"Account parked → resuming in {park:.0f}s  (retry queue: {scheduler.pending} batches)")
+                async with timed("flood_park"):
+                    await drain.sleep(park)
+                continue
+            batch = scheduler.next_retry()
+            if batch is None and totals["cursor"] < len(work):
+                cursor = totals["cursor"]
+                batch = PendingBatch(work.take(cursor, tuner.next_size()), cursor)
+                totals["cursor"] += len(batch.phones)
+            if batch is None:
+                async with timed("idle_wait"):     # only retries still in back-off
+                    await drain.sleep(min(5.0, scheduler.retry_wait()))
+                continue
+            idle.clear()
+            await emit(batch)
+
+    def give_up(result: BatchResult, batch: PendingBatch):
+        logger.warning(f"{len(batch.phones)} numbers FAILED after {batch.attempts} attempts ({batch.last_error})")
+        result.extend(BatchResult.failed(batch.phones, batch.last_error))
+        totals["failed"] += len(batch.phones)
+        dead_letter.add(batch.phones, batch.last_error, session_name, batch.attempts)
+
+    async def dispatch(batch: PendingBatch, emit):
         try:
-            df = pd.read_csv(checkpoint_file, dtype=str)
-            already_checked = set(df['phone'].dropna())
-            if 'batch_end_local_idx' in df.columns:
-                start_from = int(df['batch_end_local_idx'].max()) + 1
-            logger.info(f"Resume loaded | Already checked: {len(already_checked):,} | Starting from index {start_from}")
-        except Exception as e:
-            logger.error(f"Checkpoint load failed: {e}")
-
-    phones_to_check = [p for p in phone_list[start_from:] if p not in already_checked]
-    total_to_check = len(phones_to_check)
+            await check(batch, emit)
+        finally:
+            idle.set()
+
+    async def check(batch: PendingBatch, emit):
+        """ One ImportContacts attempt. FloodWait parks the account and requeues the batch,
+            other errors and retry_contacts numbers go back to the retry queue with a back-off """
+        totals["batches"] += 1
+        batch_idx = totals["batches"]
+        result = BatchResult(extra={"worker": acc_id, "session": session_name})
+        deferred = []
+        batch_started = time.monotonic()
+        flood_penalty = 0
+        try:
+            answers, deferred = await drain.run(import_batch(client, batch.phones, batch.start_index, logger))
+            result.extend(BatchResult.from_answers(answers))
+
+        except Abandoned as e:
+            # nothing of this batch is persisted → the next run checks it again
+            logger.warning(f"Batch {batch_idx}: {e} → removing its contacts and stopping")
+            await forget_contacts(client, batch.phones, logger)
+            return
+
+        except errors.FloodWaitError as e:
+            scheduler.park(acc_id, e.seconds + FLOOD_PADDING)
+            flood_penalty = e.seconds + FLOOD_PADDING
+            if scheduler.requeue(batch, f"FloodWait {e.seconds}s"):
+                logger.warning(f"Batch {batch_idx}: flood wait {e.seconds}s → account parked, batch requeued "
+                               f"(attempt {batch.attempts}/{scheduler.max_attempts})")
+            else:
+                give_up(result, batch)
 
-    if total_to_check == 0:
-        logger.info("No new numbers to check → worker finished early")
-        return
+        except Exception as e:
+            logger.error(f"Batch {batch_idx} error (attempt {batch.attempts + 1}): {type(e).__name__} → {e}")
+            if not scheduler.requeue(batch, f"{type(e).__name__}: {e}", delay=40 * (batch.attempts + 1)):
+                give_up(result, batch)
+
+        if deferred:
+            rest = deferred_part(batch, deferred)
+            if scheduler.requeue(rest, "deferred by Telegram (retry_contacts)", delay=DEFER_DELAY):
+                logger.info(f"Batch {batch_idx}: {len(deferred)} deferred numbers → retry queue ({scheduler.pending} batches)")
+            else:
+                give_up(result, rest)
+
+        if len(result):
+            await emit((batch_idx, batch, result, len(deferred)))
+
+            # Sleep only if more batches remain
+            if result.answered and more_work() and not drain.stopping:
+                sleep_sec = max(10, SLEEP_BASE + random.uniform(-SLEEP_JITTER, SLEEP_JITTER))
+                async with timed("sleep"):
+                    await drain.sleep(sleep_sec)
+
+        # wall time includes the pause and any FloodWait, as in the other checkers
+        tuner.record(len(batch.phones), result.answered, time.monotonic() - batch_started + flood_penalty)
+
+    async def enrich(item: tuple, emit):
+        """ Enricher: run totals, sampled YES lines, the batch summary and the checkpoint's end index """
+        batch_idx, batch, result, deferred = item
+        totals["yes"] += result.yes_count
+        if log_number.rate:
+            for i in result.yes:
+                if log_number():
+                    logger.info(f"YES → +{result.phone[i]}  @{result.username[i] or 'no-username'}")
+        failed = len(result) - result.answered
+        logger.info(f"Batch {batch_idx} → {len(batch.phones)} sent | {result.yes_count} YES | "
+                    f"{len(result) - result.yes_count - failed} NO | {deferred} deferred | {failed} failed")
+        result.extra["batch_end_local_idx"] = batch.start_index + len(batch.phones) - 1
+        await emit(item)
 
-    logger.info(f"Numbers to process this run: {total_to_check:,} | Batches expected: {(total_to_check + BATCH_SIZE - 1) // BATCH_SIZE}")
+    async def run_check():
+        nonlocal work
+        writer = ResultWriter(checkpoint_file, temp_output, CHECKPOINT_FIELDS, logger)
 
-    client = TelegramClient(session_name, api_id, api_hash)
+        async def persist(item, emit):
+            await writer.put_batch(item[2])
+            await emit(item)
 
-    async def run_check():
         try:
             await client.connect()
             if not await client.is_user_authorized():
                 logger.error("Session is NOT authorized! Please run client.start() manually for this session first.")
                 return
 
-            logger.info("Telegram session connected and authorized successfully")
-
-            total_yes_this_run = 0
-            batch_count = 0
-
-            for i in range(0, total_to_check, BATCH_SIZE):
-                batch_idx = batch_count + 1
-                batch = phones_to_check[i : i + BATCH_SIZE]
-                offset = start_from + i
-
-                logger.info(f"Batch {batch_idx} started | Sending {len(batch)} numbers")
-
-                contacts = [
-                    InputPhoneContact(
-                        client_id = offset + j,
-                        phone     = f"+{phone}",
-                        first_name= "Chk",
-                        last_name = str(offset + j)
-                    )
-                    for j, phone in enumerate(batch)
-                ]
-
-                success = False
-                for attempt in range(1, MAX_RETRIES + 1):
-                    try:
-                        result = await client(ImportContactsRequest(contacts))
-                        found = {u.phone.lstrip("+"): u for u in result.users if u.phone}
-
-                        checked_records = []
-                        yes_records = []
-                        batch_yes = 0
-
-                        for phone in batch:
-                            user = found.get(phone)
-                            record = {
-                                "phone": phone,
-                                "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "worker": acc_id,
-                            }
-                            if user:
-                                record.update({
-                                    "first_name": user.first_name or "",
-                                    "last_name": user.last_name or "",
-                                    "username": user.username or "",
-                                    "telegram_id": user.id,
-                                    "status": "YES"
-                                })
-                                yes_records.append(record)
-                                batch_yes += 1
-                                total_yes_this_run += 1
-                                logger.info(f"YES → +{phone}  @{user.username or 'no-username'}")
-                            else:
-                                record["status"] = "NO"
-                                # logger.debug(f"NO → +{phone}")
-
-                            checked_records.append(record)
-
-                        logger.info(f"Batch {batch_idx} finished | Found {batch_yes} YES in this batch")
-
-                        # Cleanup contacts
-                        if result.users:
-                            try:
-                                await client(DeleteContactsRequest([u.id for u in result.users]))
-                                logger.debug("Contacts cleaned up successfully")
-                            except Exception as cleanup_e:
-                                logger.warning(f"Cleanup failed: {cleanup_e}")
-
-                        # Save checkpoint
-                        if checked_records:
-                            df_new = pd.DataFrame(checked_records)
-                            df_new['batch_end_local_idx'] = offset + len(batch) - 1
-
-                            if checkpoint_file.is_file():
-                                df_old = pd.read_csv(checkpoint_file, dtype=str)
-                                df = pd.concat([df_old, df_new], ignore_index=True)
-                            else:
-                                df = df_new
-                            df.to_csv(checkpoint_file, index=False, encoding='utf-8')
-                            logger.debug("Checkpoint saved")
-
-                        # Save YES results
-                        if yes_records:
-                            df_yes = pd.DataFrame(yes_records)
-                            if temp_output.is_file():
-                                try:
-                                    df_old = pd.read_excel(temp_output)
-                                    df_final = pd.concat([df_old, df_yes]).drop_duplicates(subset=['phone'], keep='last')
-                                except:
-                                    df_final = df_yes
-                            else:
-                                df_final = df_yes
-                            df_final.to_excel(temp_output, index=False, engine='openpyxl')
-                            logger.debug(f"Saved {len(yes_records)} new YES results")
-
-                        success = True
-
-                        # Sleep only if more batches remain
-                        if i + BATCH_SIZE < total_to_check:
-                            sleep_sec = max(10, SLEEP_BASE + random.uniform(-SLEEP_JITTER, SLEEP_JITTER))
-                            logger.info(f"Waiting {sleep_sec:.1f}s before next batch...")
-                            await asyncio.sleep(sleep_sec)
-
-                        break
-
-                    except errors.FloodWaitError as e:
-                        wait = e.seconds + random.randint(30, 90)
-                        logger.warning(f"FLOOD WAIT {e.seconds}s → sleeping {wait}s (attempt {attempt}/{MAX_RETRIES})")
-                        await asyncio.sleep(wait)
-                    except Exception as e:
-                        logger.error(f"Batch {batch_idx} error (attempt {attempt}): {type(e).__name__} → {e}")
-                        if attempt == MAX_RETRIES:
-                            logger.warning(f"Batch {batch_idx} skipped after max retries")
-                            break
-                        await asyncio.sleep(40 * attempt)
-
-                batch_count += 1
-
-            logger.info(f"Worker {worker_index} (ACC {acc_id}) COMPLETED")
-            logger.info(f"Total YES found this run: {total_yes_this_run:,} / {total_to_check:,} checked")
+            logger.info("Telegram session connected and authorized → waiting for numbers")
+            spec = await asyncio.get_running_loop().run_in_executor(None, chunk_conn.recv)
+            chunk_conn.close()
+            work = WorkSlice(*spec) if spec is not None else work
+            if not len(work):
+                logger.info("No new numbers to check → worker finished early")
+                return
+            logger.info(f"Numbers to process this run: {len(work):,} | Batch size starts at {tuner.next_size()} "
+                        f"(tuned range {tuner.min_size}-{tuner.max_size}, band {tuner.band})")
+
+            pipe = Pipeline(f"acc{acc_id}", logger)
+            pipe.source("batches", batches)
+            pipe.stage("dispatcher", dispatch)
+            pipe.stage("enricher", enrich)
+            pipe.stage("sink", persist)
+            await pipe.run()
+
+            logger.info(f"Worker {worker_index} (ACC {acc_id}) {'STOPPED' if drain.stopping else 'COMPLETED'}")
+            logger.info(f"Total YES found this run: {totals['yes']:,} / {len(work):,} checked | Failed: {totals['failed']:,} | Tuned batch size: {tuner.best}")
+            tuner.save()
 
         except Exception as e:
             logger.error(f"Critical worker error: {type(e).__name__} → {e}", exc_info=True)
         finally:
-            if await client.is_connected():
+            await writer.aclose()   # drain + fsync
+            work.close()
+            if client.is_connected():
                 await client.disconnect()
                 logger.info("Telegram client disconnected")
 
     asyncio.run(run_check())
+    finish_profile(f"acc_{acc_id}", logger)
+    stop_logging()   # drain the log queue before the process exits
 
 
 # ────────────────────────────────────────────────
-def main():
-    print("\n" + "═"*80)
-    print("   TELEGRAM BULK CHECKER  —  Batch size = 20  —  Detailed logging enabled")
-    print("═"*80 + "\n")
+def read_input_phones() -> Optional[List[str]]:
+    """ Normalized numbers of INPUT_EXCEL, from the input cache when the file is unchanged """
+    import input_cache   # lazy, like pandas: pulls in numpy
+    cached = input_cache.load(INPUT_EXCEL, INPUT_CACHE_TAG)
+    if cached is not None:
+        print(f"Input unchanged → {len(cached):,} normalized phones from {input_cache.CACHE_DIR}")
+        return input_cache.as_strings(cached)
 
     if not INPUT_EXCEL.is_file():
         print(f"ERROR → Input file not found: {INPUT_EXCEL.absolute()}")
-        return
+        return None
 
+    # pandas is imported here, not at module level: spawned workers re-import this
+    # module and never need it
+    import pandas as pd
     print(f"Reading input file: {INPUT_EXCEL.absolute()}")
     try:
-        df = pd.read_excel(INPUT_EXCEL)
+        with timed("excel_parse"):
+            df = pd.read_excel(INPUT_EXCEL)
     except Exception as e:
         print(f"Cannot read Excel file: {e}")
-        return
+        return None
 
     print(f"Rows: {len(df):,} | Columns: {list(df.columns)}")
 
     if "phone" not in df.columns:
         print('ERROR: Column "phone" not found')
-        return
+        return None
 
-    all_phones = [normalize_phone(x) for x in df["phone"] if normalize_phone(x) is not None]
-    all_phones = list(dict.fromkeys(all_phones))
+    with timed("normalize"):
+        all_phones = [normalize_phone(x) for x in df["phone"] if normalize_phone(x) is not None]
+        all_phones = list(dict.fromkeys(all_phones))
     print(f"\nTotal unique valid phones after normalization: {len(all_phones):,}")
 
+    # Impossible numbers never reach ImportContacts
+    with timed("prefilter"):
+        all_phones, rejected = split_valid(all_phones)
+    if rejected:
+        new = record_rejections(rejected, INPUT_EXCEL.name)
+        print(f"Pre-filter rejected {len(rejected):,} numbers ({new:,} new → {REJECTED_CSV})")
+    input_cache.store(INPUT_EXCEL, INPUT_CACHE_TAG, all_phones)
+    return all_phones
+
+
+def load_checked() -> set:
+    """ Phones with a YES/NO answer in any account's checkpoint (the split changes with the account list) """
+    checked = set()
+    for path in sorted(Path(".").glob("checkpoint_acc*.csv")):
+        try:
+            with timed("checkpoint_load"):
+                df = read_checkpoint(path)
+        except Exception as e:
+            print(f"Cannot load checkpoint {path}: {e}")
+            continue
+        if 'status' in df.columns:
+            df = df[df['status'] != 'FAILED']
+        checked.update(df['phone'].dropna())
+    return checked
+
+
+def split_work() -> Optional[List[str]]:
+    """ Numbers still to check (input minus answered and dead-lettered); None = nothing to check """
+    all_phones = read_input_phones()
+    if all_phones is None:
+        return None
+
     if len(all_phones) == 0:
         print("\n!!! NO VALID PHONE NUMBERS FOUND !!!")
-        return
+        return None
 
-    n_workers = len(ACCOUNTS)
-    if n_workers == 0:
-        print("ERROR: No accounts defined in ACCOUNTS list")
-        return
+    # Resume: answered numbers and dead-lettered ones (dead_letter.csv) are not sent again
+    dead_letter = DeadLetterStore()
+    skip = load_checked() | set(dead_letter.phones())
+    if skip:
+        before = len(all_phones)
+        all_phones = [p for p in all_phones if p not in skip]
+        print(f"Resume → {before - len(all_phones):,} numbers already answered or dead-lettered ({dead_letter.path})")
+    if not all_phones:
+        print("Nothing left to check")
+        return None
+    return all_phones
 
-    chunk_size = max(1, (len(all_phones) + n_workers - 1) // n_workers)
-    chunks = [all_phones[i:i + chunk_size] for i in range(0, len(all_phones), chunk_size)]
 
-    print(f"\nLaunching {n_workers} parallel workers (~{chunk_size:,} numbers each)")
-    print(f"Each worker will process in batches of {BATCH_SIZE} numbers\n")
+def main():
+    print("\n" + "═"*80)
+    print(f"   TELEGRAM BULK CHECKER  —  Batch size auto-tuned (starts at {BATCH_SIZE})  —  Detailed logging enabled")
+    print("═"*80 + "\n")
 
-    processes = []
-    for idx, (acc, chunk) in enumerate(zip(ACCOUNTS, chunks), 1):
-        if not chunk:
-            print(f"Worker {idx} → no numbers assigned (skipping)")
-            continue
-        print(f"Starting Worker {idx} (ACC {acc['id']}) with {len(chunk):,} numbers")
-        p = mp.Process(target=worker, args=(acc, chunk, idx))
-        processes.append(p)
+    accounts = load_accounts()
+    if accounts:
+        print(f"Accounts: {len(accounts)} verified sessions from {SESSION_MANIFEST}")
+    else:
+        print(f"No verified sessions in {SESSION_MANIFEST} → using FALLBACK_ACCOUNTS (run start.py to create it)")
+        accounts = FALLBACK_ACCOUNTS
+
+    n_workers = len(accounts)
+    if n_workers == 0:
+        print("ERROR: No accounts defined")
+        return
+
+    # Workers start (spawn + imports + connect + authorize) while the input is read below
+    print(f"\nLaunching {n_workers} parallel workers → they connect while the input is read")
+    stop = mp.Event()       # Ctrl+C → workers drain instead of being killed
+    os.environ["CHANGEFEED_RUN"] = RUN_ID      # all workers report changes under one run
+    processes, senders = [], []
+    for idx, acc in enumerate(accounts, 1):
+        recv_end, send_end = mp.Pipe(duplex=False)
+        p = mp.Process(target=worker, args=(acc, recv_end, idx, stop))
         p.start()
+        recv_end.close()    # only the child reads; a dead child then fails send() instead of hanging it
+        processes.append(p)
+        senders.append(send_end)
 
+    # Workers get (file, length, start, step) of one shared int64 work list, not a pickled chunk
+    shared = None
+    specs = [None] * n_workers
     try:
-        for p in processes:
-            p.join()
+        all_phones = split_work()
+        if all_phones is not None:
+            shared = SharedWorkList(all_phones)
+            del all_phones
+            specs = [shared.slice_spec(i, n_workers) for i in range(n_workers)]
+            print(f"~{-(-shared.length // n_workers):,} numbers per worker; each starts with batches of "
+                  f"{BATCH_SIZE} (tuned per session, see autotune.py)\n")
     except KeyboardInterrupt:
-        print("\nInterrupted by user → terminating all workers...")
-        for p in processes:
-            p.terminate()
+        print("\nInterrupted while reading the input → stopping workers")
+        stop.set()
+        specs = [None] * n_workers
+    finally:
+        for idx, (conn, spec) in enumerate(zip(senders, specs), 1):
+            if shared is not None and idx > shared.length:
+                print(f"Worker {idx} → no numbers assigned")
+            try:
+                conn.send(spec)
+            except (BrokenPipeError, OSError):
+                print(f"Worker {idx} exited early (see its log) → its numbers stay unchecked this run")
+            conn.close()
+
+    try:
+        join_workers(processes, stop)
+    finally:
+        if shared is not None:
+            shared.close()
+
+    if specs[0] is None or stop.is_set():
+        return
 
     print("\n" + "═"*80)
     print("All workers finished.")
@@ -332,4 +414,6 @@ def main():
 
 if __name__ == "__main__":
     mp.set_start_method("spawn", force=True)
-    main()
\ No newline at end of file
+    start_sampling()
+    main()
+    finish_profile("mcheck")   # the parent's own split (input reading); workers log theirs
\ No newline at end of file
@@ -19,16 +19,33 @@ load_dotenv()
 
 import os
 import asyncio
-import pandas as pd
-import logging
+import argparse
 import random
+import time
+import socket
 import multiprocessing as mp
+from array import array
+from multiprocessing.connection import Connection
 from pathlib import Path
-from datetime import datetime
 from typing import List, Optional
 from telethon import TelegramClient, errors
-from telethon.tl.functions.contacts import ImportContactsRequest, DeleteContactsRequest
-from telethon.tl.types import InputPhoneContact
+
+from sessions import SESSION_MANIFEST, load_accounts, open_session
+from phones import normalize_phone
+from scheduler import FloodScheduler, HandoffQueue, PendingBatch, deferred_part
+from dead_letter import DeadLetterStore
+from autotune import BatchTuner
+from priority import PriorityWorkQueue
+from logsetup import setup_logging, stop_logging, Sampler
+from persistence import ResultWriter, read_checkpoint
+from changefeed import RUN_ID
+from profiling import stage as timed, start_sampling, finish as finish_profile
+from pipeline import Pipeline, import_batch
+from batch_result import BatchResult
+from coordinator import open_coordinator
+from shared_work import SharedWorkList, WorkSlice
+from shutdown import Drain, Abandoned, ignore_sigint, forget_contacts, join_workers
+from prefilter import split_valid, record_rejections, REJECTED_CSV, PLAN_KEY
 
 # ────────────────────────────────────────────────
 #                     CONFIG
@@ -37,289 +54,510 @@ INPUT_EXCEL    = Path("bd_numbers_state.xlsx")
 OUTPUT_BASE    = Path("checked_results")
 OUTPUT_BASE.mkdir(exist_ok=True)
 
-BATCH_SIZE     = 20             # your requested batch size
+INPUT_CACHE_TAG = f"multiple_acc.normalize_phone v1 | {PLAN_KEY}"   # bump v1 when normalization changes
+
+BATCH_SIZE     = 20             # starting size only — autotune.py tunes it per session
 SLEEP_BASE     = 8
 SLEEP_JITTER   = 12
-MAX_RETRIES    = 2
+MAX_LEASE_FAILURES = 24         # consecutive failed coordinator lease calls (~5s apart) before giving up on it
 
 # ────────────────────────────────────────────────
 #               YOUR ACCOUNTS
 # ────────────────────────────────────────────────
-ACCOUNTS = [
-    {"id": 1,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_01"},
-    {"id": 2,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_02"},
-    {"id": 3,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_03"},
-    # {"id": 4,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_04"},
-    # {"id": 5,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_05"},
-    # {"id": 6,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_06"},
-    # {"id": 7,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_07"},
-    # {"id": 8,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_08"},
-    # {"id": 9,  "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_09"},
-    # {"id": 10, "api_id": int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID"))int(os.getenv("API_ID")), "api_hash": os.getenv("API_HASH"), "session": "checker_10"},
+# Accounts come from sessions.json (written by `python start.py`).
+# This list is only used when no manifest has been created yet.
+FALLBACK_ACCOUNTS = [
+    {"id": 1,  "api_id": int(os.getenv("API_ID", 0)), "api_hash": os.getenv("API_HASH"), "session": "checker_01"},
+    {"id": 2,  "api_id": int(os.getenv("API_ID", 0)), "api_hash": os.getenv("API_HASH"), "session": "checker_02"},
+    {"id": 3,  "api_id": int(os.getenv("API_ID", 0)), "api_hash": os.getenv("API_HASH"), "session": "checker_03"},
 ]
 
 # ────────────────────────────────────────────────
-def normalize_phone(raw: any) -> Optional[str]:
-    if pd.isna(raw) or raw is None:
-        return None
-    if isinstance(raw, float) and raw.is_integer():
-        digits = str(int(raw))
-    else:
-        digits = str(raw).strip()
-    digits = ''.join(c for c in digits if c.isdigit())
-    if not digits or len(digits) < 10:
-        return None
-    if digits.startswith('880') and len(digits) == 13:
-        return digits
-    if digits.startswith('880') and len(digits) == 14 and digits.endswith('0'):
-        return digits[:-1]
-    if digits.startswith('88') and len(digits) == 12:
-        return '880' + digits[2:]
-    if digits.startswith('0') and len(digits) == 11:
-        return '880' + digits[1:]
-    if len(digits) == 10:
-        return '880' + digits
-    if len(digits) == 11 and digits[0] in '13456789':
-        return '880' + digits
-    return None
+CHECKPOINT_FIELDS = [
+    "phone", "checked_at", "worker", "session", "first_name", "last_name",
+    "username", "telegram_id", "access_hash", "status", "error", "batch_end_local_idx",
+]
 
 
 def get_logger(account_id: int):
-    logger = logging.getLogger(f"acc_{account_id}")
-    if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)-6s | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        fh = logging.FileHandler(f"telegram_checker_acc{account_id}.log", encoding="utf-8")
-        fh.setFormatter(formatter)
-        logger.addHandler(fh)
-        
-        sh = logging.StreamHandler()
-        sh.setFormatter(formatter)
-        logger.addHandler(sh)
-    return logger
-
-
-def worker(account: dict, phone_list: List[str], worker_index: int):
+    # queue-based, gzip-rotated — formatting and disk I/O stay off the event loop
+    return setup_logging(f"acc_{account_id}", f"telegram_checker_acc{account_id}.log")
+
+
+def load_checked() -> set:
+    """ Phones with a YES/NO answer in any account's checkpoint (batches can move between accounts) """
+    checked = set()
+    paths = sorted(Path(".").glob("checkpoint_acc*.csv"))
+    if not paths:
+        return checked
+    for path in paths:
+        try:
+            df = read_checkpoint(path)
+        except Exception as e:
+            print(f"Cannot load checkpoint {path}: {e}")
+            continue
+        if 'status' in df.columns:
+            df = df[df['status'] != 'FAILED']
+        checked.update(df['phone'].dropna())
+    return checked
+
+
+def worker(account: dict, chunk_conn: Connection, worker_index: int, handoff: HandoffQueue,
+           coordinator_target: Optional[str] = None, stop: Optional[mp.Event] = None):
+    """
+    Started before main() has read the input: the worker connects and authorizes
+    first, then receives its share of the shared work list over `chunk_conn`
+    (a shared_work slice spec; None = nothing to do).
+    With `coordinator_target` the chunk is empty and batches are leased from
+    coordinator.py instead; every answer is reported back to it.
+    Once main() sets `stop` (Ctrl+C) no new batch is taken; the one in flight
+    gets DRAIN_DEADLINE seconds, then results are flushed and the worker exits.
+    """
+    ignore_sigint()     # Ctrl+C reaches main(), which drains the workers through `stop`
+    drain = Drain(stop if stop is not None else mp.Event())
     acc_id = account["id"]
     session_name = account["session"]
     api_id = account["api_id"]
     api_hash = account["api_hash"]
 
     logger = get_logger(acc_id)
-    logger.info(f"Worker {worker_index} started | {len(phone_list)} numbers assigned")
+    logger.info(f"Worker {worker_index} started → connecting while the input is read")
+    start_sampling()    # PROFILE_SAMPLE=<ms> (see profiling.py)
 
     checkpoint_file = Path(f"checkpoint_acc{acc_id}.csv")
     temp_output = OUTPUT_BASE / f"yes_acc{acc_id}.xlsx"
+    dead_letter = DeadLetterStore()
 
-    already_checked = set()
-    start_from = 0
+    # main() already removed checked and dead-lettered numbers
+    work = WorkSlice("", 0, 0, 1)
 
-    if checkpoint_file.is_file():
-        try:
-            df = pd.read_csv(checkpoint_file, dtype=str)
-            already_checked = set(df['phone'].dropna())
-            if 'batch_end_local_idx' in df.columns:
-                start_from = int(df['batch_end_local_idx'].max()) + 1
-            logger.info(f"Resuming → already checked: {len(already_checked)}, from index {start_from}")
-        except Exception as e:
-            logger.error(f"Cannot load checkpoint: {e}")
+    client = TelegramClient(open_session(session_name), api_id, api_hash)
+    writer = ResultWriter(checkpoint_file, temp_output, CHECKPOINT_FIELDS, logger)
+    scheduler = FloodScheduler()
+    log_number = Sampler()
+    tuner = BatchTuner(session_name, BATCH_SIZE)
 
-    phones_to_check = [p for p in phone_list[start_from:] if p not in already_checked]
+    coordinator = open_coordinator(coordinator_target) if coordinator_target else None
+    node = f"{socket.gethostname()}/{session_name}"
+    coordinator_left = None     # numbers not done yet at the coordinator (last lease reply)
+    lease_failures = 0          # consecutive lease calls that got no reply
 
-    if not phones_to_check:
-        logger.info("No new numbers to check.")
-        return
+    async def call_coordinator(fn, *args) -> Optional[dict]:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        except Exception as e:
+            logger.warning(f"Coordinator call failed: {type(e).__name__} → {e}")
+            return None
+
+    totals = {"yes": 0, "failed": 0, "deferred": 0, "batches": 0}
+    idle = asyncio.Event()      # set while no batch is in the dispatcher
+    idle.set()
+    own_work_done = False
+
+    async def next_batch(cursor: int) -> tuple:
+        """ Local retries first, then own chunk, then batches handed over by other accounts,
+            then a new lease from the coordinator """
+        nonlocal coordinator_left, lease_failures
+        batch = scheduler.next_retry()
+        if batch is not None:
+            return batch, cursor, False
+        if cursor < len(work):
+            batch = PendingBatch(work.take(cursor, tuner.next_size()), cursor, origin=acc_id)
+            return batch, cursor + len(batch.phones), False
+        batch = handoff.get()
+        if batch is not None or coordinator is None or lease_failures >= MAX_LEASE_FAILURES:
+            return batch, cursor, batch is not None
+        reply = await call_coordinator(coordinator.lease, node, tuner.next_size())
+        if not reply:
+            lease_failures += 1
+            if lease_failures >= MAX_LEASE_FAILURES:
+                # unreachable for good → finish local work; its leases expire and go to other nodes
+                logger.error(f"Coordinator unreachable {lease_failures} times in a row → no more leases this run")
+                coordinator_left = 0
+            return None, cursor, False
+        lease_failures = 0
+        coordinator_left = reply["remaining"]
+        if not reply["phones"]:
+            return None, cursor, False
+        return PendingBatch(reply["phones"], 0, lease=reply["lease"]), cursor, False
+
+    async def batches(emit):
+        """ Source: one batch at a time (its requeue / handover and the account's park must be
+            known first); ends when own work, retries, handed-over batches and leases are done """
+        nonlocal own_work_done
+        cursor = 0
+        while True:
+            await idle.wait()
+            if drain.stopping:
+                logger.warning("Stop requested → no new batches; unchecked numbers stay for the next run")
+                return
+            park = scheduler.wait_time(acc_id)
+            if park > 0:
+                logger.info(f"Account parked → resuming in {park:.0f}s")
+                async with timed("flood_park"):
+                    await drain.sleep(park)
+                continue
+
+            batch, cursor, from_handoff = await next_batch(cursor)
+
+            if not own_work_done and cursor >= len(work) and not scheduler.pending:
+                own_work_done = True
+                handoff.worker_finished()
+
+            if batch is None:
+                if own_work_done and not scheduler.pending and handoff.drained() \
+                        and (coordinator is None or coordinator_left == 0):
+                    return
+                idle_for = 5.0 if coordinator is not None else 1.0   # other nodes still hold leases
+                async with timed("idle_wait"):
+                    await drain.sleep(min(5.0, scheduler.retry_wait()) if scheduler.pending else idle_for)
+                continue
+            idle.clear()
+            await emit((batch, from_handoff))
+
+    def give_up(batch: PendingBatch) -> BatchResult:
+        totals["failed"] += len(batch.phones)
+        dead_letter.add(batch.phones, batch.last_error, session_name, batch.attempts)
+        return BatchResult.failed(batch.phones, batch.last_error, {"worker": acc_id, "session": session_name})
+
+    async def dispatch(item: tuple, emit):
+        try:
+            await check(item, emit)
+        finally:
+            idle.set()
+
+    async def check(item: tuple, emit):
+        """ Dispatcher: one ImportContacts attempt (pipeline.import_batch). FloodWait parks the
+            account and hands the batch over to the other accounts; other errors go back to the
+            local retry queue. → (batch, result, deferred count, from_handoff) """
+        batch, from_handoff = item
+        totals["batches"] += 1
+        batch_idx = totals["batches"]
+        result, deferred = BatchResult(), []
+        failed = False
+        batch_started = time.monotonic()
+        flood_penalty = 0
 
-    logger.info(f"Numbers left to check: {len(phones_to_check)}")
+        try:
+            answers, deferred = await drain.run(import_batch(client, batch.phones, batch.start_index, logger))
+            result = BatchResult.from_answers(answers, {"worker": acc_id, "session": session_name})
+
+        except Abandoned as e:
+            # nothing of this batch is persisted → the next run checks it again
+            logger.warning(f"Batch {batch_idx}: {e} → removing its contacts and stopping")
+            await forget_contacts(client, batch.phones, logger)
+            if from_handoff:
+                handoff.task_done()
+            return
+
+        except errors.FloodWaitError as e:
+            wait = e.seconds + random.randint(30, 90)
+            scheduler.park(acc_id, wait)
+            flood_penalty = wait
+            batch.attempts += 1
+            batch.last_error = f"FloodWait {e.seconds}s"
+            if batch.attempts < scheduler.max_attempts:
+                logger.warning(f"Flood wait {e.seconds}s → parked {wait}s, batch handed over to other accounts")
+                handoff.put(batch)
+            else:
+                failed = True
 
-    client = TelegramClient(session_name, api_id, api_hash)
+        except Exception as e:
+            logger.error(f"Batch error (attempt {batch.attempts + 1}): {type(e).__name__} → {e}")
+            failed = not scheduler.requeue(batch, f"{type(e).__name__}: {e}", delay=40 * (batch.attempts + 1))
+
+        if failed:
+            logger.warning(f"Batch {batch_idx} FAILED after {batch.attempts} attempts ({batch.last_error})")
+            result = give_up(batch)
+
+        answered = len(result) if not failed else 0
+
+        # retry_contacts = this account is being throttled → hand the rest to the others
+        if deferred:
+            rest = deferred_part(batch, deferred)
+            rest.attempts += 1
+            rest.last_error = "deferred by Telegram (retry_contacts)"
+            if rest.attempts < scheduler.max_attempts:
+                logger.info(f"{len(deferred)} deferred numbers handed over to other accounts")
+                handoff.put(rest)
+            else:
+                logger.warning(f"{len(deferred)} numbers deferred {rest.attempts} times → recorded as FAILED")
+                result.extend(give_up(rest))
+
+        await emit((batch, result, len(deferred), from_handoff))
+
+        # Sleep between batches
+        if answered and not drain.stopping:
+            sleep_sec = max(10, SLEEP_BASE + random.uniform(-SLEEP_JITTER, SLEEP_JITTER))
+            logger.info(f"Batch {batch_idx} done → sleep {sleep_sec:.1f}s")
+            async with timed("sleep"):
+                await drain.sleep(sleep_sec)
+
+        tuner.record(len(batch.phones), answered, time.monotonic() - batch_started + flood_penalty)
+
+    async def enrich(item: tuple, emit):
+        """ Enricher: run totals, sampled per-number lines, the batch summary and the
+            checkpoint's local end index (handed-over batches have none here) """
+        batch, result, deferred, from_handoff = item
+        totals["yes"] += result.yes_count
+        totals["deferred"] += deferred
+        if log_number.rate:
+            for i in result.yes:
+                if log_number():
+                    logger.info(f"YES → +{result.phone[i]}  @{result.username[i] or 'no-username'}")
+        if result.answered or deferred:
+            logger.info(f"Batch → {len(batch.phones)} sent | {result.yes_count} YES | "
+                        f"{result.answered - result.yes_count} NO | {deferred} deferred")
+        result.extra["batch_end_local_idx"] = \
+            batch.start_index + len(batch.phones) - 1 if batch.origin == acc_id else ""
+        await emit(item)
+
+    async def persist(item: tuple, emit):
+        """ Sink: writer thread persists the batch, then the lease / handover is settled """
+        batch, result, _, from_handoff = item
+        await writer.put_batch(result)
+        if batch.lease and len(result):
+            await call_coordinator(coordinator.complete, batch.lease, result.records(), node)
+        if from_handoff:
+            handoff.task_done()
+        await emit(item)
 
     async def run_check():
+        nonlocal work
         try:
             await client.connect()
             if not await client.is_user_authorized():
                 logger.error("Session NOT authorized! Run client.start() manually first.")
                 return
 
-            logger.info("Connected & authorized → checking started")
-
-            total_yes = 0
-
-            for batch_idx, i in enumerate(range(0, len(phones_to_check), BATCH_SIZE)):
-                batch = phones_to_check[i : i + BATCH_SIZE]
-                offset = start_from + i
-
-                contacts = [
-                    InputPhoneContact(
-                        client_id = offset + j,
-                        phone     = f"+{phone}",
-                        first_name= "Chk",
-                        last_name = str(offset + j)
-                    )
-                    for j, phone in enumerate(batch)
-                ]
-
-                for attempt in range(1, MAX_RETRIES + 1):
-                    try:
-                        result = await client(ImportContactsRequest(contacts))
-                        found = {u.phone.lstrip("+"): u for u in result.users if u.phone}
-
-                        checked_records = []
-                        yes_records = []
-
-                        for phone in batch:
-                            user = found.get(phone)
-                            record = {
-                                "phone": phone,
-                                "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                "worker": acc_id,
-                            }
-                            if user:
-                                record.update({
-                                    "first_name": user.first_name or "",
-                                    "last_name": user.last_name or "",
-                                    "username": user.username or "",
-                                    "telegram_id": user.id,
-                                    "status": "YES"
-                                })
-                                yes_records.append(record)
-                                total_yes += 1
-                                logger.info(f"YES → +{phone}  @{user.username or 'no-username'}")
-                            else:
-                                record["status"] = "NO"
-
-                            checked_records.append(record)
-
-                        # Cleanup
-                        if result.users:
-                            try:
-                                await client(DeleteContactsRequest([u.id for u in result.users]))
-                            except:
-                                pass
-
-                        # Save checkpoint
-                        if checked_records:
-                            df_new = pd.DataFrame(checked_records)
-                            df_new['batch_end_local_idx'] = offset + len(batch) - 1
-
-                            if checkpoint_file.is_file():
-                                df_old = pd.read_csv(checkpoint_file, dtype=str)
-                                df = pd.concat([df_old, df_new], ignore_index=True)
-                            else:
-                                df = df_new
-                            df.to_csv(checkpoint_file, index=False, encoding='utf-8')
-
-                        # Save YES
-                        if yes_records:
-                            df_yes = pd.DataFrame(yes_records)
-                            if temp_output.is_file():
-                                try:
-                                    df_old = pd.read_excel(temp_output)
-                                    df_final = pd.concat([df_old, df_yes]).drop_duplicates(subset=['phone'], keep='last')
-                                except:
-                                    df_final = df_yes
-                            else:
-                                df_final = df_yes
-                            df_final.to_excel(temp_output, index=False, engine='openpyxl')
-
-                        # Sleep between batches
-                        if i + BATCH_SIZE < len(phones_to_check):
-                            sleep_sec = max(10, SLEEP_BASE + random.uniform(-SLEEP_JITTER, SLEEP_JITTER))
-                            logger.info(f"Batch {batch_idx+1} done → sleep {sleep_sec:.1f}s")
-                            await asyncio.sleep(sleep_sec)
-
-                        break
-
-                    except errors.FloodWaitError as e:
-                        wait = e.seconds + random.randint(30, 90)
-                        logger.warning(f"Flood wait {e.seconds}s → sleeping {wait}s (attempt {attempt})")
-                        await asyncio.sleep(wait)
-                    except Exception as e:
-                        logger.error(f"Batch error (attempt {attempt}): {type(e).__name__} → {e}")
-                        if attempt == MAX_RETRIES:
-                            break
-                        await asyncio.sleep(40 * attempt)
-
-            logger.info(f"Worker {worker_index} finished | Found YES: {total_yes:,}")
+            logger.info("Connected & authorized → waiting for numbers")
+            spec = await asyncio.get_running_loop().run_in_executor(None, chunk_conn.recv)
+            chunk_conn.close()
+            if spec is None:
+                logger.info("Nothing to check this run")
+                return
+            work = WorkSlice(*spec)
+            if len(work):
+                logger.info(f"Numbers left to check: {len(work)}")
+            else:
+                logger.info("No new numbers to check → helping with handed-over batches only")
+
+            logger.info(f"Checking started (batch size {tuner.next_size()}, band {tuner.band})")
+
+            pipe = Pipeline(f"acc{acc_id}", logger)
+            pipe.source("batches", batches)
+            pipe.stage("dispatcher", dispatch)
+            pipe.stage("enricher", enrich)
+            pipe.stage("sink", persist)
+            await pipe.run()
+
+            logger.info(f"Worker {worker_index} finished | Found YES: {totals['yes']:,} | Deferred: {totals['deferred']:,} | Failed: {totals['failed']:,} | Tuned batch size: {tuner.best}")
+            tuner.save()
 
         except Exception as e:
             logger.error(f"Critical error: {e}", exc_info=True)
         finally:
+            if not own_work_done:
+                handoff.worker_finished()
+            await writer.aclose()   # drain + fsync
+            work.close()
+            if coordinator is not None:
+                coordinator.close()
             # FIXED: no await on is_connected() — it's synchronous
             if client.is_connected():
                 await client.disconnect()
                 logger.info("Client disconnected")
 
     asyncio.run(run_check())
+    finish_profile(f"acc_{acc_id}", logger)
+    stop_logging()   # drain the log queue before the process exits
 
 
 # ────────────────────────────────────────────────
-def main():
-    print("\n" + "═"*70)
-    print("   Telegram Bulk Checker  —  Batch size = 20")
-    print("═"*70 + "\n")
+def read_input_phones() -> Optional[List[str]]:
+    """ Normalized numbers of INPUT_EXCEL, from the input cache when the file is unchanged """
+    import input_cache   # lazy, like pandas: pulls in numpy
+    cached = input_cache.load(INPUT_EXCEL, INPUT_CACHE_TAG)
+    if cached is not None:
+        print(f"Input unchanged → {len(cached):,} normalized phones from {input_cache.CACHE_DIR}")
+        return input_cache.as_strings(cached)
 
+    all_phones = parse_input_phones()
+    if all_phones is not None:
+        input_cache.store(INPUT_EXCEL, INPUT_CACHE_TAG, all_phones)
+    return all_phones
+
+
+def parse_input_phones() -> Optional[List[str]]:
     if not INPUT_EXCEL.is_file():
         print(f"ERROR → Input file not found: {INPUT_EXCEL.absolute()}")
-        return
+        return None
 
+    # pandas is imported here, not at module level: spawned workers re-import this
+    # module and never need it
+    import pandas as pd
     print(f"Reading: {INPUT_EXCEL.absolute()}")
     try:
-        df = pd.read_excel(INPUT_EXCEL)
+        with timed("excel_parse"):
+            df = pd.read_excel(INPUT_EXCEL)
     except Exception as e:
         print(f"Cannot read Excel: {e}")
-        return
+        return None
 
     print(f"Rows: {len(df):,} | Columns: {list(df.columns)}")
 
     if "phone" not in df.columns:
         print('ERROR: Column "phone" not found')
-        return
+        return None
 
-    all_phones = [normalize_phone(x) for x in df["phone"] if normalize_phone(x) is not None]
-    all_phones = list(dict.fromkeys(all_phones))
+    with timed("normalize"):
+        all_phones = [normalize_phone(x) for x in df["phone"] if normalize_phone(x) is not None]
+        all_phones = list(dict.fromkeys(all_phones))
     print(f"\nTotal unique valid phones: {len(all_phones):,}")
 
+    # Impossible numbers never reach ImportContacts
+    with timed("prefilter"):
+        all_phones, rejected = split_valid(all_phones)
+    if rejected:
+        new = record_rejections(rejected, INPUT_EXCEL.name)
+        print(f"Pre-filter rejected {len(rejected):,} numbers ({new:,} new → {REJECTED_CSV})")
+    return all_phones
+
+
+def split_work(retry_failed: bool, n_workers: int, work_prefix: Optional[str] = None) -> Optional[array]:
+    """ Unchecked numbers (int64) in priority order, dealt out round-robin later; None = nothing to check """
+    dead_letter = DeadLetterStore()
+    checked = load_checked()
+    failed = dead_letter.phones()
+    sources = None
+
+    if retry_failed:
+        all_phones = [p for p in failed if p not in checked]
+        print(f"Retry mode → {len(all_phones):,} dead-lettered numbers from {dead_letter.path}")
+    elif work_prefix:
+        # stays int64 (mmap'd, then the kept rows only); strings are made batch by batch in the workers
+        from ingest import read_work
+        ingested = read_work(work_prefix)
+        print(f"Work file: {len(ingested):,} ingested numbers from {work_prefix}.i64")
+        all_phones, sources = ingested.without(checked | set(failed))
+        print(f"Already checked: {len(checked):,} | Dead-lettered: {len(failed):,} | Left: {len(all_phones):,}")
+    else:
+        all_phones = read_input_phones() or []
+        skip = checked | set(failed)
+        all_phones = [p for p in all_phones if p not in skip]
+        print(f"Already checked: {len(checked):,} | Dead-lettered: {len(failed):,} | Left: {len(all_phones):,}")
+
     if len(all_phones) == 0:
-        print("\n!!! NO VALID NUMBERS FOUND !!!")
-        return
+        print("\n!!! NO NUMBERS LEFT TO CHECK !!!")
+        return None
+
+    # Priority order from priority.json (no rules → input order), dealt out round-robin
+    # so every account starts on the highest-scored numbers at the same time
+    work = PriorityWorkQueue()
+    work.extend(all_phones, source=dead_letter.path.name if retry_failed else INPUT_EXCEL.name, sources=sources)
+    del all_phones, sources
+    if work.scorer.active:
+        print("Priority rules active → highest-scored numbers are checked first")
+    ordered = work.drain_numbers()
+    print(f"\nHanding out work to {n_workers} workers (~{-(-len(ordered) // n_workers):,} numbers each)\n")
+    return ordered
 
-    n_workers = len(ACCOUNTS)
+
+def main(retry_failed: bool = False, coordinator_target: Optional[str] = None,
+         work_prefix: Optional[str] = None):
+    print("\n" + "═"*70)
+    print(f"   Telegram Bulk Checker  —  Batch size auto-tuned (starts at {BATCH_SIZE})")
+    print("═"*70 + "\n")
+
+    accounts = load_accounts()
+    if accounts:
+        print(f"Accounts: {len(accounts)} verified sessions from {SESSION_MANIFEST}")
+    else:
+        print(f"No verified sessions in {SESSION_MANIFEST} → using FALLBACK_ACCOUNTS (run start.py to create it)")
+        accounts = FALLBACK_ACCOUNTS
+
+    n_workers = len(accounts)
     if n_workers == 0:
         print("ERROR: No accounts defined")
         return
 
-    chunk_size = max(1, (len(all_phones) + n_workers - 1) // n_workers)
-    chunks = [all_phones[i:i + chunk_size] for i in range(0, len(all_phones), chunk_size)]
-
-    print(f"\nLaunching {n_workers} workers (~{chunk_size:,} numbers each)\n")
-
-    processes = []
-    for idx, (acc, chunk) in enumerate(zip(ACCOUNTS, chunks), 1):
-        if not chunk:
-            print(f"Worker {idx} → no numbers")
-            continue
-        p = mp.Process(target=worker, args=(acc, chunk, idx))
-        processes.append(p)
+    # Workers start (spawn + imports + connect + authorize) while the input is read below;
+    # every account gets one, ones without a chunk still take handed-over batches
+    handoff = HandoffQueue(n_workers)
+    stop = mp.Event()       # Ctrl+C → workers drain instead of being killed
+    os.environ["CHANGEFEED_RUN"] = RUN_ID      # all workers report changes under one run
+    processes, senders = [], []
+    for idx, acc in enumerate(accounts, 1):
+        recv_end, send_end = mp.Pipe(duplex=False)
+        p = mp.Process(target=worker, args=(acc, recv_end, idx, handoff, coordinator_target, stop))
         p.start()
+        recv_end.close()    # only the child reads; a dead child then fails send() instead of hanging it
+        processes.append(p)
+        senders.append(send_end)
 
+    # Workers get (file, length, start, step) of one shared int64 work list, not a pickled chunk
+    shared = None
+    specs = [None] * n_workers
     try:
-        for p in processes:
-            p.join()
+        if coordinator_target:
+            # The coordinator owns the work list; workers only lease from it
+            print(f"Coordinator mode → workers lease batches from {coordinator_target}")
+            specs = [("", 0, 0, 1)] * n_workers
+        else:
+            ordered = split_work(retry_failed, n_workers, work_prefix)
+            if ordered is not None:
+                shared = SharedWorkList(ordered)
+                del ordered
+                specs = [shared.slice_spec(i, n_workers) for i in range(n_workers)]
     except KeyboardInterrupt:
-        print("\nInterrupted → terminating workers...")
-        for p in processes:
-            p.terminate()
+        print("\nInterrupted while reading the input → stopping workers")
+        stop.set()
+        specs = [None] * n_workers
+    finally:
+        for idx, (conn, spec) in enumerate(zip(senders, specs), 1):
+            if shared is not None and idx > shared.length:
+                print(f"Worker {idx} → no numbers of its own")
+            try:
+                conn.send(spec)
+            except (BrokenPipeError, OSError):
+                print(f"Worker {idx} exited early (see its log) → its numbers stay unchecked this run")
+            conn.close()
+
+    try:
+        join_workers(processes, stop)
+    finally:
+        if shared is not None:
+            shared.close()
+
+    if specs[0] is None or stop.is_set():
+        return
+
+    if retry_failed:
+        print(f"Dead-letter resolved: {DeadLetterStore().resolve(load_checked()):,}")
 
     print("\n" + "═"*70)
     print("Finished.")
     print(f"YES results → folder: {OUTPUT_BASE}")
+    if coordinator_target:
+        try:
+            print(f"Coordinator → {open_coordinator(coordinator_target).stats()}")
+        except Exception as e:
+            print(f"Coordinator stats unavailable: {e}")
     print("═"*70)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-account Telegram bulk checker")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--retry-failed", action="store_true",
+                      help="re-check only the numbers in the dead-letter store")
+    mode.add_argument("--coordinator", metavar="URL_OR_DB",
+                      help="lease batches from coordinator.py (http://host:port, or its SQLite file on a shared disk)")
+    parser.add_argument("--work", metavar="PREFIX",
+                        help="check an ingested work file (ingest.py output) instead of INPUT_EXCEL")
+    args = parser.parse_args()
+
     mp.set_start_method("spawn", force=True)
-    main()
\ No newline at end of file
+    start_sampling()
+    main(retry_failed=args.retry_failed, coordinator_target=args.coordinator, work_prefix=args.work)
+    finish_profile("multiple_acc")   # the parent's own split (input reading, merge); workers log theirs
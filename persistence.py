@@ -0,0 +1,275 @@
+# persistence.py
+# Off-loop persistence for the bulk checkers.
+#
+# The batch loop hands each finished batch to ResultWriter and goes straight on
+# to the next ImportContacts request. A dedicated thread group-commits several
+# batches per flush: checkpoint rows are appended to the CSV (no more read +
+# concat + rewrite of the whole file) and the YES workbook is rewritten once per
+# group. The queue is bounded — when disk falls behind, put() waits (without
+# blocking the event loop) — and close() drains, flushes and fsyncs everything.
+# Files that are rewritten (the workbook, a migrated checkpoint) go through a temp
+# file + rename, and a checkpoint row torn by a kill is cut off before the next
+# append, so a crash never costs more than the rows being written.
+# After each group the answers also go to changefeed.ChangeFeed (versioned YES
+# records + changes.jsonl), unless CHANGEFEED=0.
+
+import os
+import csv
+import queue
+import asyncio
+import logging
+import threading
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from batch_result import BatchResult, STATUSES
+from changefeed import ChangeFeed, CHANGEFEED
+from profiling import stage as timed
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+QUEUE_BATCHES   = 64        # batches waiting for disk before put() applies backpressure
+GROUP_BATCHES   = 8         # at most this many batches per flush
+GROUP_SECONDS   = 2.0       # ... collected for at most this long
+
+
+def fsync_path(path: Path):
+    if path.is_file():
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+
+
+def repair_tail(path: Path) -> int:
+    """ Cuts an unterminated last line (a row torn by a kill); returns the bytes removed """
+    if not path.is_file() or path.stat().st_size == 0:
+        return 0
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return 0
+        size = f.seek(0, os.SEEK_END)
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            nl = f.read(step).rfind(b"\n")
+            if nl >= 0:
+                pos = pos - step + nl + 1
+                break
+            pos -= step
+        f.truncate(pos)
+        return size - pos
+
+
+def replace_atomic(path: Path, write):
+    """ write(tmp_path), fsync, then rename over `path` — readers see the old or the new file, never half """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp)
+        fsync_path(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def read_checkpoint(path: Path):
+    """ A checkpoint CSV as str DataFrame; malformed or torn rows are skipped, not fatal """
+    import pandas as pd
+    df = pd.read_csv(path, dtype=str, on_bad_lines="skip")
+    if "status" in df.columns:
+        df = df[df["status"].isin(STATUSES)]
+    return df
+
+
+class ResultWriter:
+    def __init__(self, checkpoint_csv: Path, yes_excel: Path, fields: List[str],
+                 logger: Optional[logging.Logger] = None,
+                 max_queue: int = QUEUE_BATCHES,
+                 group_batches: int = GROUP_BATCHES,
+                 group_seconds: float = GROUP_SECONDS,
+                 feed: bool = CHANGEFEED):
+        self.checkpoint_csv = Path(checkpoint_csv)
+        self.yes_excel = Path(yes_excel)
+        self.fields = list(fields)
+        self.logger = logger or logging.getLogger(__name__)
+        self.group_batches = group_batches
+        self.group_seconds = group_seconds
+        self.feed: Optional[ChangeFeed] = None     # opened on the writer thread (SQLite connections stay on theirs)
+        self._feed_enabled = feed
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._prepare_checkpoint()
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    # ── producer side (event loop) ────────────────
+    async def put(self, checked: List[Dict], yes: List[Dict], extra: Optional[Dict] = None):
+        """ Queues one batch; waits only when the queue is full (backpressure) """
+        if not checked and not yes:
+            return
+        item = (checked, yes, extra or {})
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._queue.put, item)
+
+    async def put_batch(self, result: BatchResult, extra: Optional[Dict] = None):
+        """ Queues a columnar batch as it is — no per-record dicts on the event loop """
+        if not len(result):
+            return
+        if extra:
+            result.extra.update(extra)
+        try:
+            self._queue.put_nowait(result)
+        except queue.Full:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._queue.put, result)
+
+    def close(self):
+        """ Drains the queue, writes the last group and fsyncs both files (blocking) """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        fsync_path(self.checkpoint_csv)
+        fsync_path(self.yes_excel)
+
+    async def aclose(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    # ── writer thread ─────────────────────────────
+    def _run(self):
+        if self._feed_enabled:
+            try:
+                self.feed = ChangeFeed()
+            except Exception as e:
+                self.logger.error(f"Change feed unavailable: {type(e).__name__} → {e}")
+        try:
+            self._drain()
+        finally:
+            if self.feed is not None:
+                self.feed.close()
+
+    def _drain(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            group = [item]
+            deadline = time.monotonic() + self.group_seconds
+            while len(group) < self.group_batches:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+            self._flush(group)
+
+    def _flush(self, group: List):
+        checked, yes, batches = [], [], []
+        for item in group:
+            if isinstance(item, BatchResult):
+                batches.append(item)
+                continue
+            batch_checked, batch_yes, extra = item
+            for record in batch_checked:
+                checked.append({**record, **extra})
+            yes.extend(batch_yes)
+        n_checked = len(checked) + sum(len(b) for b in batches)
+        n_yes = len(yes) + sum(b.yes_count for b in batches)
+        try:
+            with timed("checkpoint_write"):
+                self._append_checkpoint(checked, batches)
+        except Exception as e:
+            self.logger.error(f"Checkpoint write failed ({n_checked} rows): {type(e).__name__} → {e}")
+        try:
+            with timed("yes_workbook_write"):
+                self._merge_yes(yes, batches)
+        except Exception as e:
+            self.logger.error(f"YES output write failed ({n_yes} rows): {type(e).__name__} → {e}")
+        if self.feed is not None:
+            try:
+                with timed("change_feed"):
+                    counts = self.feed.record(checked, batches)
+                if any(counts.values()):
+                    self.logger.info(f"Change feed: +{counts['added']} added | {counts['changed']} changed | "
+                                     f"-{counts['removed']} removed → {self.feed.feed_path}")
+            except Exception as e:
+                self.logger.error(f"Change feed update failed: {type(e).__name__} → {e}")
+
+    def _prepare_checkpoint(self):
+        """ Makes sure the CSV header covers self.fields so rows can simply be appended """
+        if not self.checkpoint_csv.is_file():
+            return
+        torn = repair_tail(self.checkpoint_csv)
+        if torn:
+            self.logger.warning(f"{self.checkpoint_csv}: cut {torn} bytes of a row torn by an earlier crash")
+        with open(self.checkpoint_csv, "r", encoding="utf-8", newline="") as f:
+            header = next(csv.reader(f), [])
+        missing = [c for c in self.fields if c not in header]
+        if header and not missing:
+            self.fields = header
+            return
+        # one-off migration of an older checkpoint layout
+        import pandas as pd
+        df = pd.read_csv(self.checkpoint_csv, dtype=str)
+        self.fields = list(df.columns) + [c for c in self.fields if c not in df.columns]
+        df = df.reindex(columns=self.fields)
+        replace_atomic(self.checkpoint_csv, lambda tmp: df.to_csv(tmp, index=False, encoding="utf-8"))
+
+    def _append_checkpoint(self, rows: List[Dict], batches: List[BatchResult] = ()):
+        if not rows and not batches:
+            return
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_file = not self.checkpoint_csv.is_file()
+        with open(self.checkpoint_csv, "a", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=self.fields, extrasaction="ignore", restval="")
+            if new_file:
+                w.writeheader()
+            for row in rows:
+                if not row.get("checked_at"):
+                    row = {**row, "checked_at": now}
+                w.writerow(row)
+            for batch in batches:
+                w.writer.writerows(batch.rows(self.fields))   # columns → tuples, in header order
+            f.flush()
+
+    def _merge_yes(self, rows: List[Dict], batches: List[BatchResult] = ()):
+        batches = [b for b in batches if b.yes]
+        if not rows and not batches:
+            return
+        import pandas as pd   # lazy: first import happens on the writer thread, not at startup
+        frames = [pd.DataFrame(rows)] if rows else []
+        if batches:
+            # one frame for the whole group, straight from the YES rows' columns
+            fields = [f for f in self.fields if f not in ("error",) and not f.startswith("batch_end")]
+            columns = {f: [] for f in fields}
+            for batch in batches:
+                for f, values in batch.columns(fields, batch.yes).items():
+                    columns[f].extend(values)
+            frames.append(pd.DataFrame(columns))
+        df_new = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if self.yes_excel.is_file():
+            try:
+                df_old = pd.read_excel(self.yes_excel, dtype={"access_hash": str})   # int64 kept exact
+                df = pd.concat([df_old, df_new], ignore_index=True)
+                df = df.drop_duplicates(subset=['phone'], keep='last')
+            except Exception:
+                df = df_new
+        else:
+            df = df_new
+        replace_atomic(self.yes_excel, lambda tmp: df.to_excel(tmp, index=False, engine='openpyxl'))
+        self.logger.info(f"Appended {len(df_new)} new YES → total in output: {len(df)}")
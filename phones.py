@@ -0,0 +1,33 @@
+# phones.py
+# Raw spreadsheet / text cell → normalized Bangladeshi number (880XXXXXXXXXX).
+#
+# Shared by multiple_acc.py, mcheck.py and ingest.py. Kept free of telethon and
+# pandas so ingest.py's pool workers can import it without loading the checkers.
+
+import math
+from typing import Optional
+
+
+def normalize_phone(raw: any) -> Optional[str]:
+    if raw is None or (isinstance(raw, float) and math.isnan(raw)):
+        return None
+    if isinstance(raw, float) and raw.is_integer():
+        digits = str(int(raw))
+    else:
+        digits = str(raw).strip()
+    digits = ''.join(c for c in digits if c.isdigit())
+    if not digits or len(digits) < 10:
+        return None
+    if digits.startswith('880') and len(digits) == 13:
+        return digits
+    if digits.startswith('880') and len(digits) == 14 and digits.endswith('0'):
+        return digits[:-1]
+    if digits.startswith('88') and len(digits) == 12:
+        return '880' + digits[2:]
+    if digits.startswith('0') and len(digits) == 11:
+        return '880' + digits[1:]
+    if len(digits) == 10:
+        return '880' + digits
+    if len(digits) == 11 and digits[0] in '13456789':
+        return '880' + digits
+    return None
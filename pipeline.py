@@ -0,0 +1,278 @@
+# pipeline.py
+# Stage engine shared by the checkers.
+#
+# A checker is a chain of stages — source → (normalizer) → dispatcher →
+# (enricher) → sink — connected by bounded asyncio queues. A full queue makes
+# the stage before it wait (backpressure), so a slow sink throttles the reader
+# instead of growing memory. Every stage may run several workers and counts
+# items in/out, busy time, time stalled on a full downstream queue, time idle on
+# an empty upstream queue and the deepest its input queue got; Pipeline logs a
+# line per stage every METRICS_EVERY seconds and at the end.
+#
+# The ImportContacts round trip (import → match answers → delete contacts)
+# lives here too, so every bulk checker sends, parses and cleans up batches the
+# same way; batch_result.BatchResult turns its answers into records.
+#
+# The bulk checkers' sources emit whole scheduler.PendingBatch items: batch
+# sizes come from autotune.BatchTuner and retries / handed-over batches / leases
+# are picked there, one batch at a time. The dispatcher sends it and applies the
+# retry policy, the enricher adds totals, log lines and checkpoint fields, and
+# the sink hands it to persistence.ResultWriter.
+#
+#   pipe = Pipeline("acc1", logger)
+#   pipe.source("batches", next_batches)            # async fn(emit)
+#   pipe.stage("dispatcher", send_batch)            # async fn(item, emit)
+#   pipe.stage("enricher", enrich)
+#   pipe.stage("sink", persist)
+#   await pipe.run()
+
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from telethon.tl.functions.contacts import ImportContactsRequest, DeleteContactsRequest
+from telethon.tl.types import InputPhoneContact
+
+from profiling import stage as timed
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+QUEUE_SIZE     = 64         # items waiting between two stages before the upstream one blocks
+METRICS_EVERY  = 60.0       # seconds between metric lines while running (0 = only at the end)
+
+Emit = Callable[[Any], Awaitable[None]]
+_END = object()             # end-of-stream marker, one per downstream worker
+
+
+class StopPipeline(Exception):
+    """ Raised by a stage to abort the whole run (e.g. the session is not authorized);
+        run() re-raises its cause. Any other stage error only drops that item. """
+
+
+class StageMetrics:
+    __slots__ = ("name", "workers", "items_in", "items_out", "errors",
+                 "busy", "stalled", "idle", "max_depth")
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items_in = self.items_out = self.errors = self.max_depth = 0
+        self.busy = self.stalled = self.idle = 0.0
+
+    def as_dict(self) -> Dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def line(self, elapsed: float) -> str:
+        rate = self.items_out / elapsed if elapsed > 0 else 0.0
+        return (f"{self.name:<12} x{self.workers:<3} in {self.items_in:>9,} | out {self.items_out:>9,} "
+                f"({rate:8.1f}/s) | busy {self.busy:8.1f}s | stalled {self.stalled:7.1f}s | "
+                f"idle {self.idle:8.1f}s | max queue {self.max_depth:>4} | errors {self.errors}")
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable, workers: int = 1,
+                 flush: Optional[Callable[[Emit], Awaitable[None]]] = None,
+                 queue_size: int = QUEUE_SIZE, source: bool = False):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers) if not source else 1
+        self.flush = flush
+        self.queue_size = queue_size
+        self.source = source
+        self.metrics = StageMetrics(name, self.workers)
+
+
+def from_iterable(items: Iterable, blocking: bool = False) -> Callable[[Emit], Awaitable[None]]:
+    """ Source over an iterable; blocking=True pulls each item in the executor (stdin, files) """
+    async def source(emit: Emit):
+        it = iter(items)
+        if not blocking:
+            for item in it:
+                await emit(item)
+            return
+        loop = asyncio.get_running_loop()
+        while (item := await loop.run_in_executor(None, next, it, _END)) is not _END:
+            await emit(item)
+    return source
+
+
+class Pipeline:
+    def __init__(self, name: str, logger: Optional[logging.Logger] = None,
+                 queue_size: int = QUEUE_SIZE, metrics_every: float = METRICS_EVERY):
+        self.name = name
+        self.logger = logger or logging.getLogger(__name__)
+        self.queue_size = queue_size
+        self.metrics_every = metrics_every
+        self.stages: List[Stage] = []
+        self.started = 0.0
+
+    # ── building ──────────────────────────────────
+    def source(self, name: str, fn: Callable[[Emit], Awaitable[None]]) -> "Pipeline":
+        """ fn(emit) produces the stream; exactly one source, first """
+        if self.stages:
+            raise ValueError("the source must be the first stage")
+        self.stages.append(Stage(name, fn, source=True))
+        return self
+
+    def stage(self, name: str, fn: Callable[[Any, Emit], Awaitable[None]], workers: int = 1,
+              flush: Optional[Callable[[Emit], Awaitable[None]]] = None,
+              queue_size: Optional[int] = None) -> "Pipeline":
+        """ fn(item, emit) may emit zero, one or many items downstream; `workers` run it concurrently """
+        if not self.stages:
+            raise ValueError("add a source first")
+        self.stages.append(Stage(name, fn, workers, flush, queue_size or self.queue_size))
+        return self
+
+    # ── running ───────────────────────────────────
+    def _emitter(self, stage: Stage, outbox: Optional[asyncio.Queue]) -> Tuple[Emit, List[float]]:
+        """ emit() for one worker, plus that worker's own stall counter (busy time excludes it) """
+        m = stage.metrics
+        stalls = [0.0]
+
+        async def emit(item):
+            m.items_out += 1
+            if outbox is None:
+                return
+            if outbox.full():
+                t = time.monotonic()
+                await outbox.put(item)
+                waited = time.monotonic() - t
+                m.stalled += waited
+                stalls[0] += waited
+            else:
+                outbox.put_nowait(item)
+        return emit, stalls
+
+    async def _worker(self, stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        m = stage.metrics
+        emit, stalls = self._emitter(stage, outbox)
+        while True:
+            t = time.monotonic()
+            item = await inbox.get()
+            m.idle += time.monotonic() - t
+            if item is _END:
+                return
+            m.items_in += 1
+            m.max_depth = max(m.max_depth, inbox.qsize() + 1)
+            t, stalled = time.monotonic(), stalls[0]
+            try:
+                await stage.fn(item, emit)
+            except (asyncio.CancelledError, StopPipeline):
+                raise
+            except Exception as e:
+                m.errors += 1
+                self.logger.error(f"[{self.name}/{stage.name}] {type(e).__name__} → {e}")
+            m.busy += time.monotonic() - t - (stalls[0] - stalled)
+
+    async def _run_stage(self, stage: Stage, inbox: Optional[asyncio.Queue],
+                         outbox: Optional[asyncio.Queue], downstream_workers: int):
+        if stage.source:
+            emit, stalls = self._emitter(stage, outbox)
+            t = time.monotonic()
+            await stage.fn(emit)
+            stage.metrics.busy += time.monotonic() - t - stalls[0]
+        else:
+            await asyncio.gather(*(self._worker(stage, inbox, outbox) for _ in range(stage.workers)))
+        if stage.flush is not None:
+            await stage.flush(self._emitter(stage, outbox)[0])
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(_END)
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.metrics_every)
+            self.log_metrics()
+
+    async def run(self) -> Dict[str, StageMetrics]:
+        """ Runs every stage until the source is exhausted and the sink has drained """
+        if not self.stages:
+            raise ValueError("empty pipeline")
+        queues = [asyncio.Queue(maxsize=s.queue_size) for s in self.stages[1:]]
+        self.started = time.monotonic()
+        tasks = []
+        for i, stage in enumerate(self.stages):
+            inbox = queues[i - 1] if i > 0 else None
+            outbox = queues[i] if i < len(queues) else None
+            downstream = self.stages[i + 1].workers if outbox is not None else 0
+            tasks.append(asyncio.create_task(self._run_stage(stage, inbox, outbox, downstream),
+                                             name=f"{self.name}/{stage.name}"))
+        reporter = asyncio.create_task(self._report_loop()) if self.metrics_every else None
+        try:
+            await asyncio.gather(*tasks)
+        except StopPipeline as e:
+            raise (e.__cause__ or e)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if reporter is not None:
+                reporter.cancel()
+            await asyncio.gather(*tasks, *([reporter] if reporter else []), return_exceptions=True)
+            self.log_metrics(final=True)
+        return self.metrics()
+
+    # ── reporting ─────────────────────────────────
+    def metrics(self) -> Dict[str, StageMetrics]:
+        return {s.name: s.metrics for s in self.stages}
+
+    def log_metrics(self, final: bool = False):
+        elapsed = time.monotonic() - self.started
+        self.logger.info(f"[{self.name}] stage metrics {'(final) ' if final else ''}after {elapsed:.0f}s:")
+        for stage in self.stages:
+            self.logger.info(f"  {stage.metrics.line(elapsed)}")
+
+
+# ────────────────────────────────────────────────
+#            IMPORTCONTACTS ROUND TRIP
+# ────────────────────────────────────────────────
+
+def phone_contacts(phones: List[str], start_index: int) -> List[InputPhoneContact]:
+    """ One contact per number; client_id = start_index + position (matched back in import_batch) """
+    return [
+        InputPhoneContact(
+            client_id = start_index + j,
+            phone     = f"+{phone}",
+            first_name= "Chk",
+            last_name = str(start_index + j)
+        )
+        for j, phone in enumerate(phones)
+    ]
+
+
+async def import_batch(client, phones: List[str], start_index: int,
+                       logger: Optional[logging.Logger] = None) -> Tuple[List[Tuple[str, Any]], List[str]]:
+    """
+    One ImportContacts attempt followed by the contact cleanup. FloodWaitError and
+    other request errors propagate to the caller's retry policy.
+    → ([(phone, user or None)] for every answered number, deferred phones).
+    Answers are matched by client_id, which also finds users whose phone number is
+    hidden; numbers Telegram put in retry_contacts have no answer yet (deferred).
+    """
+    if not phones:
+        return [], []
+    async with timed("import_contacts"):
+        result = await client(ImportContactsRequest(phone_contacts(phones, start_index)))
+
+    users = {u.id: u for u in result.users}
+    by_client_id = {c.client_id: users.get(c.user_id) for c in result.imported}
+    by_phone = {u.phone.lstrip("+"): u for u in result.users if u.phone}
+    retry_ids = set(result.retry_contacts)
+
+    answers, deferred = [], []
+    for j, phone in enumerate(phones):
+        client_id = start_index + j
+        if client_id in retry_ids:
+            deferred.append(phone)
+        else:
+            answers.append((phone, by_client_id.get(client_id) or by_phone.get(phone)))
+
+    # Cleanup (critical!) — imported contacts must not pile up on the account
+    if result.users:
+        try:
+            async with timed("delete_contacts"):
+                await client(DeleteContactsRequest([u.id for u in result.users]))
+        except Exception as e:
+            (logger or logging.getLogger(__name__)).warning(f"Delete failed: {e}")
+    return answers, deferred
@@ -0,0 +1,110 @@
+# prefilter.py
+# Table-driven validity pre-filter for normalized phone numbers.
+#
+# Every number that cannot be a real mobile number (wrong length for its country,
+# operator digits that are not a mobile prefix) is rejected here with a reason and
+# recorded in REJECTED_CSV, instead of taking a slot in a rate-limited
+# ImportContacts batch. Countries missing from NUMBERING_PLAN pass through
+# unless strict=True.
+
+import io
+import csv
+import json
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+REJECTED_CSV = Path("rejected_numbers.csv")
+
+# country code → national number lengths and mobile (operator) prefixes
+NUMBERING_PLAN: Dict[str, Dict] = {
+    "880": {                                  # Bangladesh: +880 1X XXXX XXXX
+        "lengths":  [10],
+        "prefixes": {
+            "13": "Grameenphone", "17": "Grameenphone",
+            "14": "Banglalink",   "19": "Banglalink",
+            "15": "Teletalk",
+            "16": "Airtel",
+            "18": "Robi",
+        },
+    },
+}
+
+
+class _CountryRule:
+    __slots__ = ("code", "lengths", "prefix_len", "prefixes")
+
+    def __init__(self, code: str, plan: Dict):
+        self.code = code
+        self.lengths: FrozenSet[int] = frozenset(plan["lengths"])
+        self.prefixes: FrozenSet[str] = frozenset(plan["prefixes"])
+        self.prefix_len = len(next(iter(self.prefixes))) if self.prefixes else 0
+
+
+def compile_plan(plan: Dict[str, Dict]) -> Dict[str, _CountryRule]:
+    return {code: _CountryRule(code, rules) for code, rules in plan.items()}
+
+
+_RULES = compile_plan(NUMBERING_PLAN)
+PLAN_KEY = json.dumps(NUMBERING_PLAN, sort_keys=True)      # part of input_cache tags
+_CODE_LENGTHS = sorted({len(c) for c in _RULES}, reverse=True)
+
+
+def reject_reason(phone: str, strict: bool = False) -> Optional[str]:
+    """ None if `phone` (digits, country code first) may be a mobile number, else why not """
+    phone = phone.lstrip("+")
+    if not phone.isdigit():
+        return "not all digits"
+
+    rule = None
+    for n in _CODE_LENGTHS:
+        rule = _RULES.get(phone[:n])
+        if rule is not None:
+            break
+    if rule is None:
+        return "unknown country code" if strict else None
+
+    national = phone[len(rule.code):]
+    if len(national) not in rule.lengths:
+        return f"bad length {len(national)} for +{rule.code} (expected {'/'.join(map(str, sorted(rule.lengths)))})"
+    if rule.prefixes and national[:rule.prefix_len] not in rule.prefixes:
+        return f"not a mobile prefix: +{rule.code} {national[:rule.prefix_len]}"
+    return None
+
+
+def split_valid(phones: Iterable[str], strict: bool = False) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """ → (phones worth sending, [(phone, reason), ...]) in input order """
+    valid, rejected = [], []
+    for phone in phones:
+        reason = reject_reason(phone, strict)
+        if reason is None:
+            valid.append(phone)
+        else:
+            rejected.append((phone, reason))
+    return valid, rejected
+
+
+def record_rejections(rejected: List[Tuple[str, str]], source: str, path: Path = REJECTED_CSV) -> int:
+    """ Appends rejections not recorded before; returns how many were new """
+    if not rejected:
+        return 0
+    known = set()
+    if path.is_file():
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            known = {row["phone"] for row in csv.DictReader(f)}
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    new_rows = [[p, reason, source, now] for p, reason in rejected if p not in known]
+    if not new_rows:
+        return 0
+
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    if not path.is_file():
+        w.writerow(["phone", "reason", "source", "rejected_at"])
+    w.writerows(new_rows)
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        f.write(buf.getvalue())
+    return len(new_rows)
@@ -0,0 +1,169 @@
+# priority.py
+# Priority-ordered work queue for the bulk checkers.
+#
+# Numbers are scored with the rules in PRIORITY_FILE and handed out highest score
+# first; equal scores keep input order, so with no rules file the order (and the
+# throughput) is exactly what it was before. Example priority.json:
+#
+#   {
+#     "prefixes":      {"88017": 10, "88013": 10, "88019": 4},
+#     "sources":       {"gp_numbers_state_telegram_checked.xlsx": 5},
+#     "known_files":   ["ai_numbers_telegram_checked.xlsx"],
+#     "unknown_bonus": 3,
+#     "recent_rows":   5000,
+#     "recent_bonus":  2
+#   }
+#
+#   prefixes      – score added when the normalized number starts with the prefix
+#                   (longest matching prefix wins)
+#   sources       – score added for numbers coming from that input file / sheet
+#   known_files   – earlier result files; numbers NOT found in them get unknown_bonus
+#   recent_rows   – the last N numbers of an input (what is left of it after resume)
+#                   are treated as recent additions
+
+import json
+import heapq
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+PRIORITY_FILE = Path("priority.json")
+
+
+def load_rules(path: Path = PRIORITY_FILE) -> Dict:
+    if not path.is_file():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_known_phones(files: Iterable[str]) -> Set[str]:
+    """ Phone column of earlier result files (xlsx/csv/json), as digit strings """
+    known: Set[str] = set()
+    paths = [Path(name) for name in files if Path(name).is_file()]
+    if not paths:
+        return known
+    import pandas as pd   # lazy: only when priority.json lists known_files
+    for path in paths:
+        try:
+            if path.suffix == ".csv":
+                df = pd.read_csv(path, dtype=str)
+            elif path.suffix == ".json":
+                with open(path, "r", encoding="utf-8") as f:
+                    df = pd.DataFrame({"phone": list(json.load(f))})
+            else:
+                df = pd.read_excel(path, dtype=str)
+        except Exception:
+            continue
+        column = next((c for c in df.columns if str(c).lower() == "phone"), None)
+        if column is not None:
+            known.update(
+                "".join(ch for ch in str(v) if ch.isdigit())
+                for v in df[column].dropna()
+            )
+    return known
+
+
+class PriorityScorer:
+    def __init__(self, rules: Optional[Dict] = None):
+        rules = load_rules() if rules is None else rules
+        self.prefixes: Dict[str, float] = rules.get("prefixes", {})
+        self.sources: Dict[str, float] = rules.get("sources", {})
+        self.unknown_bonus: float = rules.get("unknown_bonus", 0)
+        self.recent_rows: int = rules.get("recent_rows", 0)
+        self.recent_bonus: float = rules.get("recent_bonus", 0)
+        self.known = read_known_phones(rules.get("known_files", [])) if self.unknown_bonus else set()
+        # prefix lengths tried longest first, so a lookup is a few dict hits per number
+        self._prefix_lengths = sorted({len(p) for p in self.prefixes}, reverse=True)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.prefixes or self.sources or self.unknown_bonus or
+                    (self.recent_rows and self.recent_bonus))
+
+    def score(self, phone: str, source: str = "", row: int = 0, total_rows: int = 0) -> float:
+        score = 0.0
+        for length in self._prefix_lengths:
+            bonus = self.prefixes.get(phone[:length])
+            if bonus is not None:
+                score += bonus
+                break
+        score += self.sources.get(source, 0)
+        if self.unknown_bonus and phone not in self.known:
+            score += self.unknown_bonus
+        if self.recent_rows and total_rows and row >= total_rows - self.recent_rows:
+            score += self.recent_bonus
+        return score
+
+
+def int64_array(phones: Sequence) -> array:
+    """ Numbers as a compact array("q"); int64 buffers (numpy arrays, array("q")) are copied as bytes """
+    try:
+        view = memoryview(phones)
+    except TypeError:
+        return array("q", map(int, phones))
+    if view.itemsize != 8 or view.format not in ("q", "l", "<q", "<l", "=q", "=l"):
+        return array("q", map(int, phones))
+    numbers = array("q")
+    numbers.frombytes(view.cast("B"))
+    return numbers
+
+
+class PriorityWorkQueue:
+    """
+    Max-score-first queue of phone numbers; ties come out in push order.
+
+    Without active rules every score is equal, so the queue is plain input order:
+    numbers are then kept as int64 (8 bytes each) and turned back into digit
+    strings only when they are taken.
+    """
+
+    def __init__(self, scorer: Optional[PriorityScorer] = None):
+        self.scorer = scorer or PriorityScorer()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+        self._fifo = array("q")     # input order, used while no rule is active
+        self._pos = 0
+
+    def push(self, phone: str, source: str = "", row: int = 0, total_rows: int = 0):
+        if not self.scorer.active:
+            self._fifo.append(int(phone))
+            return
+        score = self.scorer.score(phone, source, row, total_rows)
+        heapq.heappush(self._heap, (-score, self._seq, phone))
+        self._seq += 1
+
+    def extend(self, phones: Sequence, source: str = "", sources: Optional[Sequence[str]] = None):
+        """ Pushes a whole input in row order (row position feeds the recent_rows rule).
+            `phones` may be digit strings or int64 numbers (ingested work files);
+            `sources` gives each number its own source """
+        if not self.scorer.active:
+            self._fifo.extend(int64_array(phones))
+            return
+        total = len(phones)
+        for row, phone in enumerate(phones):
+            self.push(str(phone), sources[row] if sources is not None else source, row, total)
+
+    def take(self, n: int) -> List[str]:
+        if not self.scorer.active:
+            chunk = self._fifo[self._pos : self._pos + n]
+            self._pos += len(chunk)
+            return [str(x) for x in chunk]
+        n = min(n, len(self._heap))
+        return [heapq.heappop(self._heap)[2] for _ in range(n)]
+
+    def drain(self) -> List[str]:
+        return self.take(len(self))
+
+    def drain_numbers(self) -> array:
+        """ Everything left, in order, as array("q") — no per-number strings in input order """
+        if not self.scorer.active:
+            rest, self._fifo, self._pos = self._fifo[self._pos:], array("q"), 0
+            return rest
+        return array("q", (int(heapq.heappop(self._heap)[2]) for _ in range(len(self._heap))))
+
+    def __len__(self) -> int:
+        return len(self._heap) + len(self._fifo) - self._pos
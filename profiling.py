@@ -0,0 +1,213 @@
+# profiling.py
+# Where a run's time goes: stage timers, an opt-in stack sampler and a summary.
+#
+# The checkers wrap their expensive steps in `with stage("..."):` (or `async
+# with` around an await). The steps are input parsing, normalization, the
+# ImportContacts round trip, DeleteContacts, checkpoint and workbook writes, and
+# sleeps. Each stage adds up calls, wall time and thread CPU time. CPU time
+# around an await also counts whatever other tasks ran on the loop meanwhile.
+# Wall time includes the network RTT. report() logs the split at the end of a
+# run, with the share of the run's wall time per stage. Stages on concurrent
+# tasks or threads overlap, so their shares can add up to more than 100%.
+#
+# PROFILE_SAMPLE=<ms> also starts a wall-clock stack sampler in every process.
+# Each interval it records the stack of every thread, waits included. At the end
+# it writes profiles/<name>-<pid>.folded, with one "frame;frame;... count" line
+# per stack. flamegraph.pl, speedscope and inferno read this format directly.
+# A <name>-<pid>.summary.json file with the stage split is written next to it.
+#
+#   PROFILE_SAMPLE=5 python multiple_acc.py
+#   flamegraph.pl profiles/acc_1-12345.folded > acc_1.svg
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+PROFILE_SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE", 0))    # sampler interval in ms (0 = off)
+PROFILE_DIR       = Path(os.getenv("PROFILE_DIR", "profiles"))
+MAX_DEPTH         = 128         # frames kept per sampled stack (innermost ones)
+
+
+class StageTimes:
+    __slots__ = ("calls", "wall", "cpu", "max_wall")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = self.cpu = self.max_wall = 0.0
+
+
+class _Timer:
+    """ One timed stage; usable as `with` and as `async with` """
+    __slots__ = ("profiler", "name", "t0", "c0")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        self.c0 = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.t0, time.thread_time() - self.c0)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc):
+        return self.__exit__(*exc)
+
+
+class Profiler:
+    def __init__(self):
+        self._stages: Dict[str, StageTimes] = {}
+        self._lock = threading.Lock()       # ResultWriter's thread records too
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    def stage(self, name: str) -> _Timer:
+        return _Timer(self, name)
+
+    def add(self, name: str, wall: float, cpu: float = 0.0):
+        with self._lock:
+            s = self._stages.get(name)
+            if s is None:
+                s = self._stages[name] = StageTimes()
+            s.calls += 1
+            s.wall += wall
+            s.cpu += cpu
+            if wall > s.max_wall:
+                s.max_wall = wall
+
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            stages = sorted(self._stages.items(), key=lambda kv: kv[1].wall, reverse=True)
+            rows = [{"stage": name, "calls": s.calls, "wall": round(s.wall, 4), "cpu": round(s.cpu, 4),
+                     "share": round(s.wall / elapsed, 4) if elapsed > 0 else 0.0,
+                     "avg_ms": round(s.wall / s.calls * 1e3, 3), "max_ms": round(s.max_wall * 1e3, 3)}
+                    for name, s in stages]
+        return {"elapsed": round(elapsed, 3), "process_cpu": round(time.process_time() - self.cpu_started, 3),
+                "stages": rows}
+
+    def report(self, logger: Optional[logging.Logger] = None, title: str = "") -> Dict:
+        """ Logs (or, without a logger, prints) the time split of the run so far; returns summary() """
+        log = logger.info if logger else print
+        summary = self.summary()
+        timed = sum(r["wall"] for r in summary["stages"])
+        log(f"Time split{f' [{title}]' if title else ''}: {summary['elapsed']:.1f}s wall | "
+            f"{summary['process_cpu']:.1f}s CPU")
+        log(f"  {'stage':<20} | {'calls':>8} | {'wall s':>9} | {'share':>6} | {'avg ms':>9} | "
+            f"{'max ms':>9} | {'cpu s':>8}")
+        for r in summary["stages"]:
+            log(f"  {r['stage']:<20} | {r['calls']:>8,} | {r['wall']:>9.2f} | {r['share']:>6.1%} | "
+                f"{r['avg_ms']:>9.1f} | {r['max_ms']:>9.1f} | {r['cpu']:>8.2f}")
+        if summary["elapsed"] > timed:
+            log(f"  {'(outside stages)':<20} | {'':>8} | {summary['elapsed'] - timed:>9.2f} | "
+                f"{(summary['elapsed'] - timed) / summary['elapsed']:>6.1%} |")
+        return summary
+
+
+# the process-wide profiler every module records into
+PROFILER = Profiler()
+
+
+def stage(name: str) -> _Timer:
+    return PROFILER.stage(name)
+
+
+# ────────────────────────────────────────────────
+#                 STACK SAMPLER
+# ────────────────────────────────────────────────
+
+class StackSampler:
+    """ Wall-clock sampler of every thread's Python stack → collapsed stacks for flame graphs """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        names: Dict[int, str] = {}
+        labels: Dict = {}               # code object → "func (file:line)"
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if any(ident not in names for ident in frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                stack: List[str] = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+_sampler: Optional[StackSampler] = None
+
+
+def start_sampling(interval_ms: float = PROFILE_SAMPLE_MS) -> Optional[StackSampler]:
+    """ Starts the process's sampler if PROFILE_SAMPLE is set (no-op otherwise or if running) """
+    global _sampler
+    if interval_ms <= 0 or _sampler is not None:
+        return _sampler
+    _sampler = StackSampler(interval_ms / 1e3).start()
+    return _sampler
+
+
+def finish(name: str, logger: Optional[logging.Logger] = None) -> Dict:
+    """ End of a run: logs the time split; with the sampler on, writes the .folded + summary files """
+    global _sampler
+    log = logger.info if logger else print
+    summary = PROFILER.report(logger, name)
+    if _sampler is not None:
+        _sampler.stop()
+        stem = f"{name}-{os.getpid()}"
+        folded = _sampler.write(PROFILE_DIR / f"{stem}.folded")
+        with open(PROFILE_DIR / f"{stem}.summary.json", "w", encoding="utf-8") as f:
+            json.dump({**summary, "samples": _sampler.samples, "interval_ms": _sampler.interval * 1e3}, f, indent=2)
+        log(f"Profile: {_sampler.samples:,} samples → {folded} (flamegraph.pl / speedscope)")
+        _sampler = None
+    return summary
@@ -0,0 +1,280 @@
+# reverify.py
+# Refreshes known YES accounts without spending ImportContacts quota.
+#
+# The checkers store every hit's telegram_id together with its access_hash and
+# the session that found it (an access_hash is only valid for that account).
+# This tool groups the YES rows by session and asks users.GetUsers for up to
+# GET_USERS_CHUNK users per call. Username, first and last name are updated in
+# place, and four columns are added or updated:
+#   account_state  active / deleted / unavailable (the hash no longer resolves)
+#   last_seen      the user's status, as far as their privacy settings allow
+#   status_type    online / offline / recently / last_week / last_month / hidden
+#   reverified_at  when the row was last refreshed
+# Rows from before access_hash was stored have to be checked again by phone,
+# so they are counted and left alone. Workbooks are rewritten through a temp
+# file + rename; run this while no checker is writing to the same file.
+#
+#   python reverify.py                               # every YES workbook
+#   python reverify.py checked_results/yes_acc3.xlsx --chunk 50
+
+import argparse
+import asyncio
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from telethon import TelegramClient, errors
+from telethon.tl import types
+from telethon.tl.functions.users import GetUsersRequest
+
+from sessions import API_ID, API_HASH, load_accounts, open_session
+from scheduler import FLOOD_PADDING
+from logsetup import setup_logging
+from persistence import replace_atomic
+from shutdown import Drain, install_sigint
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+YES_GLOBS = [
+    "ai_numbers_telegram_checked.xlsx",     # check_excel_numbers.py
+    "checked_results/yes_acc*.xlsx",        # multiple_acc.py / mcheck.py
+]
+GET_USERS_CHUNK = 100           # InputUsers per users.GetUsers call
+CALL_PAUSE      = 1.0           # seconds between two calls on the same session
+
+STATE_FIELDS = ["account_state", "last_seen", "status_type", "reverified_at"]
+
+logger = setup_logging("reverify", "reverify.log")
+
+Ref = Tuple[int, int]           # (telegram_id, access_hash)
+
+
+# ────────────────────────────────────────────────
+#                     HELPERS
+# ────────────────────────────────────────────────
+
+def as_int(value) -> Optional[int]:
+    """ telegram_id / access_hash cell → int (Excel hands back int, float or str) """
+    if value is None or value != value or value == "":     # None, NaN, empty
+        return None
+    try:
+        return int(value) if not isinstance(value, str) else int(value.strip())
+    except ValueError:
+        return None
+
+
+def last_seen(status) -> Tuple[str, str]:
+    """ → (last_seen, status_type); same status types as tgphonedetail.py """
+    if isinstance(status, types.UserStatusOnline):
+        return "online now", "online"
+    if isinstance(status, types.UserStatusOffline):
+        return status.was_online.strftime("%Y-%m-%d %H:%M:%S UTC"), "offline"
+    if isinstance(status, types.UserStatusRecently):
+        return "recently", "recently"
+    if isinstance(status, types.UserStatusLastWeek):
+        return "within a week", "last_week"
+    if isinstance(status, types.UserStatusLastMonth):
+        return "within a month", "last_month"
+    return "", "hidden"
+
+
+def credentials(session: str) -> Tuple[int, str]:
+    """ api_id / api_hash the session was registered with (sessions.json), else the .env pair.
+        multiple_acc.py and mcheck.py take their sessions from sessions.json (their FALLBACK_ACCOUNTS
+        use the .env pair too). check_excel_numbers.py's session is not in the manifest: set
+        API_ID / API_HASH in .env, its built-in defaults are not known here """
+    for account in load_accounts():
+        if account["session"] == session:
+            return account["api_id"], account["api_hash"]
+    return API_ID, API_HASH
+
+
+# ────────────────────────────────────────────────
+#                  GETUSERS ROUNDS
+# ────────────────────────────────────────────────
+
+async def get_users(client, refs: List[Ref], drain: Drain) -> Optional[Dict[int, Any]]:
+    """
+    One users.GetUsers round for `refs` → {telegram_id: User or UserEmpty}; None if
+    a stop was requested while waiting out a FloodWait. When Telegram rejects the
+    whole call (one stale hash can do that) the refs are split until the bad ones
+    are isolated; those are missing from the answer.
+    """
+    while True:
+        try:
+            users = await client(GetUsersRequest([types.InputUser(uid, h) for uid, h in refs]))
+            return {u.id: u for u in users}
+        except errors.FloodWaitError as e:
+            logger.warning(f"FloodWait {e.seconds}s on GetUsers → waiting")
+            if not await drain.sleep(e.seconds + FLOOD_PADDING):
+                return None
+        except errors.RPCError as e:
+            if len(refs) == 1:
+                logger.info(f"User {refs[0][0]} does not resolve: {e}")
+                return {}
+            mid = len(refs) // 2
+            found = {}
+            for part in (refs[:mid], refs[mid:]):
+                answer = await get_users(client, part, drain)
+                if answer is None:
+                    return None
+                found.update(answer)
+            return found
+
+
+async def refresh_session(session: str, refs: List[Ref], chunk: int,
+                          drain: Drain) -> Dict[int, Any]:
+    """ → {telegram_id: User or None} for every ref that got an answer (None = unavailable) """
+    api_id, api_hash = credentials(session)
+    client = TelegramClient(open_session(session), api_id, api_hash)
+    answers: Dict[int, Any] = {}
+    try:
+        await client.connect()
+        if not await client.is_user_authorized():
+            logger.error(f"[{session}] not authorized → {len(refs)} users skipped (log in with start.py)")
+            return answers
+        for i in range(0, len(refs), chunk):
+            if drain.stopping:
+                break
+            part = refs[i : i + chunk]
+            found = await get_users(client, part, drain)
+            if found is None:
+                break
+            for uid, _ in part:
+                user = found.get(uid)
+                answers[uid] = user if isinstance(user, types.User) else None
+            logger.info(f"[{session}] {min(i + chunk, len(refs)):,}/{len(refs):,} users refreshed")
+            await drain.sleep(CALL_PAUSE)
+    except Exception as e:
+        logger.error(f"[{session}] stopped: {type(e).__name__} → {e}")
+    finally:
+        await client.disconnect()
+    return answers
+
+
+# ────────────────────────────────────────────────
+#                  WORKBOOK UPDATE
+# ────────────────────────────────────────────────
+
+def row_refs(df) -> List[Tuple[int, str, int, int]]:
+    """ (row position, session, telegram_id, access_hash) of every row that can be refreshed """
+    if not {"session", "telegram_id", "access_hash"} <= set(df.columns):
+        return []
+    out = []
+    for pos, (session, uid, h) in enumerate(zip(df["session"], df["telegram_id"], df["access_hash"])):
+        uid, h = as_int(uid), as_int(h)
+        if uid is not None and h is not None and isinstance(session, str) and session:
+            out.append((pos, session, uid, h))
+    return out
+
+
+def apply_answers(df, refs, answers: Dict[Tuple[str, int], Any], stamp: str) -> Dict[str, int]:
+    """ Writes the refreshed fields into `df` in place; returns change counts """
+    counts = {"refreshed": 0, "username": 0, "name": 0, "deleted": 0, "unavailable": 0}
+    for column in ("username", "first_name", "last_name", "access_hash", *STATE_FIELDS):
+        if column not in df.columns:
+            df[column] = ""
+        df[column] = df[column].astype(object)
+    col = {c: df.columns.get_loc(c) for c in df.columns}
+
+    for pos, session, uid, _ in refs:
+        if (session, uid) not in answers:
+            continue                        # not asked (stop, session not authorized)
+        user = answers[(session, uid)]
+        counts["refreshed"] += 1
+        df.iat[pos, col["reverified_at"]] = stamp
+        if user is None:
+            df.iat[pos, col["account_state"]] = "unavailable"
+            counts["unavailable"] += 1
+            continue
+        if user.deleted:
+            df.iat[pos, col["account_state"]] = "deleted"
+            counts["deleted"] += 1
+            continue
+        df.iat[pos, col["account_state"]] = "active"
+        df.iat[pos, col["last_seen"]], df.iat[pos, col["status_type"]] = last_seen(user.status)
+        new = {"username": user.username or "", "first_name": user.first_name or "",
+               "last_name": user.last_name or ""}
+        old = {k: df.iat[pos, col[k]] for k in new}
+        old = {k: "" if v is None or v != v else str(v) for k, v in old.items()}
+        if new["username"] != old["username"]:
+            counts["username"] += 1
+        if (new["first_name"], new["last_name"]) != (old["first_name"], old["last_name"]):
+            counts["name"] += 1
+        for k, v in new.items():
+            df.iat[pos, col[k]] = v
+        if user.access_hash is not None:
+            df.iat[pos, col["access_hash"]] = str(user.access_hash)
+    return counts
+
+
+async def reverify(paths: List[Path], chunk: int = GET_USERS_CHUNK) -> Dict[str, Dict[str, int]]:
+    import pandas as pd   # lazy: only needed once there is something to refresh
+
+    books = {}
+    for path in paths:
+        try:
+            books[path] = pd.read_excel(path, dtype={"access_hash": str})   # not via float
+        except Exception as e:
+            logger.error(f"Cannot read {path}: {e}")
+    refs = {path: row_refs(df) for path, df in books.items()}
+    for path, df in books.items():
+        if len(df) > len(refs[path]):
+            logger.info(f"{path}: {len(df) - len(refs[path]):,} of {len(df):,} rows have no access_hash "
+                        f"(found before it was stored) → skipped")
+
+    by_session: Dict[str, Dict[int, int]] = {}
+    for rows in refs.values():
+        for _, session, uid, h in rows:
+            by_session.setdefault(session, {})[uid] = h
+    if not by_session:
+        logger.info("Nothing to re-verify")
+        return {}
+    logger.info(f"Re-verifying {sum(len(v) for v in by_session.values()):,} users "
+                f"over {len(by_session)} session(s), {chunk} per GetUsers call")
+
+    stop = threading.Event()
+    install_sigint(stop, logger)    # Ctrl+C → finish the current call, write what was refreshed
+    drain = Drain(stop)
+    sessions = list(by_session)
+    results = await asyncio.gather(*(refresh_session(s, list(by_session[s].items()), chunk, drain)
+                                     for s in sessions))
+    answers = {(s, uid): user for s, found in zip(sessions, results) for uid, user in found.items()}
+
+    stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    report = {}
+    for path, df in books.items():
+        counts = apply_answers(df, refs[path], answers, stamp)
+        report[str(path)] = counts
+        if counts["refreshed"]:
+            replace_atomic(path, lambda tmp: df.to_excel(tmp, index=False, engine="openpyxl"))
+        logger.info(f"{path}: {counts['refreshed']:,} refreshed | new username {counts['username']:,} | "
+                    f"name changed {counts['name']:,} | deleted {counts['deleted']:,} | "
+                    f"unavailable {counts['unavailable']:,}")
+    return report
+
+
+def default_paths() -> List[Path]:
+    out = []
+    for pattern in YES_GLOBS:
+        out.extend(p for p in sorted(Path(".").glob(pattern)) if p.is_file())
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh known YES accounts via users.GetUsers (no ImportContacts)")
+    parser.add_argument("paths", nargs="*", help=f"YES workbooks (default: {', '.join(YES_GLOBS)})")
+    parser.add_argument("--chunk", type=int, default=GET_USERS_CHUNK, help="users per GetUsers call")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.paths] or default_paths()
+    if not paths:
+        print("No YES workbooks found")
+        return
+    asyncio.run(reverify(paths, max(1, args.chunk)))
+
+
+if __name__ == "__main__":
+    main()
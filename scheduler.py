@@ -0,0 +1,128 @@
+# scheduler.py
+# Flood-wait aware batch scheduling shared by the bulk checkers.
+#
+# A FloodWaitError no longer makes the batch loop sleep with the batch in hand:
+# the account is parked until its "available-at" time, the batch goes to a retry
+# queue (or, across worker processes, to the HandoffQueue so another account can
+# take it straight away) and after MAX_ATTEMPTS it is reported as explicitly failed.
+
+import time
+import queue
+import multiprocessing as mp
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+MAX_ATTEMPTS   = 4      # attempts per batch before its numbers are marked FAILED
+FLOOD_PADDING  = 15     # extra seconds on top of every FloodWait
+DEFER_DELAY    = 60     # back-off for contacts Telegram returned in retry_contacts
+
+
+@dataclass
+class PendingBatch:
+    phones: List[str]
+    start_index: int            # index of phones[0] in the caller's work list (-1 = handed over)
+    attempts: int = 0
+    last_error: str = ""
+    not_before: float = 0.0     # monotonic time before which the batch must not be retried
+    origin: Any = None          # account that first took the batch
+    lease: Optional[str] = None # coordinator lease the numbers belong to (coordinator.py)
+
+
+def deferred_part(batch: PendingBatch, phones: List[str]) -> PendingBatch:
+    """ Batch with the numbers Telegram deferred (ImportedContacts.retry_contacts); attempts carry over """
+    return PendingBatch(list(phones), batch.start_index, batch.attempts, batch.last_error,
+                        origin=batch.origin, lease=batch.lease)
+
+
+class FloodScheduler:
+    """ Per-process bookkeeping of account availability and batches waiting for a retry """
+
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.available_at: Dict[Any, float] = {}
+        self.retry: Deque[PendingBatch] = deque()
+
+    # ── accounts ──────────────────────────────────
+    def park(self, account: Any, seconds: float) -> float:
+        """ Marks the account unusable for `seconds`; returns its available-at (monotonic) """
+        until = time.monotonic() + max(0.0, seconds)
+        self.available_at[account] = max(self.available_at.get(account, 0.0), until)
+        return self.available_at[account]
+
+    def wait_time(self, account: Any) -> float:
+        return max(0.0, self.available_at.get(account, 0.0) - time.monotonic())
+
+    # ── batches ───────────────────────────────────
+    def requeue(self, batch: PendingBatch, error: str, delay: float = 0.0) -> bool:
+        """ Counts a failed attempt. False → attempts exhausted, caller must record it as FAILED """
+        batch.attempts += 1
+        batch.last_error = error
+        if batch.attempts >= self.max_attempts:
+            return False
+        batch.not_before = time.monotonic() + delay
+        self.retry.append(batch)
+        return True
+
+    def next_retry(self) -> Optional[PendingBatch]:
+        """ Oldest retry batch whose back-off has expired, or None """
+        now = time.monotonic()
+        for _ in range(len(self.retry)):
+            batch = self.retry.popleft()
+            if batch.not_before <= now:
+                return batch
+            self.retry.append(batch)
+        return None
+
+    def retry_wait(self) -> float:
+        """ Seconds until the earliest retry batch becomes eligible (0 if none queued) """
+        if not self.retry:
+            return 0.0
+        return max(0.0, min(b.not_before for b in self.retry) - time.monotonic())
+
+    @property
+    def pending(self) -> int:
+        return len(self.retry)
+
+
+class HandoffQueue:
+    """
+    Cross-process retry queue for multiple_acc.py.
+
+    A worker whose account gets flood-waited puts the batch here so any account that
+    is free picks it up immediately. Workers keep polling until every worker has
+    finished its own chunk and no handed-over batch is outstanding.
+    """
+
+    def __init__(self, n_workers: int):
+        self._queue = mp.Queue()
+        self._pending = mp.Value("i", 0)
+        self._active = mp.Value("i", n_workers)
+
+    def put(self, batch: PendingBatch):
+        with self._pending.get_lock():
+            self._pending.value += 1
+        self._queue.put(batch)
+
+    def get(self) -> Optional[PendingBatch]:
+        """ Non-blocking; None when nothing is waiting """
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def task_done(self):
+        """ A batch taken with get() was checked, handed over again or recorded as FAILED """
+        with self._pending.get_lock():
+            self._pending.value -= 1
+
+    def worker_finished(self):
+        """ Called once per worker when its own chunk and local retries are exhausted """
+        with self._active.get_lock():
+            self._active.value -= 1
+
+    def drained(self) -> bool:
+        return self._active.value <= 0 and self._pending.value <= 0
@@ -0,0 +1,147 @@
+import os
+import json
+from collections import OrderedDict
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Optional
+from dotenv import load_dotenv
+from telethon.sessions import MemorySession, SQLiteSession
+load_dotenv()
+
+# sessions.py
+# Session manifest shared by start.py (writes it) and the bulk checkers (read it),
+# plus the light session mode the checkers open their .session files with.
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+SESSION_MANIFEST = Path("sessions.json")
+
+API_ID   = int(os.getenv("API_ID", 0))
+API_HASH = os.getenv("API_HASH", "")
+
+# "light" → auth from the .session file, entities only in memory (LightSession)
+# "sqlite" → Telethon's default SQLiteSession (every imported user written to disk)
+SESSION_MODE       = os.getenv("SESSION_MODE", "light")
+ENTITY_CACHE_SIZE  = int(os.getenv("ENTITY_CACHE_SIZE", 5000))   # 0 = no entity cache at all
+
+
+# ────────────────────────────────────────────────
+#                  MANIFEST I/O
+# ────────────────────────────────────────────────
+
+def read_manifest(path: Path = SESSION_MANIFEST) -> List[Dict]:
+    """ Returns every manifest entry (verified or not), [] if there is no manifest """
+    if not path.is_file():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("accounts", [])
+
+
+def write_manifest(entries: List[Dict], path: Path = SESSION_MANIFEST):
+    """ Merges entries into the manifest by session name and rewrites it atomically.
+        A session keeps its id (checkpoint_acc<id>.csv, logs); new sessions get max(id) + 1 """
+    merged = {e["session"]: e for e in read_manifest(path)}
+    ids = {name: e["id"] for name, e in merged.items() if isinstance(e.get("id"), int)}
+    for e in entries:
+        merged[e["session"]] = e
+
+    next_id = max(ids.values(), default=0) + 1
+    for name in sorted(merged):
+        if name in ids:
+            merged[name]["id"] = ids[name]
+        else:
+            merged[name]["id"] = next_id
+            next_id += 1
+    accounts = sorted(merged.values(), key=lambda e: e["id"])
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                   "accounts": accounts}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_accounts(path: Path = SESSION_MANIFEST) -> List[Dict]:
+    """ Verified accounts in the shape the checkers expect: id / api_id / api_hash / session """
+    accounts = []
+    for e in read_manifest(path):
+        if e.get("status") != "ok":
+            continue
+        accounts.append({
+            "id":       e["id"],
+            "api_id":   int(e.get("api_id") or API_ID),
+            "api_hash": e.get("api_hash") or API_HASH,
+            "session":  e["session"],
+        })
+    return accounts
+
+
+
+# ────────────────────────────────────────────────
+#                 LIGHT SESSIONS
+# ────────────────────────────────────────────────
+
+class LightSession(MemorySession):
+    """
+    Reads dc + auth key from an existing <name>.session, keeps entities in a
+    bounded in-memory LRU and writes back only the auth data (when it changes).
+
+    ImportContacts answers therefore never touch SQLite. The cache only has to
+    hold the users of the batch in flight (DeleteContacts resolves them from it).
+    """
+
+    def __init__(self, name: str, max_entities: int = ENTITY_CACHE_SIZE):
+        super().__init__()
+        self.filename = name if name.endswith(".session") else name + ".session"
+        self.max_entities = max_entities
+        self._recent: "OrderedDict[int, tuple]" = OrderedDict()    # id → entity row, oldest first
+
+        if os.path.isfile(self.filename):
+            disk = SQLiteSession(self.filename)
+            try:
+                if disk.auth_key is not None:
+                    super().set_dc(disk.dc_id, disk.server_address, disk.port)
+                    self._auth_key = disk.auth_key
+                    self._takeout_id = disk.takeout_id
+            finally:
+                disk.close()
+        self._saved = self._auth_state()
+
+    def _auth_state(self) -> tuple:
+        key = self._auth_key.key if self._auth_key else None
+        return self._dc_id, self._server_address, self._port, key, self._takeout_id
+
+    def process_entities(self, tlo):
+        if self.max_entities <= 0:
+            return
+        for row in self._entities_to_rows(tlo):
+            old = self._recent.pop(row[0], None)
+            if old is not None:
+                self._entities.discard(old)
+            self._recent[row[0]] = row
+            self._entities.add(row)
+        while len(self._recent) > self.max_entities:
+            _, row = self._recent.popitem(last=False)
+            self._entities.discard(row)
+
+    def save(self):
+        """ Writes dc / auth key / takeout id to the .session file, and nothing else """
+        state = self._auth_state()
+        if state == self._saved or self._auth_key is None:
+            return
+        disk = SQLiteSession(self.filename)
+        try:
+            disk.set_dc(self._dc_id, self._server_address, self._port)
+            disk.auth_key = self._auth_key
+            disk.takeout_id = self._takeout_id
+            disk.save()
+        finally:
+            disk.close()
+        self._saved = state
+
+
+def open_session(name: str, mode: str = SESSION_MODE):
+    """ What the checkers pass to TelegramClient instead of the bare session name """
+    return LightSession(name) if mode == "light" else name
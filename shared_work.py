@@ -0,0 +1,72 @@
+# shared_work.py
+# Zero-copy work list for multiple_acc.py's spawned workers.
+#
+# main() writes the ordered numbers once as a flat int64 file and every worker
+# memory-maps it read-only. All processes share the same page-cache pages: a
+# worker only receives (path, length, start, step) through its pipe and turns
+# one batch at a time back into digit strings, so its memory no longer grows
+# with the input size.
+
+import os
+import mmap
+from array import array
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+WORK_DIR = Path(".input_cache")
+
+SliceSpec = Tuple[str, int, int, int]     # (path, length, start, step) — what goes through the pipe
+
+
+class SharedWorkList:
+    """ Parent side: owns the int64 file and removes it in close() """
+
+    def __init__(self, phones: Iterable[str], directory: Path = WORK_DIR):
+        directory.mkdir(exist_ok=True)
+        self.path = directory / f"work_{os.getpid()}.i64"
+        if isinstance(phones, array) and phones.typecode == "q":
+            numbers = phones        # PriorityWorkQueue.drain_numbers(): already int64
+        else:
+            numbers = array("q", map(int, phones))
+        with open(self.path, "wb") as f:
+            numbers.tofile(f)
+        self.length = len(numbers)
+
+    def slice_spec(self, worker_index: int, n_workers: int) -> SliceSpec:
+        """ Round-robin share of worker `worker_index` (0-based): every n_workers-th number """
+        return str(self.path), self.length, worker_index, n_workers
+
+    def close(self):
+        self.path.unlink(missing_ok=True)
+
+
+class WorkSlice:
+    """ Worker side: read-only strided view start::step over the shared file """
+
+    def __init__(self, path: str, length: int, start: int, step: int):
+        self._indices = range(start, length, step)
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        if length:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap).cast("q")
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def take(self, pos: int, n: int) -> List[str]:
+        """ Numbers pos .. pos+n-1 of this slice as digit strings """
+        idx = self._indices[pos : pos + n]
+        if not idx:
+            return []
+        return [str(x) for x in self._view[idx.start : idx.stop : idx.step].tolist()]
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._mmap.close()
+            self._view = self._mmap = None
@@ -0,0 +1,127 @@
+# shutdown.py
+# Coordinated Ctrl+C for the checkers: drain instead of kill.
+#
+# The first Ctrl+C only sets a stop flag. Batch loops stop taking new batches;
+# the batch already in flight may finish within DRAIN_DEADLINE seconds.
+# Otherwise it is cancelled and its numbers are removed from the account's
+# contacts by phone (DeleteByPhones), because the imported user ids were never
+# seen. The result writers then flush and fsync, and the process exits with the
+# checkpoint as its resume point. A second Ctrl+C falls back to the usual
+# KeyboardInterrupt.
+#
+# multiple_acc.py and mcheck.py share one multiprocessing.Event between the
+# parent and its workers. The workers ignore SIGINT, so only the parent sees
+# Ctrl+C; join_workers() sets the event and terminates whatever is still
+# running after the deadline.
+
+import os
+import time
+import signal
+import asyncio
+import logging
+from typing import Awaitable, List, Optional
+
+from telethon.tl.functions.contacts import DeleteByPhonesRequest
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+DRAIN_DEADLINE = float(os.getenv("DRAIN_DEADLINE", 60))    # seconds in-flight work gets after Ctrl+C
+EXIT_GRACE     = 20.0       # extra seconds for flush + disconnect before the parent terminates a worker
+POLL_SECONDS   = 0.5        # how often async waits look at the stop flag
+
+
+class Abandoned(Exception):
+    """ In-flight work was cancelled because the drain deadline passed """
+
+
+def ignore_sigint():
+    """ For spawned workers: Ctrl+C is the parent's business """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def install_sigint(stop, logger: Optional[logging.Logger] = None):
+    """ First Ctrl+C → stop.set() (drain); the second one raises KeyboardInterrupt as usual """
+    def handler(signum, frame):
+        stop.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        message = f"Ctrl+C → finishing in-flight work (up to {DRAIN_DEADLINE:.0f}s); press again to force quit"
+        if logger:
+            logger.warning(message)
+        else:
+            print(f"\n{message}")
+    signal.signal(signal.SIGINT, handler)
+
+
+class Drain:
+    """ Worker side of a coordinated stop; `stop` is any object with is_set() """
+
+    def __init__(self, stop, deadline: float = DRAIN_DEADLINE):
+        self.stop = stop
+        self.deadline = deadline
+
+    @property
+    def stopping(self) -> bool:
+        return self.stop.is_set()
+
+    async def sleep(self, seconds: float) -> bool:
+        """ asyncio.sleep that returns early (False) once a stop is requested """
+        loop = asyncio.get_running_loop()
+        until = loop.time() + seconds
+        while not self.stopping:
+            left = until - loop.time()
+            if left <= 0:
+                return True
+            await asyncio.sleep(min(POLL_SECONDS, left))
+        return False
+
+    async def run(self, work: Awaitable):
+        """ Awaits `work`; after a stop request it gets `deadline` more seconds, then → Abandoned """
+        task = asyncio.ensure_future(work)
+        while not task.done() and not self.stopping:
+            await asyncio.wait({task}, timeout=POLL_SECONDS)
+        if not task.done():
+            done, _ = await asyncio.wait({task}, timeout=self.deadline)
+            if not done:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise Abandoned(f"in-flight work cancelled after {self.deadline:.0f}s drain deadline")
+        return task.result()
+
+
+async def forget_contacts(client, phones, logger: Optional[logging.Logger] = None):
+    """ Cleanup for an abandoned import: delete whatever got imported, by phone number """
+    if not phones:
+        return
+    try:
+        await asyncio.wait_for(client(DeleteByPhonesRequest([f"+{p}" for p in phones])), timeout=15)
+    except Exception as e:
+        (logger or logging.getLogger(__name__)).warning(f"DeleteByPhones after abandoned batch failed: {e}")
+
+
+def join_workers(processes: List, stop):
+    """
+    Waits for the workers. The first Ctrl+C sets `stop`: every worker finishes (or
+    abandons) its in-flight batch, flushes its results and exits on its own. Workers
+    still alive after the drain deadline — or after a second Ctrl+C — are terminated.
+    """
+    try:
+        for p in processes:
+            p.join()
+        return
+    except KeyboardInterrupt:
+        stop.set()
+        print(f"\nCtrl+C → workers finish their in-flight batch (up to {DRAIN_DEADLINE:.0f}s), "
+              f"flush results and exit. Press Ctrl+C again to force quit.")
+    try:
+        deadline = time.monotonic() + DRAIN_DEADLINE + EXIT_GRACE
+        for p in processes:
+            p.join(max(0.0, deadline - time.monotonic()))
+    except KeyboardInterrupt:
+        print("Forced quit")
+    for idx, p in enumerate(processes, 1):
+        if p.is_alive():
+            print(f"Worker {idx} did not exit in time → terminating")
+            p.terminate()
+            p.join()
+    print("Stopped. Checkpoints hold every finished batch; the next run resumes from there.")
@@ -1,13 +1,131 @@
-from telethon.sync import TelegramClient
-
-api_id = 37597265
-api_hash = '650a8b45cb705150a2d3bb7f6cd41bee'
-session = 'checker_01'   # change this for each account
-# session = 'checker_01'   # change this for each account
-# session = 'checker_02'   # change this for each account
-# session = 'checker_03'   # change this for each account
-
-client = TelegramClient(session, api_id, api_hash)
-client.start()
-print("Done - session saved.")
-client.disconnect()
\ No newline at end of file
+# start.py
+# Bulk session bootstrap: logs in every account listed in ACCOUNTS_FILE concurrently,
+# verifies each session with get_me() and writes sessions.json for the checkers.
+#
+#   python start.py                      # all accounts in accounts.csv
+#   python start.py accounts.csv -c 4    # at most 4 logins in flight
+#   python start.py --only checker_07    # (re)bootstrap a single session
+#
+# accounts.csv columns: session,phone[,api_id,api_hash]  (api_* default to .env)
+
+import csv
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict
+from telethon import TelegramClient, errors
+
+from sessions import API_ID, API_HASH, SESSION_MANIFEST, write_manifest
+
+# ────────────────────────────────────────────────
+#                     CONFIG
+# ────────────────────────────────────────────────
+ACCOUNTS_FILE   = Path("accounts.csv")
+MAX_CONCURRENT  = 5
+
+# Only one login may talk to the terminal at a time, otherwise code prompts interleave
+prompt_lock = asyncio.Lock()
+
+
+def read_accounts_file(path: Path) -> List[Dict]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = [
+            {k.strip(): (v or "").strip() for k, v in row.items() if k}
+            for row in csv.DictReader(f)
+        ]
+    return [r for r in rows if r.get("session") and r.get("phone")]
+
+
+async def ask(question: str, secret: bool = False) -> str:
+    """ Reads one line from the terminal without blocking the other logins """
+    async with prompt_lock:
+        loop = asyncio.get_running_loop()
+        if secret:
+            import getpass
+            return await loop.run_in_executor(None, getpass.getpass, question)
+        return (await loop.run_in_executor(None, input, question)).strip()
+
+
+async def bootstrap_one(account: Dict, limiter: asyncio.Semaphore) -> Dict:
+    session = account["session"]
+    api_id = int(account.get("api_id") or API_ID)
+    api_hash = account.get("api_hash") or API_HASH
+
+    entry = {
+        "session": session,
+        "phone": account["phone"],
+        "status": "failed",
+        "verified_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    if account.get("api_id"):
+        entry["api_id"] = api_id
+    if account.get("api_hash"):
+        entry["api_hash"] = api_hash
+
+    async with limiter:
+        client = TelegramClient(session, api_id, api_hash)
+        try:
+            await client.start(
+                phone=account["phone"],
+                code_callback=lambda: ask(f"[{session}] code sent to {account['phone']}: "),
+                password=lambda: ask(f"[{session}] 2FA password: ", secret=True),
+            )
+            me = await client.get_me()
+            if me is None:
+                entry["error"] = "get_me() returned nothing"
+            else:
+                entry.update({
+                    "status": "ok",
+                    "user_id": me.id,
+                    "username": me.username or "",
+                })
+        except errors.FloodWaitError as e:
+            entry["error"] = f"FloodWait {e.seconds}s"
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if client.is_connected():
+                await client.disconnect()
+
+    mark = "OK  " if entry["status"] == "ok" else "FAIL"
+    print(f"{mark} → {session:<14} {account['phone']:<16} {entry.get('error', '@' + entry.get('username', ''))}")
+    return entry
+
+
+async def bootstrap(accounts: List[Dict], concurrency: int) -> List[Dict]:
+    limiter = asyncio.Semaphore(max(1, concurrency))
+    return await asyncio.gather(*(bootstrap_one(acc, limiter) for acc in accounts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log in and verify all checker sessions")
+    parser.add_argument("accounts", nargs="?", type=Path, default=ACCOUNTS_FILE,
+                        help=f"CSV with session,phone[,api_id,api_hash] (default: {ACCOUNTS_FILE})")
+    parser.add_argument("-c", "--concurrency", type=int, default=MAX_CONCURRENT,
+                        help="logins running at the same time")
+    parser.add_argument("--only", nargs="+", metavar="SESSION",
+                        help="bootstrap only these session names")
+    args = parser.parse_args()
+
+    if not args.accounts.is_file():
+        print(f"ERROR → accounts file not found: {args.accounts.absolute()}")
+        return
+
+    accounts = read_accounts_file(args.accounts)
+    if args.only:
+        accounts = [a for a in accounts if a["session"] in set(args.only)]
+    if not accounts:
+        print("ERROR: no accounts to bootstrap (need session and phone columns)")
+        return
+
+    print(f"Bootstrapping {len(accounts)} sessions ({args.concurrency} at a time)\n")
+    entries = asyncio.run(bootstrap(accounts, args.concurrency))
+    write_manifest(entries)
+
+    ok = sum(1 for e in entries if e["status"] == "ok")
+    print(f"\nDone - {ok}/{len(entries)} sessions verified → {SESSION_MANIFEST}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
+import argparse
 import asyncio
+import csv
 import json
-import logging
 import os
 import pickle
-from dataclasses import dataclass, asdict
+import sys
+from dataclasses import dataclass, asdict, fields
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from datetime import datetime
 import re
 from rich.console import Console
@@ -15,12 +17,14 @@ from telethon.sync import TelegramClient, errors
 from telethon.tl import types
 from telethon.tl.functions.contacts import ImportContactsRequest, DeleteContactsRequest
 from telethon.tl.functions.users import GetFullUserRequest
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment
+from logsetup import setup_logging, Every
+from prefilter import reject_reason, record_rejections
+from pipeline import Pipeline, StopPipeline, from_iterable
+from profiling import stage as timed, start_sampling, finish as finish_profile
+# pandas / openpyxl are imported where they are used: the headless mode and
+# the manual-input options never need them
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", handlers=[logging.FileHandler("telegram_checker.log"), logging.StreamHandler()])
-logger = logging.getLogger(__name__)
+logger = setup_logging(__name__, "telegram_checker.log", fmt="%(asctime)s - %(levelname)s - %(message)s")
 console = Console()
 CONFIG_FILE = Path("config.pkl")
 RESULTS_DIR = Path("results")
@@ -45,18 +49,20 @@ class TelegramUser:
     privacy_restricted: bool = False
 
     @classmethod
-    async def from_user(cls, client: TelegramClient, user: types.User, phone: str = "") -> 'TelegramUser':
+    async def from_user(cls, client: TelegramClient, user: types.User, phone: str = "", enrich: bool = True) -> 'TelegramUser':
         try:
             bio = ''
             common_chats_count = 0
             blocked = False
             
             try:
-                full_user = await client(GetFullUserRequest(user.id))
-                user_full_info = full_user.full_user
-                bio = getattr(user_full_info, 'about', '') or ''
-                common_chats_count = getattr(user_full_info, 'common_chats_count', 0)
-                blocked = getattr(user_full_info, 'blocked', False)
+                if enrich:
+                    async with timed("get_full_user"):
+                        full_user = await client(GetFullUserRequest(user.id))
+                    user_full_info = full_user.full_user
+                    bio = getattr(user_full_info, 'about', '') or ''
+                    common_chats_count = getattr(user_full_info, 'common_chats_count', 0)
+                    blocked = getattr(user_full_info, 'blocked', False)
             except:
                 pass
 
@@ -153,6 +159,10 @@ def validate_phone_number(phone: str) -> str:
     if not re.match(r'^\+\d{10,15}$', phone): raise ValueError(f"Invalid phone number format: {phone}")
     return phone
 
+def rejection_reason(phone: str) -> Optional[str]:
+    """Why the number can't be a mobile number (None = worth a Telegram lookup)."""
+    return reject_reason(validate_phone_number(phone))
+
 def validate_username(username: str) -> str:
     username = username.strip().lstrip('@')
     if not re.match(r'^[A-Za-z]\w{3,30}[A-Za-z0-9]$', username): raise ValueError(f"Invalid username format: {username}")
@@ -161,13 +171,15 @@ def validate_username(username: str) -> str:
 def read_excel_phones(file_path: str, phone_column: str = "phone") -> List[str]:
     """Read phone numbers from Excel file."""
     try:
+        import pandas as pd
         # Try to read Excel file
-        if file_path.endswith('.xlsx'):
-            df = pd.read_excel(file_path, engine='openpyxl')
-        elif file_path.endswith('.xls'):
-            df = pd.read_excel(file_path, engine='xlrd')
-        else:
-            raise ValueError("Unsupported file format. Use .xlsx or .xls")
+        with timed("excel_parse"):
+            if file_path.endswith('.xlsx'):
+                df = pd.read_excel(file_path, engine='openpyxl')
+            elif file_path.endswith('.xls'):
+                df = pd.read_excel(file_path, engine='xlrd')
+            else:
+                raise ValueError("Unsupported file format. Use .xlsx or .xls")
         
         # Check if the specified column exists
         if phone_column not in df.columns:
@@ -190,102 +202,178 @@ def read_excel_phones(file_path: str, phone_column: str = "phone") -> List[str]:
         except:
             raise ValueError(f"Could not read file: {file_path}")
 
-def save_to_excel(results: dict, filename: str):
-    """Save results to Excel file with formatting."""
-    data = []
-    
-    for identifier, result in results.items():
-        if "error" in result:
-            row = {
-                'Phone': identifier,
-                'Status': 'Error',
-                'Error': result['error'],
-                'Username': '',
-                'First Name': '',
-                'Last Name': '',
-                'Full Name': '',
-                'Premium': '',
-                'Verified': '',
-                'Bot': '',
-                'Last Seen': '',
-                'Last Seen Exact': '',
-                'Bio': '',
-                'Common Chats': '',
-                'Blocked': '',
-                'Fake': '',
-                'Privacy Restricted': ''
-            }
-        else:
-            full_name = f"{result.get('first_name', '')} {result.get('last_name', '')}".strip()
-            row = {
-                'Phone': identifier,
-                'Status': 'Found',
-                'Error': '',
-                'Username': f"@{result.get('username', '')}" if result.get('username') else '',
-                'First Name': result.get('first_name', ''),
-                'Last Name': result.get('last_name', ''),
-                'Full Name': full_name,
-                'Premium': 'Yes' if result.get('premium') else 'No',
-                'Verified': 'Yes' if result.get('verified') else 'No',
-                'Bot': 'Yes' if result.get('bot') else 'No',
-                'Last Seen': result.get('last_seen', ''),
-                'Last Seen Exact': result.get('last_seen_exact', ''),
-                'Bio': result.get('bio', ''),
-                'Common Chats': result.get('common_chats_count', 0),
-                'Blocked': 'Yes' if result.get('blocked') else 'No',
-                'Fake': 'Yes' if result.get('fake') else 'No',
-                'Privacy Restricted': 'Yes' if result.get('privacy_restricted') else 'No'
-            }
-        data.append(row)
-    
-    # Create DataFrame
-    df = pd.DataFrame(data)
-    
-    # Save to Excel with formatting
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Results')
-        
-        # Get workbook and worksheet for formatting
-        workbook = writer.book
-        worksheet = writer.sheets['Results']
-        
-        # Set column widths
-        column_widths = {
-            'A': 20, 'B': 10, 'C': 30, 'D': 20, 'E': 15, 
-            'F': 15, 'G': 20, 'H': 10, 'I': 10, 'J': 10,
-            'K': 25, 'L': 20, 'M': 40, 'N': 12, 'O': 10,
-            'P': 10, 'Q': 18
-        }
-        
-        for col, width in column_widths.items():
-            worksheet.column_dimensions[col].width = width
-        
-        # Apply formatting
+EXCEL_COLUMNS = [
+    'Phone', 'Status', 'Error', 'Username', 'First Name', 'Last Name', 'Full Name',
+    'Premium', 'Verified', 'Bot', 'Last Seen', 'Last Seen Exact', 'Bio',
+    'Common Chats', 'Blocked', 'Fake', 'Privacy Restricted'
+]
+EXCEL_COLUMN_WIDTHS = [20, 10, 30, 20, 15, 15, 20, 10, 10, 10, 25, 20, 40, 12, 10, 10, 18]
+
+def result_to_row(identifier: str, result: dict) -> list:
+    """One Excel row (in EXCEL_COLUMNS order) for a checked phone/username."""
+    if "error" in result:
+        return [identifier, 'Error', result['error']] + [''] * (len(EXCEL_COLUMNS) - 3)
+
+    yes_no = lambda key: 'Yes' if result.get(key) else 'No'
+    full_name = f"{result.get('first_name', '')} {result.get('last_name', '')}".strip()
+    return [
+        identifier,
+        'Found',
+        '',
+        f"@{result.get('username', '')}" if result.get('username') else '',
+        result.get('first_name', ''),
+        result.get('last_name', ''),
+        full_name,
+        yes_no('premium'),
+        yes_no('verified'),
+        yes_no('bot'),
+        result.get('last_seen', ''),
+        result.get('last_seen_exact', ''),
+        result.get('bio', ''),
+        result.get('common_chats_count', 0),
+        yes_no('blocked'),
+        yes_no('fake'),
+        yes_no('privacy_restricted'),
+    ]
+
+class ResultExcelWriter:
+    """Streaming (write-only) results workbook.
+
+    Rows go to disk as they are added, so memory stays flat however many results
+    there are. The Status colours come from two conditional-formatting rules
+    instead of styling every cell.
+    """
+
+    def __init__(self, filename):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import PatternFill, Font, Alignment
+        from openpyxl.utils import get_column_letter
+
+        self.filename = filename
+        self.rows = 0
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Results')
+
+        for idx, width in enumerate(EXCEL_COLUMN_WIDTHS, 1):
+            self.sheet.column_dimensions[get_column_letter(idx)].width = width
+
         header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
         header_font = Font(color="FFFFFF", bold=True)
-        
-        # Format header row
-        for cell in worksheet[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Format data rows
-        for row in range(2, len(df) + 2):
-            status_cell = worksheet[f'B{row}']
-            if status_cell.value == 'Found':
-                status_cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                status_cell.font = Font(color="006100")
-            elif status_cell.value == 'Error':
-                status_cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-                status_cell.font = Font(color="9C0006")
-    
+        header_alignment = Alignment(horizontal='center', vertical='center')
+        header = []
+        for title in EXCEL_COLUMNS:
+            cell = WriteOnlyCell(self.sheet, value=title)
+            cell.fill, cell.font, cell.alignment = header_fill, header_font, header_alignment
+            header.append(cell)
+        self.sheet.append(header)
+
+    def add(self, identifier: str, result: dict):
+        self.sheet.append(result_to_row(identifier, result))
+        self.rows += 1
+
+    def close(self):
+        from openpyxl.formatting.rule import CellIsRule
+        from openpyxl.styles import PatternFill, Font
+
+        status_range = f"B2:B{max(2, self.rows + 1)}"
+        self.sheet.conditional_formatting.add(status_range, CellIsRule(
+            operator='equal', formula=['"Found"'],
+            fill=PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
+            font=Font(color="006100")))
+        self.sheet.conditional_formatting.add(status_range, CellIsRule(
+            operator='equal', formula=['"Error"'],
+            fill=PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
+            font=Font(color="9C0006")))
+        self.workbook.save(self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def save_to_excel(results: Iterable[Tuple[str, dict]], filename: str):
+    """Save (identifier, result) pairs to Excel file with formatting, row by row."""
+    with timed("excel_write"), ResultExcelWriter(filename) as writer:
+        for identifier, result in results:
+            writer.add(identifier, result)
+
     console.print(f"[green]Results saved to Excel file: {filename}[/green]")
 
+def save_to_json(results: Iterable[Tuple[str, dict]], filename: str):
+    """Save (identifier, result) pairs as one JSON object, written entry by entry."""
+    with timed("json_write"), open(filename, 'w') as f:
+        f.write("{")
+        for n, (identifier, result) in enumerate(results):
+            entry = json.dumps(result, indent=2).replace("\n", "\n  ")
+            f.write(f"{',' if n else ''}\n  {json.dumps(identifier)}: {entry}")
+        f.write("\n}\n")
+
+    console.print(f"[green]Results saved to JSON: {filename}[/green]")
+
+class ResultStream:
+    """Append-only JSONL log with one line per identifier, written the moment it is checked.
+
+    A crash or Ctrl+C loses at most the number in flight, and opening the same
+    stream again lets a run skip everything that is already in it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done = {identifier for identifier, _ in self.records()}
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            self._file.write("\n")  # previous run died mid-line
+
+    @staticmethod
+    def for_input(file_path: str) -> Path:
+        return RESULTS_DIR / f"stream_{Path(file_path).stem}.jsonl"
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def records(self) -> Iterator[Tuple[str, dict]]:
+        """(identifier, result) for every complete line, read one line at a time."""
+        if not self.path.is_file():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # truncated tail of an interrupted run
+                yield record["id"], record["result"]
+
+    def write(self, identifier: str, result: dict):
+        record = {"id": identifier, "result": result, "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.done.add(identifier)
+
+    def close(self):
+        self._file.close()
+
+def open_stream(file_path: str) -> ResultStream:
+    """Stream for an input file; offers to resume when an earlier run left results in it."""
+    path = ResultStream.for_input(file_path)
+    if path.is_file() and path.stat().st_size > 0:
+        previous = ResultStream(path)
+        if Confirm.ask(f"Resume? {len(previous.done)} identifiers already checked in {path}", default=True):
+            return previous
+        previous.close()
+        archived = path.with_name(f"{path.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        path.rename(archived)
+        console.print(f"[yellow]Previous stream moved to {archived}[/yellow]")
+    return ResultStream(path)
+
 class TelegramChecker:
     def __init__(self):
         self.config = self.load_config()
         self.client = None
+        self.enrich = True  # GetFullUserRequest for bio / common chats / blocked
         RESULTS_DIR.mkdir(exist_ok=True)
 
     def load_config(self) -> dict:
@@ -300,7 +388,7 @@ class TelegramChecker:
     def save_config(self):
         with open(CONFIG_FILE, 'wb') as f: pickle.dump(self.config, f)
 
-    async def initialize(self):
+    async def initialize(self, interactive: bool = True):
         if not self.config.get('api_id'):
             console.print("[yellow]First time setup - please enter your Telegram API credentials[/yellow]")
             console.print("[cyan]You can get these from https://my.telegram.org/apps[/cyan]")
@@ -313,6 +401,8 @@ class TelegramChecker:
         await self.client.connect()
         
         if not await self.client.is_user_authorized():
+            if not interactive:
+                raise RuntimeError("Session is not authorized - run tgphonedetail.py once without arguments to log in")
             await self.client.send_code_request(self.config['phone'])
             code = Prompt.ask("Enter the verification code sent to your Telegram")
             try:
@@ -325,20 +415,24 @@ class TelegramChecker:
         try:
             phone = validate_phone_number(phone)
             try:
-                user = await self.client.get_entity(phone)
-                telegram_user = await TelegramUser.from_user(self.client, user, phone)
+                async with timed("resolve_entity"):
+                    user = await self.client.get_entity(phone)
+                telegram_user = await TelegramUser.from_user(self.client, user, phone, self.enrich)
                 return telegram_user
             except:
                 contact = types.InputPhoneContact(client_id=0, phone=phone, first_name="Test", last_name="User")
-                result = await self.client(ImportContactsRequest([contact]))
+                async with timed("import_contacts"):
+                    result = await self.client(ImportContactsRequest([contact]))
                 
                 if not result.users: return None
                 
                 user = result.users[0]
                 try:
-                    full_user = await self.client.get_entity(user.id)
-                    await self.client(DeleteContactsRequest(id=[user.id]))
-                    telegram_user = await TelegramUser.from_user(self.client, full_user, phone)
+                    async with timed("resolve_entity"):
+                        full_user = await self.client.get_entity(user.id)
+                    async with timed("delete_contacts"):
+                        await self.client(DeleteContactsRequest(id=[user.id]))
+                    telegram_user = await TelegramUser.from_user(self.client, full_user, phone, self.enrich)
                     return telegram_user
                 finally:
                     try:
@@ -354,7 +448,7 @@ class TelegramChecker:
             username = validate_username(username)
             user = await self.client.get_entity(username)
             if not isinstance(user, types.User): return None
-            telegram_user = await TelegramUser.from_user(self.client, user, "")
+            telegram_user = await TelegramUser.from_user(self.client, user, "", self.enrich)
             return telegram_user
         except ValueError as e:
             logger.error(f"Invalid username {username}: {str(e)}")
@@ -366,46 +460,87 @@ class TelegramChecker:
             logger.error(f"Error checking username {username}: {str(e)}")
             return None
 
-    async def process_phones(self, phones: List[str]) -> dict:
+    async def process_phones(self, phones: List[str], stream: Optional[ResultStream] = None) -> dict:
+        """identifier → result; with a stream every result goes only to the stream (memory stays flat)."""
         results = {}
+        if stream and stream.done:
+            before = len(phones)
+            phones = [x for x in phones if x.strip() not in stream.done]
+            console.print(f"[yellow]Resuming: skipping {before - len(phones)} already checked[/yellow]")
         total_phones = len(phones)
         console.print(f"\n[cyan]Processing {total_phones} phone numbers...[/cyan]")
+        progress = Every(1.0)  # one progress line per second, not one per phone
+        rejected = []
         
         for i, phone in enumerate(phones, 1):
+            phone = phone.strip()
+            if not phone or (stream and phone in stream.done):
+                continue  # blank or repeated in the input
             try:
-                phone = phone.strip()
-                if not phone: continue
-                console.print(f"[cyan]Checking {phone} ({i}/{total_phones})[/cyan]")
-                user = await self.check_phone_number(phone)
-                results[phone] = asdict(user) if user else {"error": "No Telegram account found"}
+                if progress() or i == total_phones:
+                    console.print(f"[cyan]Checking {phone} ({i}/{total_phones})[/cyan]")
+                reason = rejection_reason(phone)
+                if reason:
+                    rejected.append((phone, reason))
+                    result = {"error": f"Rejected: {reason}"}
+                else:
+                    user = await self.check_phone_number(phone)
+                    result = asdict(user) if user else {"error": "No Telegram account found"}
             except ValueError as e:
-                results[phone] = {"error": str(e)}
+                result = {"error": str(e)}
             except Exception as e:
-                results[phone] = {"error": f"Unexpected error: {str(e)}"}
+                result = {"error": f"Unexpected error: {str(e)}"}
+            if stream:
+                stream.write(phone, result)
+            else:
+                results[phone] = result
+        if rejected:
+            record_rejections(rejected, "tgphonedetail")
+            console.print(f"[yellow]{len(rejected)} impossible numbers skipped (see rejected_numbers.csv)[/yellow]")
         return results
 
-    async def process_usernames(self, usernames: List[str]) -> dict:
+    async def process_usernames(self, usernames: List[str], stream: Optional[ResultStream] = None) -> dict:
+        """identifier → result; with a stream every result goes only to the stream (memory stays flat)."""
         results = {}
+        if stream and stream.done:
+            before = len(usernames)
+            usernames = [x for x in usernames if x.strip() not in stream.done]
+            console.print(f"[yellow]Resuming: skipping {before - len(usernames)} already checked[/yellow]")
         total_usernames = len(usernames)
         console.print(f"\n[cyan]Processing {total_usernames} usernames...[/cyan]")
+        progress = Every(1.0)
         
         for i, username in enumerate(usernames, 1):
+            username = username.strip()
+            if not username or (stream and username in stream.done):
+                continue  # blank or repeated in the input
             try:
-                username = username.strip()
-                if not username: continue
-                console.print(f"[cyan]Checking {username} ({i}/{total_usernames})[/cyan]")
+                if progress() or i == total_usernames:
+                    console.print(f"[cyan]Checking {username} ({i}/{total_usernames})[/cyan]")
                 user = await self.check_username(username)
-                results[username] = asdict(user) if user else {"error": "No Telegram account found"}
+                result = asdict(user) if user else {"error": "No Telegram account found"}
             except ValueError as e:
-                results[username] = {"error": str(e)}
+                result = {"error": str(e)}
             except Exception as e:
-                results[username] = {"error": f"Unexpected error: {str(e)}"}
+                result = {"error": f"Unexpected error: {str(e)}"}
+            if stream:
+                stream.write(username, result)
+            else:
+                results[username] = result
         return results
 
-def display_summary(results: dict):
-    """Display summary of results."""
-    total = len(results)
-    found = sum(1 for r in results.values() if "error" not in r)
+def display_summary(results: Iterable[Tuple[str, dict]]):
+    """Display summary of (identifier, result) pairs in one pass: found accounts, then the totals."""
+    total = found = 0
+    for identifier, data in results:
+        total += 1
+        if "error" not in data:
+            found += 1
+            if found == 1:
+                console.print("\n[bold]FOUND ACCOUNTS:[/bold]")
+            name = f"{data.get('first_name', '')} {data.get('last_name', '')}".strip()
+            username = f"@{data.get('username', '')}" if data.get('username') else 'No username'
+            console.print(f"  • {identifier}: {name} ({username})")
     errors = total - found
     
     console.print("\n" + "="*50)
@@ -415,20 +550,116 @@ def display_summary(results: dict):
     console.print(f"[red]✗ Errors/Not Found: {errors}[/red]")
     console.print(f"[cyan]Total Processed: {total}[/cyan]")
     console.print("="*50)
-    
-    if found > 0:
-        console.print("\n[bold]FOUND ACCOUNTS:[/bold]")
-        for identifier, data in results.items():
-            if "error" not in data:
-                name = f"{data.get('first_name', '')} {data.get('last_name', '')}".strip()
-                username = f"@{data.get('username', '')}" if data.get('username') else 'No username'
-                console.print(f"  • {identifier}: {name} ({username})")
+
+HEADLESS_FIELDS = ["input", "checked_at", "error"] + [f.name for f in fields(TelegramUser)]
+
+def iter_input_lines(paths: List[str]):
+    """Lines from the given files in order; '-' or no files means stdin."""
+    for path in paths or ["-"]:
+        if path == "-":
+            yield from sys.stdin
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                yield from f
+
+async def run_headless(args):
+    """Pipeline mode: input lines → N concurrent checks → one record per line on stdout."""
+    console.file = sys.stderr  # stdout carries records only
+    checker = TelegramChecker()
+    checker.enrich = not args.no_enrich
+    # connect + authorize while the reader is already parsing input
+    login = asyncio.create_task(checker.initialize(interactive=False))
+    check = checker.check_phone_number if args.mode == "phones" else checker.check_username
+
+    rejected = []
+
+    async def normalize(line, emit):
+        identifier = line.strip()
+        if not identifier:
+            return
+        try:
+            with timed("normalize"):
+                reason = rejection_reason(identifier) if args.mode == "phones" else None
+        except Exception as e:
+            await emit((identifier, {"error": f"Unexpected error: {str(e)}"}))
+            return
+        if reason:
+            rejected.append((identifier, reason))
+            await emit((identifier, {"error": f"Rejected: {reason}"}))
+        else:
+            await emit((identifier, None))
+
+    async def dispatch(item, emit):
+        identifier, result = item
+        if result is None:
+            try:
+                await login
+            except Exception as e:
+                raise StopPipeline(str(e)) from e
+            try:
+                user = await check(identifier)
+                result = asdict(user) if user else {"error": "No Telegram account found"}
+            except Exception as e:
+                result = {"error": f"Unexpected error: {str(e)}"}
+        await emit((identifier, result))
+
+    out = sys.stdout
+    csv_writer = None
+    if args.format == "csv":
+        csv_writer = csv.DictWriter(out, fieldnames=HEADLESS_FIELDS, extrasaction='ignore')
+        csv_writer.writeheader()
+    closed = False
+
+    async def write(item, emit):
+        nonlocal closed
+        if closed:
+            return  # downstream closed (e.g. `| head`); keep draining so the checks can finish
+        identifier, result = item
+        checked_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            if csv_writer:
+                csv_writer.writerow({"input": identifier, "checked_at": checked_at, **result})
+            else:
+                out.write(json.dumps({"id": identifier, "result": result, "checked_at": checked_at}, ensure_ascii=False) + "\n")
+            out.flush()
+            await emit(item)
+        except BrokenPipeError:
+            closed = True
+
+    pipe = Pipeline("tgphonedetail", logger, queue_size=args.concurrency * 4)
+    pipe.source("reader", from_iterable(iter_input_lines(args.inputs), blocking=True))
+    pipe.stage("normalizer", normalize)
+    pipe.stage("dispatcher", dispatch, workers=args.concurrency)
+    pipe.stage("writer", write)
+    try:
+        await pipe.run()
+    finally:
+        if not login.done():
+            login.cancel()
+        record_rejections(rejected, "tgphonedetail")
+        if checker.client:
+            await checker.client.disconnect()
+
+def parse_headless_args(argv: List[str]):
+    parser = argparse.ArgumentParser(
+        description="Headless detailed checker: reads phones/usernames (files or stdin), writes one record per line")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--phones", dest="mode", action="store_const", const="phones", help="inputs are phone numbers")
+    mode.add_argument("--usernames", dest="mode", action="store_const", const="usernames", help="inputs are usernames")
+    parser.add_argument("inputs", nargs="*", help="input files, one identifier per line ('-' or none = stdin)")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="checks in flight at once (default: 4)")
+    parser.add_argument("--no-enrich", action="store_true", help="skip GetFullUser (no bio / common chats / blocked)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="output format (default: jsonl)")
+    args = parser.parse_args(argv)
+    args.concurrency = max(1, args.concurrency)
+    return args
 
 async def main():
     checker = TelegramChecker()
     await checker.initialize()
     
     while True:
+        stream = None
         rprint("\n[bold cyan]Telegram Account Checker[/bold cyan]")
         rprint("\n1. Check phone numbers from input")
         rprint("2. Check phone numbers from Excel/Text file")
@@ -441,7 +672,8 @@ async def main():
         
         if choice == "1":
             phones = [p.strip() for p in Prompt.ask("Enter phone numbers (comma-separated)").split(",")]
-            results = await checker.process_phones(phones)
+            stream = ResultStream(RESULTS_DIR / f"stream_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+            await checker.process_phones(phones, stream)
         
         elif choice == "2":
             file_path = Prompt.ask("Enter the path to your Excel file (e.g., bd_numbers_state.xlsx)")
@@ -459,7 +691,8 @@ async def main():
                     continue
                     
                 console.print(f"[green]Found {len(phones)} phone numbers in the file[/green]")
-                results = await checker.process_phones(phones)
+                stream = open_stream(file_path)
+                await checker.process_phones(phones, stream)
             except FileNotFoundError:
                 console.print("[red]File not found![/red]")
                 continue
@@ -469,14 +702,16 @@ async def main():
         
         elif choice == "3":
             usernames = [u.strip() for u in Prompt.ask("Enter usernames (comma-separated)").split(",")]
-            results = await checker.process_usernames(usernames)
+            stream = ResultStream(RESULTS_DIR / f"stream_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+            await checker.process_usernames(usernames, stream)
         
         elif choice == "4":
             file_path = Prompt.ask("Enter the path to your usernames text file")
             try:
                 with open(file_path, 'r') as f:
                     usernames = [line.strip() for line in f if line.strip()]
-                results = await checker.process_usernames(usernames)
+                stream = open_stream(file_path)
+                await checker.process_usernames(usernames, stream)
             except FileNotFoundError:
                 console.print("[red]File not found![/red]")
                 continue
@@ -492,36 +727,46 @@ async def main():
         else:
             break
             
-        if 'results' in locals():
+        if stream is not None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+            # The stream also holds what earlier (resumed) runs checked; every
+            # export below reads it line by line instead of loading it
+            stream.close()
+            console.print(f"[green]Results streamed to: {stream.path}[/green]")
             
             # Save to JSON
             json_file = RESULTS_DIR / f"results_{timestamp}.json"
-            with open(json_file, 'w') as f:
-                json.dump(results, f, indent=2)
-            console.print(f"[green]Results saved to JSON: {json_file}[/green]")
+            save_to_json(stream.records(), json_file)
             
             # Save to Excel
             excel_file = RESULTS_DIR / f"results_{timestamp}.xlsx"
-            save_to_excel(results, excel_file)
+            save_to_excel(stream.records(), excel_file)
             
             # Display summary
-            display_summary(results)
+            display_summary(stream.records())
 
 if __name__ == "__main__":
-    # Install required packages if not already installed
-    try:
-        import pandas
-        import openpyxl  # For .xlsx files
-    except ImportError:
-        console.print("[yellow]Installing required packages for Excel support...[/yellow]")
-        import subprocess
-        subprocess.check_call(["pip", "install", "pandas", "openpyxl", "xlrd"])
-        
+    start_sampling()    # PROFILE_SAMPLE=<ms> (see profiling.py)
+    if len(sys.argv) > 1:
+        # e.g.  cat phones.txt | python tgphonedetail.py --phones -c 8 --no-enrich > out.jsonl
+        try:
+            asyncio.run(run_headless(parse_headless_args(sys.argv[1:])))
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            logger.error(f"Headless run failed: {str(e)}")
+            sys.exit(1)
+        finally:
+            finish_profile("tgphonedetail", logger)
+        sys.exit(0)
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         console.print("\n[yellow]Program terminated by user[/yellow]")
     except Exception as e:
         console.print(f"\n[red]An error occurred: {str(e)}[/red]")
-        logger.exception("Unhandled exception occurred")
\ No newline at end of file
+        logger.exception("Unhandled exception occurred")
+    finally:
+        finish_profile("tgphonedetail", logger)
\ No newline at end of file